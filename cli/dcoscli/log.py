@@ -1,18 +1,26 @@
+import collections
 import contextlib
 import datetime
 import functools
+import heapq
+import itertools
 import json
+import os
 import sys
+import tempfile
+import threading
 import time
 
 import six
-from six.moves import urllib
+from six.moves import queue, urllib
 
 from dcos import config, emitting, http, packagemanager, sse, util
 from dcos.cosmos import get_cosmos_url
 from dcos.errors import (DCOSAuthenticationException,
                          DCOSAuthorizationException,
+                         DCOSConnectionError,
                          DCOSException,
+                         DCOSHTTPException,
                          DefaultError)
 
 logger = util.get_logger(__name__)
@@ -41,19 +49,132 @@ def log_files(mesos_files, follow, lines):
     if not mesos_files:
         raise _no_file_exception()
 
-    while follow:
+    if follow:
+        _follow_files(curr_header, mesos_files)
+
+
+# Bounds of the interval between two reads of a followed file.  A file is
+# read every FOLLOW_MIN_INTERVAL seconds while it is growing, and the
+# interval doubles up to FOLLOW_MAX_INTERVAL while it is idle.
+FOLLOW_MIN_INTERVAL = 0.25
+FOLLOW_MAX_INTERVAL = 4.0
+
+
+def _follow_files(curr_header, mesos_files):
+    """Prints the lines appended to `mesos_files` until they all become
+    unreachable.  Files are polled by one long-lived thread per host,
+    each with its own backoff, and printed by the calling thread as the
+    lines arrive.
+
+    :param curr_header: Most recently printed header
+    :type curr_header: str
+    :param mesos_files: files to follow
+    :type mesos_files: [MesosFile]
+    :rtype: None
+    """
+
+    files_by_host = collections.OrderedDict()
+    for mesos_file in mesos_files:
+        files_by_host.setdefault(mesos_file.slave_id(), []).append(
+            mesos_file)
+
+    results = queue.Queue()
+    for host_files in files_by_host.values():
+        worker = threading.Thread(target=_follow_worker,
+                                  args=(host_files, results))
+        worker.daemon = True
+        worker.start()
+
+    reachable = len(mesos_files)
+    while True:
         # This flush is needed only for testing, since stdout is fully
         # buffered (as opposed to line-buffered) when redirected to a
         # pipe.  So if we don't flush, our --follow tests, which use a
         # pipe, never see the data
         sys.stdout.flush()
 
-        curr_header, mesos_files = _stream_files(curr_header,
-                                                 _read_rest,
-                                                 mesos_files)
-        if not mesos_files:
-            raise _no_file_exception()
-        time.sleep(1)
+        try:
+            # Wait with a timeout so that Ctrl-C is handled on all
+            # platforms
+            mesos_file, lines = results.get(timeout=1)
+        except queue.Empty:
+            continue
+
+        if isinstance(lines, Exception):
+            raise lines
+
+        if lines is None:
+            reachable -= 1
+            if not reachable:
+                raise _no_file_exception()
+            continue
+
+        curr_header = _output(curr_header,
+                              reachable > 1,
+                              six.text_type(mesos_file),
+                              lines)
+
+
+def _follow_worker(mesos_files, results):
+    """Reads the lines appended to `mesos_files`, which all live on the
+    same host, and puts them on `results` as (file, lines) pairs.  A file
+    which can't be read is reported as (file, None) and no longer read.
+    Any other error stops the worker, and is put on `results` as
+    (None, exception) for the main thread to raise.
+
+    :param mesos_files: files to follow
+    :type mesos_files: [MesosFile]
+    :param results: queue to put the lines on
+    :type results: queue.Queue
+    :rtype: None
+    """
+
+    # (time of the next read, interval, index, file), ordered by time
+    schedule = [(time.time() + FOLLOW_MIN_INTERVAL, FOLLOW_MIN_INTERVAL, i,
+                 mesos_file)
+                for i, mesos_file in enumerate(mesos_files)]
+    heapq.heapify(schedule)
+
+    try:
+        while schedule:
+            due, interval, i, mesos_file = heapq.heappop(schedule)
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+            try:
+                lines = _read_rest(mesos_file)
+            except DCOSException as e:
+                logger.exception("Error reading file: {}".format(e))
+                results.put((mesos_file, None))
+                continue
+
+            if lines:
+                results.put((mesos_file, lines))
+
+            interval = _next_interval(interval, bool(lines))
+            heapq.heappush(schedule,
+                           (time.time() + interval, interval, i, mesos_file))
+    except Exception as e:
+        # The main thread waits until every file is reported unreachable,
+        # so it must hear about this or it would wait forever
+        logger.exception("Error following files: {}".format(e))
+        results.put((None, e))
+
+
+def _next_interval(interval, grew):
+    """
+    :param interval: current interval between two reads of a file
+    :type interval: float
+    :param grew: whether the last read returned data
+    :type grew: bool
+    :returns: interval to wait before the next read of the file
+    :rtype: float
+    """
+
+    if grew:
+        return FOLLOW_MIN_INTERVAL
+    return min(interval * 2, FOLLOW_MAX_INTERVAL)
 
 
 def _stream_files(curr_header, fn, mesos_files):
@@ -82,8 +203,8 @@ def _stream_files(curr_header, fn, mesos_files):
 
     reachable_files = list(mesos_files)
 
-    # TODO switch to map
-    for job, mesos_file in util.stream(fn, mesos_files):
+    for job, mesos_file in util.stream(
+            fn, mesos_files, key=lambda mesos_file: mesos_file.slave_id()):
         try:
             lines = job.result()
         except DCOSException as e:
@@ -132,7 +253,8 @@ def _output(curr_header, output_header, header, lines):
 
 
 # A liberal estimate of a line size.  Used to estimate how much data
-# we need to fetch from a file when we want to read N lines.
+# we need to fetch from a file when we want to read N lines, until the
+# average size of the lines already read is known.
 LINE_SIZE = 200
 
 
@@ -140,6 +262,11 @@ def _read_last_lines(num_lines, mesos_file):
     """Returns the last `num_lines` of a file, or less if the file is
     smaller.  Seeks to EOF.
 
+    The file is read backwards in windows which at least double in size
+    each time, and which are sized from the average length of the lines
+    read so far, so that long lines or a large `num_lines` only take a
+    few round trips.
+
     :param num_lines: number of lines to read
     :type num_lines: int
     :param mesos_file: file to read
@@ -149,34 +276,43 @@ def _read_last_lines(num_lines, mesos_file):
     """
 
     file_size = mesos_file.size()
+    if num_lines <= 0:
+        mesos_file.seek(file_size)
+        return []
 
     # estimate how much data we need to fetch to read `num_lines`.
     fetch_size = LINE_SIZE * num_lines
 
+    # chunks read so far, from the end of the file backwards
+    chunks = []
+    newlines = 0
     end = file_size
-    start = max(end - fetch_size, 0)
-    data = ''
-    while True:
-        # fetch data
+    while end > 0:
+        start = max(end - fetch_size, 0)
         mesos_file.seek(start)
-        data = mesos_file.read(end - start) + data
+        chunk = mesos_file.read(end - start)
+        if not chunks and chunk.endswith('\n'):
+            # the trailing newline doesn't start another line
+            newlines -= 1
+        chunks.append(chunk)
+        newlines += chunk.count('\n')
+        end = start
 
-        # break if we have enough lines
-        data_tmp = _strip_trailing_newline(data)
-        lines = data_tmp.split('\n')
-        if len(lines) > num_lines:
-            ret = lines[-num_lines:]
-            break
-        elif start == 0:
-            ret = lines
+        # `num_lines` newlines separate the last `num_lines` lines from
+        # the rest of the file
+        if newlines >= num_lines:
             break
 
-        # otherwise shift our read window and repeat
-        end = start
-        start = max(end - fetch_size, 0)
+        # fetch the lines still missing, with some margin, but at least
+        # double the window so the number of round trips stays logarithmic
+        average_line_size = (file_size - start) / max(newlines, 1)
+        fetch_size = max(
+            2 * fetch_size,
+            int(1.25 * average_line_size * (num_lines - newlines)))
 
+    data = _strip_trailing_newline(''.join(reversed(chunks)))
     mesos_file.seek(file_size)
-    return ret
+    return data.split('\n')[-num_lines:]
 
 
 def _read_rest(mesos_file):
@@ -268,58 +404,501 @@ def logging_strategy():
     return strategy
 
 
-def follow_logs(url):
-    """ Function will use dcos.sse.get to subscribe to server sent events
+# A followed dcos-log stream is reported as lagging once its entries
+# arrive LAG_WARNING seconds later than the most recent entries did, and as
+# caught up again once that delay is back under half of it.
+LAG_WARNING = 10.0
+
+
+def follow_logs(url, cursors=None):
+    """ Function will use dcos.sse.stream to subscribe to server sent events
         and follow the real time logs. The log entry has the following format:
         `date _HOSTNAME SYSLOG_IDENTIFIER[_PID]: MESSAGE`, where
         _HOSTNAME, SYSLOG_IDENTIFIER and _PID are optional fields.
         MESSAGE is also optional, however we should skip the entire log entry
         if MESSAGE is not found.
 
+        The lines of all the entries received by one read are written to
+        stdout at once. When the stream drops, it is resumed from the last
+        entry received.
+
     :param url: `dcos-log` streaming endpoint
     :type url: str
+    :param cursors: the positions to resume the stream from, and to update
+    :type cursors: LogCursors | None
+    """
+
+    if cursors is None:
+        cursors = LogCursors()
+    stats = _FollowStats()
+
+    try:
+        for entries, skipped in _stream_entries(url, cursors):
+            if entries:
+                sys.stdout.write(''.join(line for _, line in entries))
+                sys.stdout.flush()
+                stats.update(len(entries) + skipped, skipped, entries[-1][0])
+            else:
+                stats.update(skipped, skipped, None)
+    finally:
+        stats.log()
+        cursors.save()
+
+
+# A dropped `dcos-log` stream is resumed after RECONNECT_MIN_DELAY seconds,
+# and the delay doubles up to RECONNECT_MAX_DELAY while it can't be
+# resumed.  Following stops after RECONNECT_ATTEMPTS attempts in a row
+# which received no entries.
+RECONNECT_MIN_DELAY = 0.5
+RECONNECT_MAX_DELAY = 16.0
+RECONNECT_ATTEMPTS = 10
+
+
+def _stream_entries(url, cursors, prefix=''):
+    """Reads a `dcos-log` stream, and resumes it from the cursor of the
+    last entry received whenever the connection drops or the server ends
+    the stream.
+
+    :param url: `dcos-log` streaming endpoint
+    :type url: str
+    :param cursors: the positions to resume the stream from, and to update
+    :type cursors: LogCursors
+    :param prefix: prefix of the stream's lines and messages
+    :type prefix: str
+    :returns: the ([(timestamp, line)], number of skipped entries) pairs of
+        the entries completed by each read
+    :rtype: generator of ([(float, str)], int)
     """
-    for entry in sse.get(url):
-        # the sse library does not handle sse comments properly
-        # making entry.data empty. As a workaround we can check if `entry.data`
-        # is not empty.
-        if not entry.data:
-            continue
 
+    formatter = _LogEntryFormatter()
+    delay = RECONNECT_MIN_DELAY
+    failures = 0
+    while True:
+        cursor = cursors.get(url)
+        stream_url = url if cursor is None else _resume_url(url, cursor)
         try:
-            entry_json = json.loads(entry.data)
+            for events in sse.stream(stream_url):
+                entries = []
+                for event in events:
+                    line = formatter.format(event.data)
+                    if line is not None:
+                        entries.append((formatter.timestamp, prefix + line))
+                cursor = events[-1].id or formatter.cursor
+                if cursor:
+                    cursors.set(url, cursor)
+                delay = RECONNECT_MIN_DELAY
+                failures = 0
+                yield entries, len(events) - len(entries)
+            error = 'the stream ended'
+        except DCOSConnectionError as e:
+            error = e
+        except DCOSHTTPException as e:
+            # the agent may be restarting behind Admin Router
+            if e.status() < 500:
+                raise
+            error = e
+
+        failures += 1
+        if failures > RECONNECT_ATTEMPTS:
+            raise DCOSException(
+                'Unable to resume the log stream: {}'.format(error))
+
+        logger.info('Resuming %s in %.1fs: %s', url, delay, error)
+        emitter.publish(DefaultError(
+            '{}Lost the log stream; resuming in {:.0f}s'.format(
+                prefix, max(delay, 1))))
+        time.sleep(delay)
+        delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+
+def _resume_url(url, cursor):
+    """
+    :param url: `dcos-log` endpoint
+    :type url: str
+    :param cursor: journal cursor of the last entry read
+    :type cursor: str
+    :returns: `url` starting right after the entry at `cursor` rather than
+        at the last entries of the journal
+    :rtype: str
+    """
+
+    scheme, netloc, path, query, fragment = urllib.parse.urlsplit(url)
+    params = [(name, value)
+              for name, value in urllib.parse.parse_qsl(query, True)
+              if name not in _POSITION_PARAMS]
+    params += [('cursor', cursor), ('skip_next', '1')]
+    return urllib.parse.urlunsplit(
+        (scheme, netloc, path, urllib.parse.urlencode(params), fragment))
+
+
+# Query parameters of `dcos-log` endpoints that set where the entries start
+_POSITION_PARAMS = ('cursor', 'skip_next', 'skip_prev')
+
+
+class LogCursors(object):
+    """The journal cursors of the last entries read from `dcos-log`
+    endpoints, by endpoint.  The range and stream endpoints of the same log
+    share their cursor.  Cursors are only saved to `path` if it is given, so
+    that a later command can resume from them.
+
+    :param path: path of the file to load and save the cursors
+    :type path: str | None
+    """
+
+    # Cursors of this many logs at most are saved; the least recently
+    # read are forgotten first.
+    MAX_SAVED = 256
+
+    def __init__(self, path=None):
+        self._path = path
+        self._cursors = collections.OrderedDict()
+        if path is not None and os.path.exists(path):
+            try:
+                with util.open_file(path) as f:
+                    self._cursors.update(json.load(f))
+            except (DCOSException, ValueError) as e:
+                logger.warning('Ignoring the log cursors in %s: %s', path, e)
+
+    def get(self, url):
+        """
+        :param url: `dcos-log` endpoint
+        :type url: str
+        :returns: the cursor of the last entry read from `url`
+        :rtype: str | None
+        """
+
+        return self._cursors.get(_cursor_key(url))
+
+    def set(self, url, cursor):
+        """
+        :param url: `dcos-log` endpoint
+        :type url: str
+        :param cursor: the cursor of the last entry read from `url`
+        :type cursor: str
+        :rtype: None
+        """
+
+        key = _cursor_key(url)
+        self._cursors.pop(key, None)
+        self._cursors[key] = cursor
+
+    def save(self):
+        """Writes the cursors to the file they were loaded from, if any.
+
+        :rtype: None
+        """
+
+        if self._path is None:
+            return
+
+        cursors = list(self._cursors.items())[-self.MAX_SAVED:]
+        directory = os.path.dirname(self._path)
+        util.ensure_dir_exists(directory)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as temp_file:
+                json.dump(collections.OrderedDict(cursors), temp_file)
+            os.replace(temp_path, self._path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+def saved_log_cursors():
+    """
+    :returns: the cursors saved for the attached cluster, which are saved
+        again after reading
+    :rtype: LogCursors
+    """
+
+    if config.uses_deprecated_config():
+        config_dir = os.path.dirname(config.get_global_config_path())
+    else:
+        config_dir = config.get_attached_cluster_path()
+    if config_dir is None:
+        return LogCursors()
+    return LogCursors(os.path.join(config_dir, 'log_cursors.json'))
+
+
+def _cursor_key(url):
+    """
+    :param url: `dcos-log` endpoint
+    :type url: str
+    :returns: `url` without the parameters that set where the entries start,
+        and with the range endpoint in place of the stream endpoint
+    :rtype: str
+    """
+
+    scheme, netloc, path, query, fragment = urllib.parse.urlsplit(url)
+    params = [(name, value)
+              for name, value in urllib.parse.parse_qsl(query, True)
+              if name not in _POSITION_PARAMS]
+    path = path.replace('/logs/v1/stream/', '/logs/v1/range/')
+    return urllib.parse.urlunsplit(
+        (scheme, netloc, path, urllib.parse.urlencode(params), fragment))
+
+
+# Entries of followed streams are held for up to REORDER_WINDOW seconds, so
+# that those which arrive late from slower streams are printed in timestamp
+# order.  At most MAX_REORDER_ENTRIES entries are held; once more arrive the
+# oldest are printed right away.
+REORDER_WINDOW = 0.5
+MAX_REORDER_ENTRIES = 10000
+
+# Number of received batches of entries which may wait to be merged, per
+# followed stream.  Reading a stream stops while the queue is full.
+FOLLOW_QUEUE_SIZE = 4
+
+
+def follow_many_logs(streams, cursors=None):
+    """Follows several `dcos-log` streams at once, one thread per stream.
+    The entries are merged in timestamp order within `REORDER_WINDOW` and
+    each line is prefixed with the label of its stream. Dropped streams are
+    resumed from their last entry. Returns once all the streams have
+    failed.
+
+    :param streams: (label, `dcos-log` streaming endpoint) pairs
+    :type streams: [(str, str)]
+    :param cursors: the positions to resume the streams from, and to update
+    :type cursors: LogCursors | None
+    :rtype: None
+    """
+
+    if cursors is None:
+        cursors = LogCursors()
+    width = max(len(label) for label, _ in streams)
+    results = queue.Queue(maxsize=FOLLOW_QUEUE_SIZE * len(streams))
+    for label, url in streams:
+        worker = threading.Thread(
+            target=_follow_stream_worker,
+            args=('{} | '.format(label.ljust(width)), url, cursors, results))
+        worker.daemon = True
+        worker.start()
+
+    # (timestamp, sequence number, arrival time, line), ordered by
+    # timestamp
+    pending = []
+    seq = itertools.count()
+    following = len(streams)
+    stats = _FollowStats()
+
+    try:
+        while following or pending:
+            timeout = 1
+            if pending:
+                timeout = max(pending[0][2] + REORDER_WINDOW - time.time(), 0)
+
+            try:
+                # Wait with a timeout so that Ctrl-C is handled on all
+                # platforms
+                entries, skipped = results.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                if entries is None:
+                    following -= 1
+                else:
+                    arrival = time.time()
+                    for timestamp, line in entries:
+                        heapq.heappush(
+                            pending, (timestamp, next(seq), arrival, line))
+                    stats.update(len(entries) + skipped, skipped, None)
+
+            lines = []
+            now = time.time()
+            while pending and (not following or
+                               len(pending) > MAX_REORDER_ENTRIES or
+                               pending[0][2] + REORDER_WINDOW <= now):
+                timestamp, _, _, line = heapq.heappop(pending)
+                lines.append(line)
+
+            if lines:
+                sys.stdout.write(''.join(lines))
+                sys.stdout.flush()
+                stats.update(0, 0, timestamp)
+    finally:
+        stats.log()
+        cursors.save()
+
+
+def _follow_stream_worker(prefix, url, cursors, results):
+    """Reads a `dcos-log` stream and puts its entries on `results` as
+    ([(timestamp, line)], number of skipped entries) pairs, and
+    (None, 0) once the stream can't be resumed.
+
+    :param prefix: prefix of the stream's lines
+    :type prefix: str
+    :param url: `dcos-log` streaming endpoint
+    :type url: str
+    :param cursors: the positions to resume the stream from, and to update
+    :type cursors: LogCursors
+    :param results: queue to put the entries on
+    :type results: queue.Queue
+    :rtype: None
+    """
+
+    try:
+        for entries, skipped in _stream_entries(url, cursors, prefix):
+            results.put((entries, skipped))
+    except Exception as e:
+        logger.exception('Error following %s', url)
+        emitter.publish(DefaultError(
+            '{}error following the log: {}'.format(prefix, e)))
+    finally:
+        results.put((None, 0))
+
+
+class _LogEntryFormatter(object):
+    """Formats `dcos-log` entries as lines of output. Dates are formatted
+    once per second of log entries."""
+
+    def __init__(self):
+        self._second = None
+        self._date = None
+
+        self.timestamp = None
+        """`realtime_timestamp` of the last entry, in seconds"""
+
+        self.cursor = None
+        """journal cursor of the last entry"""
+
+    def format(self, data):
+        """
+        :param data: JSON encoded log entry
+        :type data: str
+        :returns: the line for the entry, or None if it has no MESSAGE
+        :rtype: str | None
+        """
+
+        # comments and keep-alive events have no data
+        if not data:
+            return None
+
+        try:
+            entry_json = json.loads(data)
         except ValueError:
             raise DCOSException(
-                'Could not deserialize log entry to json: {}'.format(entry))
+                'Could not deserialize log entry to json: {}'.format(data))
 
         if 'fields' not in entry_json:
             raise DCOSException(
-                'Missing `fields` in log entry: {}'.format(entry))
+                'Missing `fields` in log entry: {}'.format(data))
+
+        self.cursor = entry_json.get('cursor', self.cursor)
 
         # `MESSAGE` is optional field. Skip the log entry if it's missing.
-        if 'MESSAGE' not in entry_json['fields']:
-            continue
+        message = entry_json['fields'].get('MESSAGE')
+        if message is None:
+            return None
 
         if 'realtime_timestamp' not in entry_json:
             raise DCOSException(
-                'Missing `realtime_timestamp` in log entry: {}'.format(entry))
+                'Missing `realtime_timestamp` in log entry: {}'.format(data))
 
         # entry.RealtimeTimestamp returns a unix time in microseconds
         # https://www.freedesktop.org/software/systemd/man/sd_journal_get_realtime_usec.html
-        timestamp = int(entry_json['realtime_timestamp'] / 1000000)
-        t = datetime.datetime.fromtimestamp(timestamp).strftime(
-            '%Y-%m-%d %H:%m:%S')
-        line = '{}: {}'.format(t, entry_json['fields']['MESSAGE'])
-        emitter.publish(line)
+        self.timestamp = entry_json['realtime_timestamp'] / 1000000
+        second = int(self.timestamp)
+        if second != self._second:
+            self._second = second
+            self._date = datetime.datetime.fromtimestamp(second).strftime(
+                '%Y-%m-%d %H:%M:%S')
+
+        return '{}: {}\n'.format(self._date, message)
 
 
-def print_logs_range(url):
+class _FollowStats(object):
+    """Counts the entries of a followed `dcos-log` stream, and reports when
+    the CLI falls behind it.
+
+    The delay of an entry is the time it is received minus its timestamp.
+    The smallest delay seen is the baseline: it includes the clock skew
+    between the CLI and the cluster, and how far the stream was behind the
+    journal when it was caught up.
+    """
+
+    def __init__(self):
+        self._start = time.time()
+        self._window_start = self._start
+        self._window_entries = 0
+        self._rate = 0.0
+        self._min_delay = None
+        self._lagging = False
+
+        self.entries = 0
+        self.skipped = 0
+        self.max_lag = 0.0
+
+    def update(self, entries, skipped, timestamp):
+        """
+        :param entries: number of entries received
+        :type entries: int
+        :param skipped: number of those entries that were not printed
+        :type skipped: int
+        :param timestamp: timestamp of the last printed entry, in seconds
+        :type timestamp: float | None
+        :rtype: None
+        """
+
+        now = time.time()
+        self.entries += entries
+        self.skipped += skipped
+
+        self._window_entries += entries
+        if now - self._window_start >= 1:
+            self._rate = self._window_entries / (now - self._window_start)
+            self._window_start = now
+            self._window_entries = 0
+
+        if timestamp is None:
+            return
+
+        delay = now - timestamp
+        if self._min_delay is None or delay < self._min_delay:
+            self._min_delay = delay
+        lag = delay - self._min_delay
+        self.max_lag = max(self.max_lag, lag)
+
+        if not self._lagging and lag >= LAG_WARNING:
+            self._lagging = True
+            emitter.publish(DefaultError(
+                'Falling behind the log stream: {:.0f}s behind at '
+                '{:.0f} entries/s'.format(lag, self._rate)))
+        elif self._lagging and lag < LAG_WARNING / 2:
+            self._lagging = False
+            emitter.publish(DefaultError('Caught up with the log stream'))
+
+    def log(self):
+        """Logs the number of entries and their rate.
+
+        :rtype: None
+        """
+
+        elapsed = time.time() - self._start
+        logger.info(
+            'Followed %d log entries in %.1fs (%.0f entries/s), skipped %d '
+            'without a MESSAGE, maximum lag %.1fs',
+            self.entries, elapsed, self.entries / max(elapsed, 0.001),
+            self.skipped, self.max_lag)
+
+
+def print_logs_range(url, cursors=None):
     """ Make a get request to `dcos-log` range endpoint.
         the function will print out logs to stdout and exit.
 
+        If `cursors` are given, the entries are read as server sent events
+        so that the cursor of the last one is known, and the range starts
+        right after the cursor already known for `url`, if any.
+
     :param url: `dcos-log` endpoint
     :type url: str
+    :param cursors: the positions to resume the range from, and to update
+    :type cursors: LogCursors | None
     """
+
+    if cursors is not None:
+        return _print_logs_since(url, cursors)
+
     with contextlib.closing(
             http.get(url, headers={'Accept': 'text/plain'})) as r:
 
@@ -333,3 +912,38 @@ def print_logs_range(url):
 
         for line in r.iter_lines():
             emitter.publish(line.decode('utf-8', 'ignore'))
+
+
+def _print_logs_since(url, cursors):
+    """Prints the entries of a `dcos-log` range, starting after the cursor
+    known for `url` if any, and saves the cursor of the last entry.
+
+    :param url: `dcos-log` range endpoint
+    :type url: str
+    :param cursors: the positions to resume the range from, and to update
+    :type cursors: LogCursors
+    :rtype: None
+    """
+
+    cursor = cursors.get(url)
+    range_url = url if cursor is None else _resume_url(url, cursor)
+
+    formatter = _LogEntryFormatter()
+    received = False
+    for events in sse.stream(range_url):
+        received = True
+        lines = []
+        for event in events:
+            line = formatter.format(event.data)
+            if line is not None:
+                lines.append(line)
+        if lines:
+            sys.stdout.write(''.join(lines))
+            sys.stdout.flush()
+        cursor = events[-1].id or formatter.cursor
+        if cursor:
+            cursors.set(url, cursor)
+
+    if not received and cursors.get(url) is None:
+        raise DCOSException('No logs found')
+    cursors.save()
@@ -67,6 +67,9 @@ def _main():
     if args['--debug']:
         os.environ[constants.DCOS_DEBUG_ENV] = 'true'
 
+    if args['--no-cache']:
+        os.environ[constants.DCOS_CACHE_TTL_ENV] = '0'
+
     util.configure_process_from_environ()
 
     if config.uses_deprecated_config():
@@ -9,7 +9,7 @@ import six
 
 import dcoscli
 from dcos import cmds, emitting, http, jsonitem, marathon, options, util
-from dcos.errors import DCOSException
+from dcos.errors import DCOSConnectionError, DCOSException, DefaultError
 from dcoscli import tables
 from dcoscli.subcommand import default_command_info, default_doc
 from dcoscli.util import decorate_docopt_usage
@@ -17,6 +17,13 @@ from dcoscli.util import decorate_docopt_usage
 logger = util.get_logger(__name__)
 emitter = emitting.FlatEmitter()
 
+# The only fields embedded in the apps that `dcos marathon app list` needs
+# beside their definitions: the task counts and the deployments
+APP_TABLE_EMBED = ['apps.counts', 'apps.deployments']
+
+# Moves the cursor home and clears the terminal, like `clear`
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+
 
 def main(argv):
     try:
@@ -102,7 +109,7 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['marathon', 'app', 'remove'],
-            arg_keys=['<app-id>', '--force'],
+            arg_keys=['<app-id>', '--all-under', '--force', '--wait'],
             function=subcommand.remove),
 
         cmds.Command(
@@ -117,17 +124,18 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['marathon', 'app', 'stop'],
-            arg_keys=['<app-id>', '--force'],
+            arg_keys=['<app-id>', '--all-under', '--force', '--wait'],
             function=subcommand.stop),
 
         cmds.Command(
             hierarchy=['marathon', 'app', 'update'],
-            arg_keys=['<app-id>', '<properties>', '--force'],
+            arg_keys=['<app-id>', '<properties>', '--force', '--if-changed',
+                      '--dry-run'],
             function=subcommand.update),
 
         cmds.Command(
             hierarchy=['marathon', 'app', 'restart'],
-            arg_keys=['<app-id>', '--force'],
+            arg_keys=['<app-id>', '--all-under', '--force', '--wait'],
             function=subcommand.restart),
 
         cmds.Command(
@@ -157,7 +165,8 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['marathon', 'group', 'update'],
-            arg_keys=['<group-id>', '<properties>', '--force'],
+            arg_keys=['<group-id>', '<properties>', '--force',
+                      '--if-changed', '--dry-run'],
             function=subcommand.group_update),
 
         cmds.Command(
@@ -187,7 +196,7 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['marathon', 'pod', 'update'],
-            arg_keys=['<pod-id>', '--force'],
+            arg_keys=['<pod-id>', '--force', '--if-changed', '--dry-run'],
             function=subcommand.pod_update),
 
         cmds.Command(
@@ -395,18 +404,23 @@ class MarathonSubcommand(object):
         """
 
         client = self._create_marathon_client()
-        apps = client.get_apps()
 
         if json_:
-            emitter.publish(apps)
-        else:
-            deployments = client.get_deployments()
-            queued_apps = client.get_queued_apps()
-            _enhance_row_with_overdue_information(apps, queued_apps)
-            table = tables.app_table(apps, deployments)
-            output = six.text_type(table)
-            if output:
-                emitter.publish(output)
+            emitter.publish(emitting.json_chunks(client.iter_apps()))
+            return 0
+
+        # the deployments and the launch queue are fetched while the apps
+        # are, on the shared thread pool
+        executor = util.get_executor()
+        deployments = executor.submit(client.get_deployments)
+        queued_apps = executor.submit(client.get_queued_apps)
+        apps = client.get_apps(embed=APP_TABLE_EMBED)
+
+        _enhance_row_with_overdue_information(apps, queued_apps.result())
+        table = tables.app_table(apps, deployments.result())
+        output = six.text_type(table)
+        if output:
+            emitter.publish(output)
 
         return 0
 
@@ -451,18 +465,30 @@ class MarathonSubcommand(object):
 
         return 0
 
-    def remove(self, app_id, force):
+    def remove(self, app_id, all_under, force, wait):
         """
         :param app_id: ID of the app to remove
         :type app_id: str
+        :param all_under: ID of the group whose apps to remove instead
+        :type all_under: str | None
         :param force: Whether to override running deployments.
         :type force: bool
+        :param wait: whether to wait for the deployments to finish
+        :type wait: bool
         :returns: process return code
         :rtype: int
         """
 
         client = self._create_marathon_client()
-        client.remove_app(app_id, force)
+
+        if all_under is not None:
+            app_ids = [app['id'] for app in client.get_apps_under(all_under)]
+            return _bulk_apps(
+                client, client.remove_apps(app_ids, force), wait)
+
+        deployment = client.remove_app(app_id, force)
+        if wait:
+            return _wait_for_deployments(client, [deployment])
         return 0
 
     def group_remove(self, group_id, force):
@@ -518,7 +544,8 @@ class MarathonSubcommand(object):
         emitter.publish(app)
         return 0
 
-    def group_update(self, group_id, properties, force):
+    def group_update(self, group_id, properties, force, if_changed=False,
+                     dry_run=False):
         """
         :param group_id: the id of the group
         :type group_id: str
@@ -526,6 +553,11 @@ class MarathonSubcommand(object):
         :type properties: [str]
         :param force: whether to override running deployments
         :type force: bool
+        :param if_changed: whether to send only the fields that changed,
+            if any
+        :type if_changed: bool
+        :param dry_run: whether to only print the changes
+        :type dry_run: bool
         :returns: process return code
         :rtype: int
         """
@@ -533,10 +565,16 @@ class MarathonSubcommand(object):
         client = self._create_marathon_client()
 
         # Ensure that the group exists
-        client.get_group(group_id)
+        current = client.get_group(group_id)
 
         resource = self._resource_reader.\
             get_resource_from_properties(properties)
+        if if_changed or dry_run:
+            resource = _changed_fields(
+                'groups', group_id, current, resource, dry_run)
+            if resource is None:
+                return 0
+
         deployment = client.update_group(group_id, resource, force)
 
         emitter.publish('Created deployment {}'.format(deployment))
@@ -589,20 +627,28 @@ class MarathonSubcommand(object):
 
         return 0
 
-    def stop(self, app_id, force):
+    def stop(self, app_id, all_under, force, wait):
         """Stop a Marathon application
 
         :param app_id: the id of the application
         :type app_id: str
+        :param all_under: id of the group whose applications to stop instead
+        :type all_under: str | None
         :param force: whether to override running deployments
         :type force: bool
+        :param wait: whether to wait for the deployments to finish
+        :type wait: bool
         :returns: process return code
         :rtype: int
         """
 
-        # Check that the application exists
         client = self._create_marathon_client()
 
+        if all_under is not None:
+            app_ids = _running_app_ids(client, all_under)
+            return _bulk_apps(client, client.stop_apps(app_ids, force), wait)
+
+        # Check that the application exists
         desc = client.get_app(app_id)
 
         if desc['instances'] <= 0:
@@ -618,7 +664,12 @@ class MarathonSubcommand(object):
 
         emitter.publish('Created deployment {}'.format(deployment))
 
-    def update(self, app_id, properties, force):
+        if wait:
+            return _wait_for_deployments(client, [deployment])
+        return 0
+
+    def update(self, app_id, properties, force, if_changed=False,
+               dry_run=False):
         """
         :param app_id: the id of the application
         :type app_id: str
@@ -626,6 +677,11 @@ class MarathonSubcommand(object):
         :type properties: [str]
         :param force: whether to override running deployments
         :type force: bool
+        :param if_changed: whether to send only the fields that changed,
+            if any
+        :type if_changed: bool
+        :param dry_run: whether to only print the changes
+        :type dry_run: bool
         :returns: process return code
         :rtype: int
         """
@@ -633,10 +689,16 @@ class MarathonSubcommand(object):
         client = self._create_marathon_client()
 
         # Ensure that the application exists
-        client.get_app(app_id)
+        current = client.get_app(app_id)
 
         resource = self._resource_reader.\
             get_resource_from_properties(properties)
+        if if_changed or dry_run:
+            resource = _changed_fields(
+                'apps', app_id, current, resource, dry_run)
+            if resource is None:
+                return 0
+
         deployment = client.update_app(app_id, resource, force)
 
         emitter.publish('Created deployment {}'.format(deployment))
@@ -660,18 +722,28 @@ class MarathonSubcommand(object):
         emitter.publish('Created deployment {}'.format(deployment))
         return 0
 
-    def restart(self, app_id, force):
+    def restart(self, app_id, all_under, force, wait):
         """
         :param app_id: the id of the application
         :type app_id: str
+        :param all_under: id of the group whose applications to restart
+            instead
+        :type all_under: str | None
         :param force: whether to override running deployments
         :type force: bool
+        :param wait: whether to wait for the deployments to finish
+        :type wait: bool
         :returns: process return code
         :rtype: int
         """
 
         client = self._create_marathon_client()
 
+        if all_under is not None:
+            app_ids = _running_app_ids(client, all_under)
+            return _bulk_apps(
+                client, client.restart_apps(app_ids, force), wait)
+
         desc = client.get_app(app_id)
 
         if desc['instances'] <= 0:
@@ -687,6 +759,9 @@ class MarathonSubcommand(object):
 
         message = 'Created deployment {}'.format(payload['deploymentId'])
         emitter.publish(message)
+
+        if wait:
+            return _wait_for_deployments(client, [payload['deploymentId']])
         return 0
 
     def kill(self, app_id, scale, host):
@@ -791,10 +866,13 @@ class MarathonSubcommand(object):
         return 0
 
     def deployment_watch(self, deployment_id, max_count, interval):
-        """
+        """Prints the deployment as Marathon's events report its progress,
+        or by polling it if Marathon's event stream is unavailable.
+
         :param deployment_id: the application id
         :type deployment_id: str
-        :param max_count: maximum number of polling calls
+        :param max_count: maximum number of polling calls, or of updates
+            when following Marathon's events
         :type max_count: str
         :param interval: wait interval in seconds between polling calls
         :type interval: str
@@ -809,25 +887,16 @@ class MarathonSubcommand(object):
 
         client = self._create_marathon_client()
 
-        count = 0
-        while max_count is None or count < max_count:
-            deployment = client.get_deployment(deployment_id)
-
-            if deployment is None:
-                return 0
-            if util.is_windows_platform():
-                os.system('cls')
-            else:
-                if 'TERM' in os.environ:
-                    os.system('clear')
-            emitter.publish('Deployment update time: '
-                            '{} \n'.format(time.strftime("%Y-%m-%d %H:%M:%S",
-                                                         time.gmtime())))
-            emitter.publish(deployment)
-            time.sleep(interval)
-            count += 1
+        try:
+            events = client.get_deployment_events()
+        except DCOSException as e:
+            logger.info('Polling the deployment: Marathon events are '
+                        'unavailable: %s', e)
+            return _poll_deployment(
+                client, deployment_id, max_count, interval)
 
-        return 0
+        return _watch_deployment_events(
+            client, deployment_id, max_count, interval, events)
 
     def task_list(self, app_id, json_):
         """
@@ -840,9 +909,14 @@ class MarathonSubcommand(object):
         """
 
         client = self._create_marathon_client()
-        tasks = client.get_tasks(app_id)
+        tasks = client.iter_tasks(app_id)
 
-        emitting.publish_table(emitter, tasks, tables.app_task_table, json_)
+        if json_:
+            emitter.publish(emitting.json_chunks(tasks))
+        else:
+            # the table is sorted, so it needs all the tasks
+            emitting.publish_table(
+                emitter, list(tasks), tables.app_task_table, json_)
         return 0
 
     def task_stop(self, task_id, wipe):
@@ -990,12 +1064,17 @@ class MarathonSubcommand(object):
         emitter.publish(pod_json)
         return 0
 
-    def pod_update(self, pod_id, force):
+    def pod_update(self, pod_id, force, if_changed=False, dry_run=False):
         """
         :param pod_id: the Marathon ID of the pod to update
         :type pod_id: str
         :param force: whether to override running deployments
         :type force: bool
+        :param if_changed: whether to skip the update if it doesn't change
+            the pod
+        :type if_changed: bool
+        :param dry_run: whether to only print the changes
+        :type dry_run: bool
         :returns: process return code
         :rtype: int
         """
@@ -1004,9 +1083,15 @@ class MarathonSubcommand(object):
         self._ensure_pods_support(marathon_client)
 
         # Ensure that the pod exists
-        marathon_client.show_pod(pod_id)
+        status = marathon_client.show_pod(pod_id)
 
         resource = self._resource_reader.get_resource(name=None)
+        if if_changed or dry_run:
+            resource = _changed_fields(
+                'pods', pod_id, status.get('spec', {}), resource, dry_run)
+            if resource is None:
+                return 0
+
         deployment_id = marathon_client.update_pod(
             pod_id, pod_json=resource, force=force)
 
@@ -1110,6 +1195,388 @@ class MarathonSubcommand(object):
             raise DCOSException(msg)
 
 
+def _watch_deployment_events(client, deployment_id, max_count, interval,
+                             events):
+    """Prints a deployment each time Marathon reports its progress, until it
+    ends.  The progress is taken from the plan and current step that
+    Marathon's events carry.  The stream of events is resumed if it drops or
+    stays idle for `marathon.EVENT_READ_TIMEOUT` seconds, after fetching the
+    deployment again in case an event was missed.
+
+    :param client: Marathon client
+    :type client: dcos.marathon.Client
+    :param deployment_id: the deployment id
+    :type deployment_id: str
+    :param max_count: maximum number of updates to print
+    :type max_count: int | None
+    :param interval: wait interval in seconds between polling calls, if
+        Marathon's events become unavailable
+    :type interval: int
+    :param events: subscription to Marathon's deployment events
+    :type events: generator of [dcos.sse.Event]
+    :returns: process return code
+    :rtype: int
+    """
+
+    count = 0
+    while True:
+        try:
+            deployment = client.get_deployment(deployment_id)
+            if deployment is None:
+                return 0
+            if max_count is not None and count >= max_count:
+                return 0
+            _show_deployment(deployment)
+            count += 1
+
+            for batch in events:
+                # the deployment is printed at most once per batch
+                progress = None
+                for event in batch:
+                    try:
+                        data = json.loads(event.data)
+                    except ValueError:
+                        logger.info('Ignoring event %r', event)
+                        continue
+                    event_id = data.get('id') or data.get('plan', {}).get('id')
+                    if event_id != deployment_id:
+                        continue
+
+                    if event.event == 'deployment_success':
+                        emitter.publish('Deployment {} succeeded'.format(
+                            deployment_id))
+                        return 0
+                    if event.event == 'deployment_failed':
+                        emitter.publish(DefaultError(
+                            'Deployment {} failed'.format(deployment_id)))
+                        return 1
+                    if 'plan' in data and 'currentStep' in data:
+                        progress = _deployment_progress(
+                            progress or deployment,
+                            data['plan'],
+                            data['currentStep'])
+
+                if progress is None:
+                    continue
+                if max_count is not None and count >= max_count:
+                    return 0
+                deployment = progress
+                _show_deployment(deployment)
+                count += 1
+        except DCOSConnectionError as e:
+            logger.info('Resubscribing to Marathon events: %s', e)
+        finally:
+            events.close()
+
+        try:
+            events = client.get_deployment_events()
+        except DCOSException as e:
+            logger.info('Polling the deployment: Marathon events are '
+                        'unavailable: %s', e)
+            if max_count is not None:
+                max_count -= count
+            return _poll_deployment(
+                client, deployment_id, max_count, interval)
+
+
+def _deployment_progress(deployment, plan, current_step):
+    """Applies the progress reported by a deployment_info or
+    deployment_step_* event to a deployment, as returned by
+    /v2/deployments.
+
+    :param deployment: the deployment
+    :type deployment: dict
+    :param plan: the deployment plan of the event
+    :type plan: dict
+    :param current_step: the current step of the event
+    :type current_step: dict
+    :returns: the updated deployment
+    :rtype: dict
+    """
+
+    steps = plan.get('steps', deployment.get('steps', []))
+    progress = dict(deployment, steps=steps, totalSteps=len(steps))
+    if current_step in steps:
+        progress['currentStep'] = steps.index(current_step) + 1
+    progress['currentActions'] = [
+        dict({key: value for key, value in action.items()
+              if key in ('action', 'app', 'pod')},
+             readinessCheckResults=[])
+        for action in current_step.get('actions', [])]
+    return progress
+
+
+def _poll_deployment(client, deployment_id, max_count, interval):
+    """Prints a deployment every `interval` seconds while it changes, until
+    it ends.  The deployments are fetched with conditional requests, so
+    that Marathon doesn't send them again when they haven't changed.
+
+    :param client: Marathon client
+    :type client: dcos.marathon.Client
+    :param deployment_id: the deployment id
+    :type deployment_id: str
+    :param max_count: maximum number of polling calls
+    :type max_count: int | None
+    :param interval: wait interval in seconds between polling calls
+    :type interval: int
+    :returns: process return code
+    :rtype: int
+    """
+
+    validators = None
+    shown = None
+    count = 0
+    while max_count is None or count < max_count:
+        deployments, validators = client.get_deployments_if_modified(
+            validators)
+        if deployments is not None:
+            deployment = next((deployment for deployment in deployments
+                               if deployment['id'] == deployment_id),
+                              None)
+            if deployment is None:
+                return 0
+            if deployment != shown:
+                _show_deployment(deployment)
+                shown = deployment
+
+        time.sleep(interval)
+        count += 1
+
+    return 0
+
+
+def _show_deployment(deployment):
+    """Prints a deployment, on a cleared screen if running in a terminal.
+
+    :param deployment: the deployment
+    :type deployment: dict
+    :rtype: None
+    """
+
+    clear = ''
+    if util.is_windows_platform():
+        os.system('cls')
+    elif 'TERM' in os.environ:
+        clear = CLEAR_SCREEN
+    emitter.publish(clear +
+                    'Deployment update time: '
+                    '{} \n'.format(time.strftime("%Y-%m-%d %H:%M:%S",
+                                                 time.gmtime())))
+    emitter.publish(deployment)
+
+
+def _running_app_ids(client, group_id):
+    """Returns the applications in a group and its subgroups that have
+    instances to restart or stop.
+
+    :param client: Marathon client
+    :type client: dcos.marathon.Client
+    :param group_id: the group id
+    :type group_id: str
+    :returns: the application ids
+    :rtype: [str]
+    """
+
+    app_ids = []
+    skipped = 0
+    for app in client.get_apps_under(group_id):
+        if app.get('instances', 0) > 0:
+            app_ids.append(app['id'])
+        else:
+            skipped += 1
+
+    if skipped:
+        emitter.publish('Skipping {} application(s) with no instances'.format(
+            skipped))
+    return app_ids
+
+
+def _bulk_apps(client, results, wait):
+    """Prints the outcome of a bulk operation on applications as each one
+    completes, and optionally waits for all the resulting deployments.
+
+    :param client: Marathon client
+    :type client: dcos.marathon.Client
+    :param results: the outcome for each application
+    :type results: iterable of dcos.marathon.BulkResult
+    :param wait: whether to wait for the deployments to finish
+    :type wait: bool
+    :returns: process return code
+    :rtype: int
+    """
+
+    deployment_ids = []
+    failed = 0
+    for result in results:
+        if result.error is not None:
+            emitter.publish(DefaultError('{}: {}'.format(
+                result.id, result.error)))
+            failed += 1
+        elif result.deployment_id is not None:
+            emitter.publish('Created deployment {} for {}'.format(
+                result.deployment_id, result.id))
+            deployment_ids.append(result.deployment_id)
+
+    if wait and _wait_for_deployments(client, deployment_ids) != 0:
+        return 1
+    return 1 if failed else 0
+
+
+def _wait_for_deployments(client, deployment_ids, interval=1):
+    """Waits for several deployments to end, printing each one's outcome.
+    A single subscription to Marathon's events follows all of them; if the
+    event stream is unavailable, the deployments are polled every
+    `interval` seconds instead.
+
+    :param client: Marathon client
+    :type client: dcos.marathon.Client
+    :param deployment_ids: the deployment ids
+    :type deployment_ids: [str]
+    :param interval: wait interval in seconds between polling calls
+    :type interval: int
+    :returns: process return code: 1 if any deployment failed
+    :rtype: int
+    """
+
+    pending = set(deployment_ids)
+    failed = False
+
+    events = None
+    if pending:
+        try:
+            events = client.get_deployment_events()
+        except DCOSException as e:
+            logger.info('Polling the deployments: Marathon events are '
+                        'unavailable: %s', e)
+
+    while events is not None:
+        try:
+            # the deployments that ended before the subscription; not
+            # through the HTTP cache, which may predate the deployments
+            deployments, _ = client.get_deployments_if_modified()
+            _drop_ended_deployments(pending, deployments)
+
+            for batch in events:
+                for event in batch:
+                    if event.event not in ('deployment_success',
+                                           'deployment_failed'):
+                        continue
+                    try:
+                        deployment_id = json.loads(event.data).get('id')
+                    except ValueError:
+                        logger.info('Ignoring event %r', event)
+                        continue
+                    if deployment_id not in pending:
+                        continue
+
+                    pending.remove(deployment_id)
+                    if event.event == 'deployment_success':
+                        emitter.publish('Deployment {} succeeded'.format(
+                            deployment_id))
+                    else:
+                        emitter.publish(DefaultError(
+                            'Deployment {} failed'.format(deployment_id)))
+                        failed = True
+
+                if not pending:
+                    break
+        except DCOSConnectionError as e:
+            logger.info('Resubscribing to Marathon events: %s', e)
+        finally:
+            events.close()
+
+        if not pending:
+            break
+        try:
+            events = client.get_deployment_events()
+        except DCOSException as e:
+            logger.info('Polling the deployments: Marathon events are '
+                        'unavailable: %s', e)
+            events = None
+
+    validators = None
+    while pending:
+        deployments, validators = client.get_deployments_if_modified(
+            validators)
+        if deployments is not None:
+            _drop_ended_deployments(pending, deployments)
+        if pending:
+            time.sleep(interval)
+
+    return 1 if failed else 0
+
+
+def _drop_ended_deployments(pending, deployments):
+    """Removes the deployments that are no longer running from `pending`,
+    and prints that they finished.
+
+    :param pending: ids of the deployments being waited for
+    :type pending: set of str
+    :param deployments: the running deployments
+    :type deployments: [dict]
+    :rtype: None
+    """
+
+    running = set(deployment['id'] for deployment in deployments)
+    for deployment_id in sorted(pending - running):
+        emitter.publish('Deployment {} finished'.format(deployment_id))
+    pending.intersection_update(running)
+
+
+def _changed_fields(resource_type, resource_id, current, resource, dry_run):
+    """Prints how an update changes the current definition of an app, group
+    or pod, and returns the payload that applies only those changes.
+
+    :param resource_type: one of 'apps', 'groups', or 'pods'
+    :type resource_type: str
+    :param resource_id: the app, group or pod id
+    :type resource_id: str
+    :param current: the current definition
+    :type current: dict
+    :param resource: the update
+    :type resource: dict
+    :param dry_run: whether to only print the changes
+    :type dry_run: bool
+    :returns: the payload to send, or None if there is nothing to send
+    :rtype: dict | None
+    """
+
+    changes, payload = marathon.diff_definitions(
+        resource_type, current, resource)
+
+    if not changes:
+        emitter.publish('No changes to {}'.format(
+            util.normalize_marathon_id_path(resource_id)))
+        return None
+
+    for change in changes:
+        emitter.publish(_format_change(change))
+    return None if dry_run else payload
+
+
+def _format_change(change):
+    """
+    :param change: a change to a definition
+    :type change: dcos.marathon.Change
+    :returns: the change as `+ path: new`, `- path: old` or
+              `~ path: old -> new`
+    :rtype: str
+    """
+
+    path = ''.join('[{}]'.format(key) if isinstance(key, int)
+                   else '.{}'.format(key)
+                   for key in change.path).lstrip('.')
+
+    def value(v):
+        return json.dumps(v, sort_keys=True)
+
+    if change.old is marathon.ABSENT:
+        return '+ {}: {}'.format(path, value(change.new))
+    if change.new is marathon.ABSENT:
+        return '- {}: {}'.format(path, value(change.old))
+    return '~ {}: {} -> {}'.format(path, value(change.old), value(change.new))
+
+
 def _enhance_row_with_overdue_information(rows, queued_apps):
     """Calculates if configured `backoff` duration for this
     app or pod definition was exceeded. In that case this application
@@ -1124,11 +1591,13 @@ def _enhance_row_with_overdue_information(rows, queued_apps):
     :rtype: bool
     """
 
+    # the first queued app or pod of each id
+    queued_by_id = {}
+    for app in queued_apps:
+        queued_by_id.setdefault(marathon.get_app_or_pod_id(app), app)
+
     for row in rows:
-        queued_app = next(
-            (app for app in queued_apps
-             if row.get('id') == marathon.get_app_or_pod_id(app)),
-            None)
+        queued_app = queued_by_id.get(row.get('id'))
         row['overdue'] = queued_app.get('delay', {}) \
             .get('overdue', False) if queued_app else False
 
@@ -58,7 +58,7 @@ def _cmds():
         cmds.Command(
             hierarchy=['node', 'log'],
             arg_keys=['--follow', '--lines', '--leader', '--mesos-id',
-                      '--component', '--filter'],
+                      '--all-agents', '--component', '--filter'],
             function=_log),
 
         cmds.Command(
@@ -463,7 +463,7 @@ def _list(json_, extra_field_names):
 
     client = mesos.DCOSClient()
     masters = mesos.MesosDNSClient().hosts('master.mesos.')
-    master_state = client.get_master_state()
+    master_state = client.get_master_state(mesos.LEADER_STATE_PROJECTION)
     slaves = client.get_state_summary()['slaves']
     for master in masters:
         if master['ip'] == master_state['hostname']:
@@ -476,7 +476,9 @@ def _list(json_, extra_field_names):
         slave['type'] = 'agent'
     nodes = masters + slaves
     if json_:
-        emitter.publish(nodes)
+        # the nodes come from whole documents, so only their encoding is
+        # produced in chunks
+        emitter.publish(emitting.json_chunks(nodes))
     else:
         for extra_field_name in extra_field_names:
             field_name = extra_field_name.split(':')[-1]
@@ -495,7 +497,7 @@ def _list(json_, extra_field_names):
             emitter.publish(errors.DefaultError('No agents found.'))
 
 
-def _log(follow, lines, leader, slave, component, filters):
+def _log(follow, lines, leader, slave, all_agents, component, filters):
     """ Prints the contents of leader and slave logs.
 
     :param follow: same as unix tail's -f
@@ -506,6 +508,8 @@ def _log(follow, lines, leader, slave, component, filters):
     :type leader: bool
     :param slave: the slave ID to print
     :type slave: str | None
+    :param all_agents: whether to print the logs of all the agents
+    :type all_agents: bool
     :param component: DC/OS component name
     :type component: string
     :param filters: a list of filters ["key:value", ...]
@@ -514,8 +518,9 @@ def _log(follow, lines, leader, slave, component, filters):
     :rtype: int
     """
 
-    if not (leader or slave):
-        raise DCOSException('You must choose one of --leader or --mesos-id.')
+    if not (leader or slave or all_agents):
+        raise DCOSException(
+            'You must choose one of --leader, --mesos-id or --all-agents.')
 
     if lines is None:
         lines = 10
@@ -528,17 +533,17 @@ def _log(follow, lines, leader, slave, component, filters):
                                 'supported by files API')
 
         # fall back to mesos files API.
-        mesos_files = _mesos_files(leader, slave)
+        mesos_files = _mesos_files(leader, slave, all_agents)
         log.log_files(mesos_files, follow, lines)
         return 0
 
     # dcos-log does not support logs from leader and agent.
-    if leader and slave:
+    if leader and (slave or all_agents):
         raise DCOSException(
-            'You must choose one of --leader or --mesos-id.')
+            'You must choose one of --leader, --mesos-id or --all-agents.')
 
     # if journald logging enabled.
-    _dcos_log(follow, lines, leader, slave, component, filters)
+    _dcos_log(follow, lines, leader, slave, component, filters, all_agents)
     return 0
 
 
@@ -706,8 +711,10 @@ def _build_leader_url(component):
     return '/leader/{}/logs/v1/'.format(leader_prefix)
 
 
-def _dcos_log(follow, lines, leader, slave, component, filters):
-    """ Print logs from dcos-log backend.
+def _dcos_log(follow, lines, leader, slave, component, filters,
+              all_agents=False):
+    """ Print logs from dcos-log backend. The logs of all the agents are
+    followed at once, or printed one after another.
 
     :param follow: same as unix tail's -f
     :type follow: bool
@@ -721,6 +728,8 @@ def _dcos_log(follow, lines, leader, slave, component, filters):
     :type component: string
     :param filters: a list of filters ["key:value", ...]
     :type filters: list
+    :param all_agents: whether to print the logs of all the agents
+    :type all_agents: bool
     """
 
     filter_query = ''
@@ -748,15 +757,32 @@ def _dcos_log(follow, lines, leader, slave, component, filters):
     if not dcos_url:
         raise config.missing_config_exception(['core.dcos_url'])
 
-    url = (dcos_url + endpoint + endpoint_type +
-           '/?skip_prev={}'.format(lines) + filter_query)
+    query = '/?skip_prev={}'.format(lines) + filter_query
+
+    if all_agents:
+        streams = [
+            (agent['hostname'],
+             '{}/system/v1/agent/{}/logs/v1/{}{}'.format(
+                 dcos_url, agent['id'], endpoint_type, query))
+            for agent in mesos.get_master().slaves()]
+        if not streams:
+            raise DCOSException('No agents found')
+
+        if follow:
+            return log.follow_many_logs(streams)
+        for label, url in streams:
+            emitter.publish('===> {} <==='.format(label))
+            log.print_logs_range(url)
+        return
+
+    url = dcos_url + endpoint + endpoint_type + query
 
     if follow:
         return log.follow_logs(url)
     return log.print_logs_range(url)
 
 
-def _mesos_files(leader, slave_id):
+def _mesos_files(leader, slave_id, all_agents=False):
     """Returns the MesosFile objects to log
 
     :param leader: whether to include the leading master's log file
@@ -764,6 +790,8 @@ def _mesos_files(leader, slave_id):
     :param slave_id: the ID of a slave.  used to include a slave's log
                      file
     :type slave_id: str | None
+    :param all_agents: whether to include the log files of all the slaves
+    :type all_agents: bool
     :returns: MesosFile objects
     :rtype: [MesosFile]
     """
@@ -771,7 +799,10 @@ def _mesos_files(leader, slave_id):
     files = []
     if leader:
         files.append(mesos.MesosFile('/master/log'))
-    if slave_id:
+    if all_agents:
+        files += [mesos.MesosFile('/slave/log', slave=slave)
+                  for slave in mesos.get_master().slaves()]
+    elif slave_id:
         slave = mesos.get_master().slave(slave_id)
         files.append(mesos.MesosFile('/slave/log', slave=slave))
     return files
@@ -86,9 +86,10 @@ def _service(inactive, completed, is_json):
     :rtype: int
     """
 
-    services = mesos.get_master().frameworks(
-        inactive=inactive,
-        completed=completed)
+    projection = None if is_json else mesos.SERVICE_STATE_PROJECTION
+    master = mesos.get_master(projection=projection,
+                              resources=['frameworks'])
+    services = master.frameworks(inactive=inactive, completed=completed)
 
     if is_json:
         emitter.publish([service.dict() for service in services])
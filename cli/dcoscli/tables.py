@@ -1,5 +1,6 @@
 import copy
 import datetime
+import itertools
 import operator
 import posixpath
 
@@ -53,6 +54,30 @@ def task_table(tasks):
     return tb
 
 
+def task_exec_table(results):
+    """Returns a PrettyTable representation of how the command run by
+    `dcos task exec --all-matching` exited in each task.
+
+    :param results: results of the command in each task
+    :type results: [mesos.TaskExecResult]
+    :rtype: PrettyTable
+    """
+
+    fields = OrderedDict([
+        ("TASK", lambda r: r.task_id),
+        ("EXIT CODE", lambda r: (EMPTY_ENTRY if r.exit_code is None
+                                 else r.exit_code)),
+        ("TIME", lambda r: "{:.2f}s".format(r.elapsed)),
+    ])
+
+    tb = table(fields, results)
+    tb.align["TASK"] = "l"
+    tb.align["EXIT CODE"] = "r"
+    tb.align["TIME"] = "r"
+
+    return tb
+
+
 def app_table(apps, deployments):
     """Returns a PrettyTable representation of the provided apps.
 
@@ -63,9 +88,13 @@ def app_table(apps, deployments):
     :rtype: PrettyTable
     """
 
-    deployment_map = {}
+    # the actions of each deployment on each app, by (deployment id, app id)
+    deployment_actions = {}
     for deployment in deployments:
-        deployment_map[deployment['id']] = deployment
+        for action in deployment['currentActions']:
+            deployment_actions.setdefault(
+                (deployment['id'], action['app']), []).append(
+                    action['action'])
 
     def get_cmd(app):
         if app["cmd"] is not None:
@@ -92,11 +121,9 @@ def app_table(apps, deployments):
 
         actions = []
         for deployment_id in deployment_ids:
-            deployment = deployment_map.get(deployment_id)
-            if deployment:
-                for action in deployment['currentActions']:
-                    if action['app'] == app['id']:
-                        actions.append(DEPLOYMENT_DISPLAY[action['action']])
+            for action in deployment_actions.get(
+                    (deployment_id, app['id']), []):
+                actions.append(DEPLOYMENT_DISPLAY[action])
 
         if len(actions) == 0:
             return EMPTY_ENTRY
@@ -1040,21 +1067,46 @@ def truncate_table(fields, objs, limits, **kwargs):
     the table.  `objs` represents the objects to be rendered into
     rows.
 
+    If `objs` is a :py:class:`RowStream`, a :py:class:`StreamingTable`
+    is returned instead, which renders the rows as they are produced.
+
     :param fields: An OrderedDict, where each element represents a
                    column.  The key is the column header, and the
                    value is the function that transforms an element of
                    `objs` into a value for that column.
     :type fields: OrderdDict(str, function)
     :param objs: objects to render into rows
-    :type objs: [object]
+    :type objs: [object] | RowStream
     :param limits: limits for truncating for each row
     :type limits: [object]
     :param **kwargs: kwargs to pass to `prettytable.PrettyTable`
     :type **kwargs: dict
+    :rtype: PrettyTable | StreamingTable
+    """
+
+    if isinstance(objs, RowStream):
+        return StreamingTable(fields, objs, limits, **kwargs)
+
+    tb = _new_table(prettytable.PrettyTable, fields, **kwargs)
+    for obj in objs:
+        tb.add_row(_format_row(fields, limits, obj))
+
+    return tb
+
+
+def _new_table(table_class, fields, **kwargs):
+    """
+    :param table_class: class of the table
+    :type table_class: type
+    :param fields: column headers and functions of the table
+    :type fields: OrderdDict(str, function)
+    :param **kwargs: kwargs to pass to `table_class`
+    :type **kwargs: dict
+    :returns: an empty table without borders
     :rtype: PrettyTable
     """
 
-    tb = prettytable.PrettyTable(
+    tb = table_class(
         [k.upper() for k in fields.keys()],
         border=False,
         hrules=prettytable.NONE,
@@ -1069,17 +1121,24 @@ def truncate_table(fields, objs, limits, **kwargs):
     tb._left_padding_width = 0
     tb._right_padding_width = 2
 
-    def format_table(obj, key, function):
-        """Formats the given object for the given function
+    return tb
 
-        :param object: object to format
-        :type object: object
-        :param key: value which should be checked
-        :type key: string
-        :param function: function to format the cell
-        :type function: function
-        :rtype: PrettyTable
-        """
+
+def _format_row(fields, limits, obj):
+    """Formats the cells of the given object
+
+    :param fields: column headers and functions of the table
+    :type fields: OrderdDict(str, function)
+    :param limits: limits for truncating for each row
+    :type limits: [object]
+    :param obj: object to format
+    :type obj: object
+    :returns: the cells of the row
+    :rtype: [str]
+    """
+
+    row = []
+    for key, function in fields.items():
         try:
             result = str(function(obj))
         except KeyError:
@@ -1087,14 +1146,8 @@ def truncate_table(fields, objs, limits, **kwargs):
         if (limits is not None and limits.get(key) is not None):
             result = textwrap.\
                 shorten(result, width=limits.get(key), placeholder='...')
-        return result
-
-    for obj in objs:
-        row = [format_table(obj, key, fields.get(key))
-               for key in fields.keys()]
-        tb.add_row(row)
-
-    return tb
+        row.append(result)
+    return row
 
 
 def table(fields, objs, **kwargs):
@@ -1108,10 +1161,130 @@ def table(fields, objs, **kwargs):
                    `objs` into a value for that column.
     :type fields: OrderdDict(str, function)
     :param objs: objects to render into rows
-    :type objs: [object]
+    :type objs: [object] | RowStream
     :param **kwargs: kwargs to pass to `prettytable.PrettyTable`
     :type **kwargs: dict
-    :rtype: PrettyTable
+    :rtype: PrettyTable | StreamingTable
     """
 
     return truncate_table(fields, objs, None, **kwargs)
+
+
+# Number of rows of a streamed table that are rendered at once.  The columns
+# are sized from the first STREAM_CHUNK_SIZE rows.
+STREAM_CHUNK_SIZE = 1000
+
+
+class RowStream(object):
+    """Objects to render as the rows of a :py:class:`StreamingTable`, in the
+    order they are produced.  Passing a RowStream instead of a list to any
+    of the table functions of this module returns a StreamingTable.
+
+    :param objs: objects to render into rows
+    :type objs: iterable
+    """
+
+    def __init__(self, objs):
+        self._objs = iter(objs)
+
+    def __iter__(self):
+        return self._objs
+
+
+class StreamingTable(object):
+    """A table which is rendered STREAM_CHUNK_SIZE rows at a time, as its
+    objects are produced, rather than all at once.  The columns are sized
+    from the first chunk; a later value that doesn't fit widens its column
+    from its chunk on.  `sortby` is ignored: the rows are rendered in the
+    order the objects are produced.
+
+    The table can only be rendered once.
+
+    :param fields: An OrderedDict, where each element represents a
+                   column.  The key is the column header, and the
+                   value is the function that transforms an element of
+                   `objs` into a value for that column.
+    :type fields: OrderdDict(str, function)
+    :param objs: objects to render into rows
+    :type objs: RowStream
+    :param limits: limits for truncating for each row
+    :type limits: [object]
+    :param **kwargs: kwargs to pass to `prettytable.PrettyTable`
+    :type **kwargs: dict
+    """
+
+    def __init__(self, fields, objs, limits, **kwargs):
+        self._fields = fields
+        self._objs = objs
+        self._limits = limits
+        self.sortby = kwargs.pop('sortby', None)
+        self._kwargs = kwargs
+
+        self.align = {}
+        """Alignment of the columns by header, or of all of them"""
+
+    def chunks(self):
+        """Renders the rows as the objects are produced.
+
+        :returns: the lines of each chunk of rows, the first one with the
+            header, or just the header if there are no objects
+        :rtype: generator of str
+        """
+
+        rows = (_format_row(self._fields, self._limits, obj)
+                for obj in self._objs)
+        widths = None
+        while True:
+            chunk = list(itertools.islice(rows, STREAM_CHUNK_SIZE))
+            # without any objects, the table is only its header
+            if not chunk and widths is not None:
+                return
+
+            tb = _new_table(_FixedWidthTable, self._fields, **self._kwargs)
+            if isinstance(self.align, dict):
+                for field, align in self.align.items():
+                    tb.align[field] = align
+            else:
+                tb.align = self.align
+            tb.min_widths = widths
+            for row in chunk:
+                tb.add_row(row)
+
+            yield tb.get_string(header=tb.header and widths is None)
+            widths = tb.widths
+            if not chunk:
+                return
+
+    def __str__(self):
+        return '\n'.join(self.chunks())
+
+
+class _FixedWidthTable(prettytable.PrettyTable):
+    """A PrettyTable whose columns are at least `min_widths` wide."""
+
+    min_widths = None
+    """Minimum widths of the columns"""
+
+    @property
+    def widths(self):
+        """
+        :returns: the widths of the columns, once rendered
+        :rtype: [int]
+        """
+
+        return self._widths
+
+    def get_string(self, **kwargs):
+        if self.rowcount or not kwargs.get('header', self.header):
+            return super(_FixedWidthTable, self).get_string(**kwargs)
+
+        # PrettyTable renders nothing for an empty table without borders
+        options = self._get_options(kwargs)
+        self._compute_widths([], options)
+        return self._stringify_header(options)
+
+    def _compute_widths(self, rows, options):
+        super(_FixedWidthTable, self)._compute_widths(rows, options)
+        if self.min_widths is not None:
+            self._widths = [max(width, min_width) for width, min_width
+                            in zip(self._widths, self.min_widths)]
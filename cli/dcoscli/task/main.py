@@ -1,13 +1,14 @@
 import os
 import posixpath
 import sys
+import tempfile
+import time
 from functools import partial
 
 import docopt
-import six
 
 import dcoscli
-from dcos import cmds, config, emitting, mesos, util
+from dcos import cmds, config, constants, emitting, mesos, util
 from dcos.errors import DCOSException, DCOSHTTPException, DefaultError
 from dcoscli import log, tables
 from dcoscli import metrics
@@ -124,10 +125,15 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['task', 'log'],
-            arg_keys=['--all', '--follow', '--completed', '--lines', '<task>',
-                      '<file>'],
+            arg_keys=['--all', '--follow', '--completed', '--lines',
+                      '--resume', '<task>', '<file>'],
             function=_log),
 
+        cmds.Command(
+            hierarchy=['task', 'download'],
+            arg_keys=['--all', '--completed', '--output', '<task>', '<file>'],
+            function=_download),
+
         cmds.Command(
             hierarchy=['task', 'ls'],
             arg_keys=['<task>', '<path>', '--all', '--long', '--completed'],
@@ -135,7 +141,8 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['task', 'exec'],
-            arg_keys=['<task>', '<cmd>', '<args>', '--interactive', '--tty'],
+            arg_keys=['<task>', '<cmd>', '<args>', '--interactive', '--tty',
+                      '--all-matching', '--parallel'],
             function=_exec),
 
         cmds.Command(
@@ -181,22 +188,27 @@ def _task(task, all_, completed, json_):
     :returns: process return code
     """
 
-    tasks = sorted(mesos.get_master().tasks(
-        fltr=task, completed=completed, all_=all_),
-        key=lambda t: t['name'])
+    # The table only shows a few fields of each task, so there is no need to
+    # hold all of state.json in memory.
+    projection = None if json_ else mesos.TASK_STATE_PROJECTION
+    master = mesos.get_master(projection=projection)
+    tasks = sorted(master.tasks(fltr=task, completed=completed, all_=all_),
+                   key=lambda t: t['name'])
 
     if json_:
-        emitter.publish([t.dict() for t in tasks])
+        # the sorted tasks are all in memory; only their encoding is
+        # produced in chunks
+        emitter.publish(emitting.json_chunks(t.dict() for t in tasks))
     else:
-        table = tables.task_table(tasks)
-        output = six.text_type(table)
-        if output:
-            emitter.publish(output)
+        # the rows are printed as they are rendered, in the order they
+        # were sorted in
+        table = tables.task_table(tables.RowStream(tasks))
+        emitter.publish(table.chunks())
 
     return 0
 
 
-def _log(all_, follow, completed, lines, task, file_):
+def _log(all_, follow, completed, lines, resume, task, file_):
     """ Tail a file in the task's sandbox.
 
     :param all_: If True, include all tasks
@@ -207,6 +219,9 @@ def _log(all_, follow, completed, lines, task, file_):
     :type completed: bool
     :param lines: number of lines to print
     :type lines: int
+    :param resume: whether to start after the last entries printed with
+        --resume, with journald logging
+    :type resume: bool
     :param task: task pattern to match
     :type task: str
     :param file_: file path to read
@@ -261,7 +276,7 @@ def _log(all_, follow, completed, lines, task, file_):
 
     # otherwise
     if file_ in ('stdout', 'stderr'):
-        _dcos_log(follow, tasks, lines, file_, completed)
+        _dcos_log(follow, tasks, lines, file_, completed, resume)
         return 0
 
     raise DCOSException('Invalid file {}. dcos-log only '
@@ -269,6 +284,105 @@ def _log(all_, follow, completed, lines, task, file_):
     return 1
 
 
+def _download(all_, completed, output, task, file_):
+    """ Download a file from the task's sandbox.
+
+    :param all_: If True, include all tasks
+    :type all_: bool
+    :param completed: whether to include completed tasks
+    :type completed: bool
+    :param output: path to write the file to, or None to use the file's
+                   name in the current directory
+    :type output: str | None
+    :param task: task pattern to match
+    :type task: str
+    :param file_: file path to download
+    :type file_: str
+    :returns: process return code
+    :rtype: int
+    """
+
+    client = mesos.DCOSClient()
+    tasks = mesos.get_master(client).tasks(
+        fltr=task, completed=completed, all_=all_)
+
+    if not tasks:
+        raise DCOSException(
+            'Cannot find a task with ID containing "{}"'.format(task))
+    elif len(tasks) > 1:
+        msg = [("There are multiple tasks with ID matching [{}]. " +
+                "Please choose one:").format(task)]
+        msg += ["\t{0}".format(t["id"]) for t in tasks]
+        raise DCOSException('\n'.join(msg))
+
+    mesos_files = _mesos_files(tasks, file_, client)
+    if not mesos_files:
+        raise DCOSException(
+            'The sandbox of task [{}] is not available'.format(
+                tasks[0]['id']))
+
+    if output is None:
+        output = posixpath.basename(file_.rstrip('/'))
+
+    start = time.time()
+    try:
+        size = _download_file(mesos_files[0], output)
+    except DCOSHTTPException as e:
+        if e.response.status_code == 404:
+            raise DCOSException(
+                'Cannot access [{}]: No such file or directory'.format(file_))
+        raise
+    elapsed = max(time.time() - start, 0.001)
+
+    emitter.publish(DefaultError(
+        'Downloaded {} to {} in {:.1f}s ({}/s)'.format(
+            util.humanize_bytes(size), output, elapsed,
+            util.humanize_bytes(size / elapsed))))
+    return 0
+
+
+def _download_file(mesos_file, output):
+    """Downloads `mesos_file` to `output`.  The data is written to a
+    temporary file next to `output`, which replaces `output` only once
+    the download is complete, so a failed or interrupted download never
+    leaves a truncated file behind.
+
+    :param mesos_file: file to download
+    :type mesos_file: MesosFile
+    :param output: path to write the file to
+    :type output: str
+    :returns: number of bytes written
+    :rtype: int
+    """
+
+    try:
+        fd, partial_path = tempfile.mkstemp(
+            prefix='.{}.'.format(os.path.basename(output)),
+            suffix='.part',
+            dir=os.path.dirname(os.path.abspath(output)))
+    except OSError as e:
+        logger.exception('Unable to create file next to: %s', output)
+        raise util.io_exception(output, e.errno)
+
+    try:
+        with os.fdopen(fd, 'wb') as output_file:
+            size = mesos_file.download(output_file)
+
+        try:
+            # mkstemp creates the file readable by its owner only
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(partial_path, 0o666 & ~umask)
+            os.replace(partial_path, output)
+        except OSError as e:
+            logger.exception('Unable to write file: %s', output)
+            raise util.io_exception(output, e.errno)
+    except BaseException:
+        os.remove(partial_path)
+        raise
+    return size
+
+
 def get_nested_container_id(task):
     """ Get the nested container id from mesos state.
 
@@ -336,8 +450,9 @@ def get_nested_container_id(task):
     return '.'.join(reversed(container_ids))
 
 
-def _dcos_log(follow, tasks, lines, file_, completed):
-    """ a client to dcos-log
+def _dcos_log(follow, tasks, lines, file_, completed, resume=False):
+    """ a client to dcos-log. The logs of several tasks are followed at
+    once, or printed one after another.
 
     :param follow: same as unix tail's -f
     :type follow: bool
@@ -349,6 +464,9 @@ def _dcos_log(follow, tasks, lines, file_, completed):
     :type file_: str
     :param completed: whether to include completed tasks
     :type completed: bool
+    :param resume: whether to start after the entries printed by the last
+        call with `resume`, and save where the logs end
+    :type resume: bool
     """
 
     # only stdout and stderr is supported
@@ -361,6 +479,10 @@ def _dcos_log(follow, tasks, lines, file_, completed):
     if completed:
         tasks_field = 'completed_tasks'
 
+    # the log endpoints of the tasks' containers, and their tasks' IDs
+    urls = []
+    labels = []
+
     for task in tasks:
         executor_info = task.executor()
         if not executor_info:
@@ -424,9 +546,23 @@ def _dcos_log(follow, tasks, lines, file_, completed):
                    '?skip_prev={}&filter=STREAM:{}'.format(lines,
                                                            file_.upper()))
 
-            if follow:
-                return log.follow_logs(url)
-            return log.print_logs_range(url)
+            if url not in urls:
+                urls.append(url)
+                labels.append(t.get('id') or executor_id)
+
+    if not urls:
+        return
+
+    cursors = log.saved_log_cursors() if resume else None
+    if follow:
+        if len(urls) > 1:
+            return log.follow_many_logs(list(zip(labels, urls)), cursors)
+        return log.follow_logs(urls[0], cursors)
+
+    for label, url in zip(labels, urls):
+        if len(urls) > 1:
+            emitter.publish('===> {} <==='.format(label))
+        log.print_logs_range(url, cursors)
 
 
 def _ls(task, path, all_, long_, completed):
@@ -487,7 +623,8 @@ def _ls(task, path, all_, long_, completed):
                           for file_ in files))
 
 
-def _exec(task, cmd, args=None, interactive=False, tty=False):
+def _exec(task, cmd, args=None, interactive=False, tty=False,
+          all_matching=False, parallel=None):
     """ Launch a process inside a container with the given <task_id>
 
     :param task: task ID pattern to match
@@ -500,15 +637,69 @@ def _exec(task, cmd, args=None, interactive=False, tty=False):
     :type interactive: bool
     :param tty: attach a tty
     :type tty: bool
+    :param all_matching: launch the process in every matching task
+    :type all_matching: bool
+    :param parallel: maximum number of tasks to launch the process in at
+                     the same time
+    :type parallel: str
     :returns: process return code
     :rtype int
     """
 
-    task_io = mesos.TaskIO(task, cmd, args, interactive, tty)
+    if all_matching:
+        return _exec_all(task, cmd, args, parallel)
+
+    if os.environ.get(constants.DCOS_TASK_EXEC_ENGINE_ENV) == 'asyncio':
+        task_io = mesos.AsyncTaskIO(task, cmd, args, interactive, tty)
+    else:
+        task_io = mesos.TaskIO(task, cmd, args, interactive, tty)
     task_io.run()
     return 0
 
 
+def _exec_all(task, cmd, args, parallel):
+    """ Launch a process inside the containers of all the running tasks
+    matching <task>, and print a summary of how they exited.
+
+    :param task: task ID pattern to match
+    :type task: str
+    :param cmd: The command to launch inside the tasks' containers
+    :type args: cmd
+    :param args: Additional arguments for the command
+    :type args: list
+    :param parallel: maximum number of tasks to launch the process in at
+                     the same time
+    :type parallel: str | None
+    :returns: process return code
+    :rtype int
+    """
+
+    parallel = util.parse_int(parallel or 10)
+    if parallel < 1:
+        raise DCOSException('--parallel must be at least 1')
+
+    client = mesos.DCOSClient()
+    master = mesos.get_master(client)
+    task_ids = [t['id'] for t in master.tasks(fltr=task)]
+    if not task_ids:
+        raise DCOSException(
+            'Cannot find a task with ID containing "{}"'.format(task))
+
+    results = mesos.exec_tasks(task_ids, cmd, args, parallel,
+                               client=client, master=master)
+
+    for result in results:
+        if result.error is not None:
+            emitter.publish(DefaultError(
+                'Error running the command in task {}: {}'.format(
+                    result.task_id, result.error)))
+    emitter.publish(tables.task_exec_table(results))
+
+    if all(result.exit_code == 0 for result in results):
+        return 0
+    return 1
+
+
 def _mesos_files(tasks, file_, client):
     """Return MesosFile objects for the specified tasks and file name.
     Only include files that satisfy all of the following:
@@ -552,7 +743,11 @@ def _load_slaves_state(slaves):
 
     reachable_slaves = []
 
-    for job, slave in util.stream(lambda slave: slave.state(), slaves):
+    # Tasks often share a slave: fetch each slave's state once, and let
+    # the other requests for it wait for the cached state.
+    for job, slave in util.stream(lambda slave: slave.state(), slaves,
+                                  key=lambda slave: slave['id'],
+                                  key_concurrency=1):
         try:
             job.result()
             reachable_slaves.append(slave)
@@ -1,3 +1,5 @@
+import json
+
 import six
 
 
@@ -31,3 +33,16 @@ def file_bytes(path):
 
     with open(path) as f:
         return six.b(f.read())
+
+
+def file_json(path):
+    """ Read the JSON value in a file
+
+    :param path: path to file
+    :type path: str
+    :rtype: dict | list
+    :returns: JSON value from the file
+    """
+
+    with open(path) as f:
+        return json.load(f)
@@ -69,7 +69,8 @@ def test_node_table_uppercase_field_option():
 
 
 def test_node_log_empty():
-    stderr = b"You must choose one of --leader or --mesos-id.\n"
+    stderr = (b"You must choose one of --leader, --mesos-id or "
+              b"--all-agents.\n")
     assert_command(['dcos', 'node', 'log'], returncode=1, stderr=stderr)
 
 
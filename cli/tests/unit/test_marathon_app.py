@@ -0,0 +1,183 @@
+import json
+
+from mock import create_autospec, patch
+
+import dcoscli.marathon.main as main
+from dcos import marathon
+from dcos.errors import DCOSException
+from dcos.sse import Event
+
+from .common import mock_args
+from ..common import file_json
+from ..fixtures.marathon import app_fixture
+
+
+@patch('dcoscli.marathon.main.emitter', autospec=True)
+def test_app_list_table(emitter):
+    marathon_client = create_autospec(marathon.Client)
+    subcmd = main.MarathonSubcommand(create_autospec(main.ResourceReader),
+                                     lambda: marathon_client)
+    apps = [app_fixture(), dict(app_fixture(), id='/queued-app')]
+    marathon_client.get_apps.return_value = apps
+    marathon_client.get_deployments.return_value = []
+    marathon_client.get_queued_apps.return_value = [
+        {'app': {'id': '/queued-app'}, 'delay': {'overdue': True}},
+        {'app': {'id': '/queued-app'}, 'delay': {'overdue': False}},
+        {'pod': {'id': '/queued-pod'}, 'delay': {'overdue': True}},
+    ]
+
+    assert subcmd.list(json_=False) == 0
+
+    marathon_client.get_apps.assert_called_with(embed=main.APP_TABLE_EMBED)
+    assert [app['overdue'] for app in apps] == [False, True]
+    emitter.publish.assert_called_once_with(
+        str(main.tables.app_table(apps, [])))
+
+
+def test_app_restart_all_under_waits():
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_apps_under.return_value = [
+        {'id': '/g/a', 'instances': 1},
+        {'id': '/g/b', 'instances': 0},
+        {'id': '/g/sub/c', 'instances': 2},
+    ]
+    marathon_client.restart_apps.return_value = iter([
+        marathon.BulkResult('/g/sub/c', 'd2', None),
+        marathon.BulkResult('/g/a', 'd1', None),
+    ])
+    marathon_client.get_deployments_if_modified.return_value = (
+        [{'id': 'd1'}, {'id': 'd2'}], {'etag': '"1"'})
+    marathon_client.get_deployment_events.return_value = _stream([
+        [_event('deployment_success', {'id': 'other'})],
+        [_event('deployment_success', {'id': 'd1'})],
+        [_event('deployment_failed', {'id': 'd2'})],
+    ])
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.restart(None, '/g', False, True) == 1
+
+    marathon_client.get_apps_under.assert_called_with('/g')
+    marathon_client.restart_apps.assert_called_with(
+        ['/g/a', '/g/sub/c'], False)
+    assert marathon_client.get_deployment_events.call_count == 1
+    # the cached listing may predate the deployments
+    marathon_client.get_deployments.assert_not_called()
+    assert stdout.getvalue() == (
+        'Skipping 1 application(s) with no instances\n'
+        'Created deployment d2 for /g/sub/c\n'
+        'Created deployment d1 for /g/a\n'
+        'Deployment d1 succeeded\n')
+    assert stderr.getvalue() == 'Deployment d2 failed\n'
+
+
+@patch('dcoscli.marathon.main.time.sleep')
+def test_app_remove_all_under_polls(sleep):
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_apps_under.return_value = [
+        {'id': '/g/a', 'instances': 0},
+        {'id': '/g/b', 'instances': 1},
+        {'id': '/g/c', 'instances': 1},
+    ]
+    marathon_client.remove_apps.return_value = iter([
+        marathon.BulkResult('/g/a', 'd1', None),
+        marathon.BulkResult('/g/b', None, DCOSException('Boom')),
+        marathon.BulkResult('/g/c', 'd2', None),
+    ])
+    marathon_client.get_deployment_events.side_effect = DCOSException(
+        'Error on request [GET .../v2/events]: HTTP 404')
+    marathon_client.get_deployments_if_modified.side_effect = [
+        ([{'id': 'd2'}, {'id': 'd1'}], {'etag': '"1"'}),
+        ([{'id': 'd2'}], {'etag': '"2"'}),
+        (None, {'etag': '"2"'}),
+        ([], {'etag': '"3"'}),
+    ]
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.remove(None, '/g', True, True) == 1
+
+    marathon_client.remove_apps.assert_called_with(
+        ['/g/a', '/g/b', '/g/c'], True)
+    assert stdout.getvalue() == (
+        'Created deployment d1 for /g/a\n'
+        'Created deployment d2 for /g/c\n'
+        'Deployment d1 finished\n'
+        'Deployment d2 finished\n')
+    assert stderr.getvalue() == '/g/b: Boom\n'
+    assert sleep.call_count == 3
+
+
+def test_app_update_if_changed_sends_changed_fields():
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_app.return_value = app_fixture()
+    resource = dict(app_fixture(), cpus=0.5, env={'A': 'b'})
+    subcmd._resource_reader.get_resource_from_properties.return_value = \
+        resource
+    marathon_client.update_app.return_value = 'd1'
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.update('/test-app', [], False, True, False) == 0
+
+    marathon_client.get_app.assert_called_once_with('/test-app')
+    marathon_client.update_app.assert_called_with(
+        '/test-app', {'cpus': 0.5, 'env': {'A': 'b'}}, False)
+    assert stdout.getvalue() == (
+        '~ cpus: 0.1 -> 0.5\n'
+        '+ env.A: "b"\n'
+        'Created deployment d1\n')
+
+
+def test_app_update_dry_run():
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_app.return_value = app_fixture()
+    subcmd._resource_reader.get_resource_from_properties.return_value = \
+        {'instances': 3}
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.update('/test-app', ['instances=3'], False, False,
+                             True) == 0
+
+    assert not marathon_client.update_app.called
+    assert stdout.getvalue() == '~ instances: 1 -> 3\n'
+
+
+def test_app_update_if_changed_skips_unchanged_app():
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_app.return_value = app_fixture()
+    subcmd._resource_reader.get_resource_from_properties.return_value = \
+        app_fixture()
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.update('test-app', [], False, True, False) == 0
+
+    assert not marathon_client.update_app.called
+    assert stdout.getvalue() == 'No changes to /test-app\n'
+
+
+def test_app_update_if_changed_reapplied_definition():
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_app.return_value = \
+        file_json('tests/data/marathon/apps/nginx_get.json')['app']
+    subcmd._resource_reader.get_resource_from_properties.return_value = \
+        file_json('tests/data/marathon/apps/nginx.json')
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.update('nginx', [], False, True, False) == 0
+
+    assert not marathon_client.update_app.called
+    assert stdout.getvalue() == 'No changes to /nginx\n'
+
+
+def _stream(batches):
+    for batch in batches:
+        yield batch
+
+
+def _event(event_type, data):
+    return Event('', event_type, json.dumps(data))
+
+
+def _subcommand_fixture():
+    marathon_client = create_autospec(marathon.Client)
+    subcmd = main.MarathonSubcommand(create_autospec(main.ResourceReader),
+                                     lambda: marathon_client)
+    return subcmd, marathon_client
@@ -0,0 +1,125 @@
+import json
+
+from mock import create_autospec, patch
+
+import dcoscli.marathon.main as main
+from dcos import marathon
+from dcos.errors import DCOSConnectionError, DCOSException
+from dcos.sse import Event
+
+from .common import mock_args
+
+
+def test_deployment_watch_events():
+    subcmd, marathon_client = _subcommand_fixture()
+    steps = [{'actions': [{'action': 'StartApplication', 'app': '/a'}]},
+             {'actions': [{'action': 'ScaleApplication', 'app': '/a'}]}]
+    plan = {'id': 'd1', 'steps': steps, 'version': 'v1'}
+    marathon_client.get_deployment.return_value = {
+        'id': 'd1', 'affectedApps': ['/a'], 'currentStep': 1,
+        'totalSteps': 2, 'currentActions': []}
+    marathon_client.get_deployment_events.return_value = _stream([
+        [_event('deployment_info', {'plan': {'id': 'd2'},
+                                    'currentStep': {'actions': []}})],
+        [_event('deployment_step_success',
+                {'plan': plan, 'currentStep': steps[0]}),
+         _event('deployment_info', {'plan': plan, 'currentStep': steps[1]})],
+        [_event('deployment_success', {'id': 'd1', 'plan': plan})],
+    ])
+
+    with patch('dcoscli.marathon.main.emitter', autospec=True) as emitter:
+        assert subcmd.deployment_watch('d1', None, None) == 0
+
+    # the deployment is only fetched before the first event
+    marathon_client.get_deployment.assert_called_once_with('d1')
+    published = [call[0][0] for call in emitter.publish.call_args_list]
+    assert published[1] == marathon_client.get_deployment.return_value
+    assert published[3] == {
+        'id': 'd1', 'affectedApps': ['/a'], 'steps': steps,
+        'currentStep': 2, 'totalSteps': 2,
+        'currentActions': [{'action': 'ScaleApplication', 'app': '/a',
+                            'readinessCheckResults': []}]}
+    assert published[4:] == ['Deployment d1 succeeded']
+
+
+@patch.dict('os.environ', {'TERM': 'xterm'})
+@patch('dcoscli.marathon.main.util.is_windows_platform', return_value=False)
+def test_deployment_watch_clears_terminal(is_windows_platform):
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_deployment.return_value = {'id': 'd1'}
+    marathon_client.get_deployment_events.return_value = _stream([
+        [_event('deployment_success', {'id': 'd1'})]])
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.deployment_watch('d1', None, None) == 0
+
+    assert stdout.getvalue().startswith(
+        main.CLEAR_SCREEN + 'Deployment update time')
+
+
+def test_deployment_watch_events_failed():
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_deployment.return_value = {'id': 'd1'}
+    marathon_client.get_deployment_events.return_value = _stream([
+        [_event('deployment_failed', {'id': 'd1'})]])
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.deployment_watch('d1', None, None) == 1
+
+    assert stderr.getvalue() == 'Deployment d1 failed\n'
+
+
+def test_deployment_watch_events_resubscribes():
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_deployment.side_effect = [{'id': 'd1'}, None]
+
+    def _dropped():
+        yield []
+        raise DCOSConnectionError('http://marathon/v2/events')
+
+    marathon_client.get_deployment_events.side_effect = [
+        _dropped(), _stream([])]
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.deployment_watch('d1', None, None) == 0
+
+    assert marathon_client.get_deployment_events.call_count == 2
+
+
+@patch('dcoscli.marathon.main.time.sleep')
+def test_deployment_watch_polls(sleep):
+    subcmd, marathon_client = _subcommand_fixture()
+    marathon_client.get_deployment_events.side_effect = DCOSException(
+        'Error on request [GET .../v2/events]: HTTP 404')
+    deployment = {'id': 'd1', 'currentStep': 1}
+    marathon_client.get_deployments_if_modified.side_effect = [
+        ([deployment], {'etag': '"1"'}),
+        (None, {'etag': '"1"'}),
+        ([deployment], {'etag': '"2"'}),
+        ([], {'etag': '"3"'}),
+    ]
+
+    with mock_args([]) as (stdout, stderr):
+        assert subcmd.deployment_watch('d1', None, '2') == 0
+
+    assert [call[0] for call in
+            marathon_client.get_deployments_if_modified.call_args_list] == \
+        [(None,), ({'etag': '"1"'},), ({'etag': '"1"'},), ({'etag': '"2"'},)]
+    assert stdout.getvalue().count('Deployment update time') == 1
+    sleep.assert_called_with(2)
+
+
+def _stream(batches):
+    for batch in batches:
+        yield batch
+
+
+def _event(event_type, data):
+    return Event('', event_type, json.dumps(data))
+
+
+def _subcommand_fixture():
+    marathon_client = create_autospec(marathon.Client)
+    subcmd = main.MarathonSubcommand(create_autospec(main.ResourceReader),
+                                     lambda: marathon_client)
+    return subcmd, marathon_client
@@ -5,7 +5,7 @@ import dcoscli.marathon.main as main
 from dcos import marathon
 from dcos.errors import DCOSException, DCOSHTTPException
 
-from ..common import file_bytes
+from ..common import file_bytes, file_json
 from ..fixtures.marathon import pod_list_fixture
 
 
@@ -98,6 +98,48 @@ def test_pod_update_propagates_dcos_exception_from_update_pod():
         resource_reader, marathon_client, 'update error')
 
 
+@patch('dcoscli.marathon.main.emitter', autospec=True)
+def test_pod_update_if_changed_skips_unchanged_pod(emitter):
+    resource_reader = create_autospec(main.ResourceReader)
+    resource_reader.get_resource.return_value = \
+        file_json('tests/data/marathon/pods/good.json')
+    marathon_client = _marathon_client_fixture()
+    marathon_client.show_pod.return_value = \
+        file_json('tests/data/marathon/pods/good_get_status.json')
+
+    subcmd = main.MarathonSubcommand(resource_reader, lambda: marathon_client)
+    assert subcmd.pod_update('good-pod', False, if_changed=True) == 0
+
+    marathon_client.show_pod.assert_called_once_with('good-pod')
+    assert not marathon_client.update_pod.called
+    emitter.publish.assert_called_once_with('No changes to /good-pod')
+
+
+@patch('dcoscli.marathon.main.emitter', autospec=True)
+def test_pod_update_if_changed_sends_whole_pod(emitter):
+    pod_json = file_json('tests/data/marathon/pods/good.json')
+    pod_json['scaling']['instances'] = 2
+    del pod_json['networks']
+    resource_reader = create_autospec(main.ResourceReader)
+    resource_reader.get_resource.return_value = pod_json
+    marathon_client = _marathon_client_fixture()
+    pod_status = file_json('tests/data/marathon/pods/good_get_status.json')
+    pod_status['spec']['secrets'] = {'db': {'source': 'db-password'}}
+    marathon_client.show_pod.return_value = pod_status
+    marathon_client.update_pod.return_value = 'pod-deployment-id'
+
+    subcmd = main.MarathonSubcommand(resource_reader, lambda: marathon_client)
+    assert subcmd.pod_update('good-pod', True, if_changed=True) == 0
+
+    marathon_client.update_pod.assert_called_with(
+        'good-pod', pod_json=pod_json, force=True)
+    assert [call[0][0] for call in emitter.publish.call_args_list] == [
+        '~ scaling.instances: 1 -> 2',
+        '- secrets.db.source: "db-password"',
+        'Created deployment pod-deployment-id',
+    ]
+
+
 def test_pod_kill_invoked_successfully():
     pod_id = 'foo'
     instance_ids = ['instance1', 'instance2']
@@ -273,6 +273,25 @@ def test_dcos_log_filters(mocked_dcos_log_enabked, mocked_http_get,
         'filter=_SYSTEMD_UNIT:dcos-mesos-master.service')
 
 
+@mock.patch('dcoscli.log.follow_many_logs')
+@mock.patch('dcos.mesos.get_master')
+@mock.patch('dcos.config.get_config_val')
+def test_dcos_log_all_agents_stream(mocked_get_config_val, mocked_get_master,
+                                    mocked_follow_many_logs):
+    mocked_get_config_val.return_value = 'http://127.0.0.1'
+    mocked_get_master.return_value.slaves.return_value = [
+        {'id': 'agent-1', 'hostname': '10.0.0.1'},
+        {'id': 'agent-2', 'hostname': '10.0.0.2'}]
+
+    main._dcos_log(True, 20, False, None, None, [], all_agents=True)
+
+    mocked_follow_many_logs.assert_called_with([
+        ('10.0.0.1', 'http://127.0.0.1/system/v1/agent/agent-1/logs/v1/'
+                     'stream/?skip_prev=20'),
+        ('10.0.0.2', 'http://127.0.0.1/system/v1/agent/agent-2/logs/v1/'
+                     'stream/?skip_prev=20')])
+
+
 @mock.patch('dcos.config.get_config_val')
 @mock.patch('dcoscli.node.main._get_slave_ip')
 @mock.patch('dcos.http.get')
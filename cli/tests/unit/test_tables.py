@@ -3,6 +3,7 @@ import datetime
 import mock
 import pytz
 
+from dcos import mesos
 from dcos.mesos import Slave
 from dcoscli import tables
 
@@ -44,6 +45,22 @@ def test_app_table():
         assert str(table) == f.read()
 
 
+def test_app_table_deployments():
+    app = app_fixture()
+    app['deployments'] = [{'id': 'd1'}, {'id': 'd2'}]
+    deployments = [
+        {'id': 'd1',
+         'currentActions': [{'action': 'ScaleApplication', 'app': '/other'},
+                            {'action': 'RestartApplication',
+                             'app': '/test-app'}]},
+        {'id': 'd3',
+         'currentActions': [{'action': 'StopApplication',
+                             'app': '/test-app'}]},
+    ]
+    table = tables.app_table([app], deployments)
+    assert str(table).split('\n')[1].split()[5] == 'restart'
+
+
 def test_deployment_table_app_pre_pods():
     _test_table(tables.deployment_table,
                 [deployment_fixture_app_pre_pods()],
@@ -181,6 +198,59 @@ def test_metrics_details_no_tags_table():
                 'tests/unit/data/metrics_task_details.txt')
 
 
+def test_streaming_task_table():
+    task = task_fixture()
+    task.user = mock.Mock(return_value='root')
+    slave = Slave({"hostname": "mock-hostname"}, None, None)
+    task.slave = mock.Mock(return_value=slave)
+    _test_table(lambda tasks: tables.task_table(tables.RowStream(tasks)),
+                [task],
+                'tests/unit/data/task.txt')
+
+
+def test_streaming_node_table():
+    _test_table(lambda nodes: tables.node_table(tables.RowStream(nodes)),
+                [slave_fixture()],
+                'tests/unit/data/node.txt')
+
+
+def test_streaming_ls_long_table():
+    with mock.patch('dcoscli.tables._format_unix_timestamp',
+                    lambda ts: datetime.datetime.fromtimestamp(
+                        ts, pytz.utc).strftime('%b %d %H:%M')):
+        _test_table(
+            lambda files: tables.ls_long_table(tables.RowStream(files)),
+            browse_fixture(),
+            'tests/unit/data/ls_long.txt')
+
+
+@mock.patch('dcoscli.tables.STREAM_CHUNK_SIZE', 2)
+def test_streaming_table_chunks():
+    results = [mesos.TaskExecResult(task_id, 0, 1, None)
+               for task_id in ['a', 'bbb', 'cc', 'dd', 'eeeeeeeeee']]
+    produced = []
+
+    def _results():
+        for result in results:
+            produced.append(result)
+            yield result
+
+    chunks = tables.task_exec_table(tables.RowStream(_results())).chunks()
+    assert next(chunks) == ('TASK  EXIT CODE   TIME  \n'
+                            'a             0  1.00s  \n'
+                            'bbb           0  1.00s  ')
+    assert len(produced) == 2
+    assert list(chunks) == ['cc            0  1.00s  \n'
+                            'dd            0  1.00s  ',
+                            'eeeeeeeeee          0  1.00s  ']
+    assert len(produced) == 5
+
+
+def test_streaming_table_without_rows():
+    table = tables.task_exec_table(tables.RowStream(iter([])))
+    assert list(table.chunks()) == ['TASK  EXIT CODE  TIME  ']
+
+
 def _test_table(table_fn, fixture_fn, path):
     table = table_fn(fixture_fn)
     with open(path) as f:
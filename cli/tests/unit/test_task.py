@@ -1,12 +1,18 @@
+import datetime
+import json
+
 import pytest
-from mock import MagicMock, patch
+from mock import MagicMock, Mock, patch
 
 from dcos import mesos
-from dcos.errors import DCOSException
-from dcoscli.log import log_files
+from dcos.errors import DCOSConnectionError, DCOSException
+from dcos.sse import Event
+from dcoscli.log import (_FollowStats, _next_interval, _read_last_lines,
+                         follow_logs, follow_many_logs, log_files,
+                         LogCursors, print_logs_range)
 from dcoscli.task.main import _dcos_log, _metrics, main
 
-from .common import assert_mock
+from .common import assert_mock, mock_args
 
 
 @patch('dcos.config.get_config')
@@ -54,6 +60,83 @@ def test_log_file_unavailable():
     assert e.exconly().split(':', 1)[1].strip() == msg
 
 
+@patch('dcoscli.log.FOLLOW_MIN_INTERVAL', 0.01)
+def test_log_follow_files_become_unavailable():
+    """ Test following files which stop being readable """
+    files = [mesos.MesosFile(path, dcos_client=MagicMock())
+             for path in ['first', 'second']]
+    for mesos_file in files:
+        mesos_file.read = _mock_exception('exception')
+
+    with patch('dcoscli.log._stream_files', return_value=(None, files)):
+        with pytest.raises(DCOSException) as e:
+            log_files(files, True, 10)
+
+    msg = "No files exist. Exiting."
+    assert e.exconly().split(':', 1)[1].strip() == msg
+
+
+@patch('dcoscli.log.FOLLOW_MIN_INTERVAL', 0.01)
+def test_log_follow_raises_unexpected_errors():
+    """ Test following files which fail with a non-DCOS error """
+    files = [mesos.MesosFile(path, dcos_client=MagicMock())
+             for path in ['first', 'second']]
+
+    with patch('dcoscli.log._stream_files', return_value=(None, files)), \
+            patch('dcoscli.log._read_rest', side_effect=ValueError('boom')):
+        with pytest.raises(ValueError) as e:
+            log_files(files, True, 10)
+
+    assert str(e.value) == 'boom'
+
+
+def test_log_follow_backoff():
+    interval = _next_interval(0.25, False)
+    assert interval == 0.5
+    for _ in range(10):
+        interval = _next_interval(interval, False)
+    assert interval == 4.0
+    assert _next_interval(interval, True) == 0.25
+
+
+class _FakeFilesClient(object):
+    """Serves files/read.json for `content`"""
+
+    def __init__(self, content):
+        self.content = content
+        self.reads = 0
+
+    def master_file_read(self, path, length, offset):
+        if offset == -1:
+            return {'offset': len(self.content), 'data': ''}
+        self.reads += 1
+        return {'offset': offset,
+                'data': self.content[offset:offset + length]}
+
+
+@pytest.mark.parametrize('content', [
+    '', 'one', 'one\n', '\n\n\n', 'a\nb\nc\nd\n', 'a\nb\nc\nd'])
+@pytest.mark.parametrize('num_lines', [0, 1, 2, 3, 10])
+def test_read_last_lines(content, num_lines):
+    mesos_file = mesos.MesosFile(
+        'stdout', dcos_client=_FakeFilesClient(content))
+
+    expected = content[:-1] if content.endswith('\n') else content
+    expected = expected.split('\n')[-num_lines:] if num_lines else []
+
+    assert _read_last_lines(num_lines, mesos_file) == expected
+    assert mesos_file.tell() == len(content)
+
+
+def test_read_last_lines_grows_window():
+    lines = ['{}'.format(i) * 1000 for i in range(10)] * 100
+    client = _FakeFilesClient('\n'.join(lines) + '\n')
+    mesos_file = mesos.MesosFile('stdout', dcos_client=client)
+
+    assert _read_last_lines(500, mesos_file) == lines[-500:]
+    assert client.reads <= 3
+
+
 def _mock_exception(contents='exception'):
     return MagicMock(side_effect=DCOSException(contents))
 
@@ -141,7 +224,148 @@ def test_dcos_log_stream(mocked_get_config_val, mocked_http_get,
     mocked_follow_logs.assert_called_with(
         'http://127.0.0.1/system/v1/agent/slave-123/logs/v1/'
         'stream/framework/framework-123/executor/id-123/container/'
-        'child-123?skip_prev=10&filter=STREAM:STDERR')
+        'child-123?skip_prev=10&filter=STREAM:STDERR', None)
+
+
+@patch('dcoscli.log.follow_many_logs')
+@patch('dcos.config.get_config_val', return_value='http://127.0.0.1')
+def test_dcos_log_stream_many_tasks(mocked_get_config_val,
+                                    mocked_follow_many_logs):
+    def _executor_task(task_id):
+        return {'state': 'TASK_RUNNING',
+                'statuses': [{'state': 'TASK_RUNNING', 'container_status': {
+                    'container_id': {'value': 'container-' + task_id}}}],
+                'slave_id': 'slave-123',
+                'framework_id': 'framework-123',
+                'id': task_id}
+
+    tasks = [Mock(), Mock()]
+    tasks[0].executor.return_value = {'tasks': [_executor_task('app.1')]}
+    tasks[1].executor.return_value = {'tasks': [_executor_task('app.2')]}
+    _dcos_log(True, tasks, 10, 'stdout', False)
+
+    mocked_follow_many_logs.assert_called_with([
+        (task_id,
+         'http://127.0.0.1/system/v1/agent/slave-123/logs/v1/stream/'
+         'framework/framework-123/executor/{0}/container/container-{0}'
+         '?skip_prev=10&filter=STREAM:STDOUT'.format(task_id))
+        for task_id in ['app.1', 'app.2']], None)
+
+
+def test_follow_many_logs():
+    streams = {
+        'http://dcos/a': [[_log_event('a1', 1500000001)],
+                          [_log_event('a3', 1500000003)]],
+        'http://dcos/bb': [[_log_event('b2', 1500000002),
+                            _log_event(None, 1500000002),
+                            _log_event('b4', 1500000004)]]}
+    date = datetime.datetime.fromtimestamp(1500000000)
+
+    with patch('dcos.sse.stream', side_effect=lambda url: streams[url]), \
+            patch('dcoscli.log.REORDER_WINDOW', 60), \
+            patch('dcoscli.log.RECONNECT_ATTEMPTS', 0), \
+            mock_args([]) as (stdout, stderr):
+        follow_many_logs([('a', 'http://dcos/a'), ('bb', 'http://dcos/bb')])
+
+    expected = ''
+    for label, second in [('a ', 1), ('bb', 2), ('a ', 3), ('bb', 4)]:
+        expected += '{} | {}: {}{}\n'.format(
+            label,
+            (date + datetime.timedelta(seconds=second)).strftime(
+                '%Y-%m-%d %H:%M:%S'),
+            label.strip()[0], second)
+    assert stdout.getvalue() == expected
+
+
+def _log_event(message, timestamp, cursor=''):
+    fields = {'MESSAGE': message} if message is not None else {}
+    return Event(cursor, None, json.dumps(
+        {'fields': fields, 'realtime_timestamp': timestamp * 1000000}))
+
+
+def test_follow_logs():
+    batches = [[_log_event('a', 1500000000), _log_event(None, 1500000000),
+                _log_event('b', 1500000000.5)],
+               [_log_event('c', 1500000061)]]
+    date = datetime.datetime.fromtimestamp(1500000000)
+    later = date + datetime.timedelta(seconds=61)
+
+    with patch('dcos.sse.stream', return_value=iter(batches)), \
+            patch('dcoscli.log.RECONNECT_ATTEMPTS', 0), \
+            mock_args([]) as (stdout, stderr), \
+            pytest.raises(DCOSException):
+        follow_logs('http://dcos/stream')
+
+    assert stdout.getvalue() == '{0}: a\n{0}: b\n{1}: c\n'.format(
+        date.strftime('%Y-%m-%d %H:%M:%S'),
+        later.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+@patch('dcoscli.log.time.sleep')
+def test_follow_logs_resumes(sleep_mock):
+    urls = []
+
+    def _stream(url):
+        urls.append(url)
+        if len(urls) == 1:
+            yield [_log_event('a', 1500000000, 'c1'),
+                   _log_event(None, 1500000000, 'c2')]
+            raise DCOSConnectionError(url)
+        elif len(urls) == 2:
+            yield [_log_event('b', 1500000000, 'c3')]
+
+    cursors = LogCursors()
+    with patch('dcos.sse.stream', side_effect=_stream), \
+            patch('dcoscli.log.RECONNECT_ATTEMPTS', 1), \
+            mock_args([]) as (stdout, stderr), \
+            pytest.raises(DCOSException) as exc_info:
+        follow_logs('http://dcos/logs/v1/stream/?skip_prev=10&filter=a',
+                    cursors)
+
+    assert urls == [
+        'http://dcos/logs/v1/stream/?skip_prev=10&filter=a',
+        'http://dcos/logs/v1/stream/?filter=a&cursor=c2&skip_next=1',
+        'http://dcos/logs/v1/stream/?filter=a&cursor=c3&skip_next=1']
+    assert stdout.getvalue().endswith(': b\n')
+    assert stderr.getvalue() == 'Lost the log stream; resuming in 1s\n' * 2
+    assert [c[0][0] for c in sleep_mock.call_args_list] == [0.5, 0.5]
+    assert 'Unable to resume the log stream' in str(exc_info.value)
+    assert cursors.get('http://dcos/logs/v1/range/?filter=a') == 'c3'
+
+
+def test_print_logs_range_resume(tmpdir):
+    path = str(tmpdir.join('log_cursors.json'))
+    url = 'http://dcos/logs/v1/range/?skip_prev=10'
+    urls = []
+
+    def _stream(url):
+        urls.append(url)
+        yield [_log_event('a', 1500000000, 'c{}'.format(len(urls)))]
+
+    with patch('dcos.sse.stream', side_effect=_stream), \
+            mock_args([]) as (stdout, stderr):
+        print_logs_range(url, LogCursors(path))
+        print_logs_range(url, LogCursors(path))
+
+    assert urls == [url, 'http://dcos/logs/v1/range/?cursor=c1&skip_next=1']
+    assert stdout.getvalue().count(': a\n') == 2
+    assert LogCursors(path).get(url) == 'c2'
+
+
+@patch('dcoscli.log.time.time', return_value=100)
+def test_follow_stats_lag(time_mock):
+    stats = _FollowStats()
+
+    with mock_args([]) as (stdout, stderr):
+        for now, timestamp in [(100, 99), (110, 100), (120, 108),
+                               (121, 120)]:
+            time_mock.return_value = now
+            stats.update(1, 0, timestamp)
+
+    assert stderr.getvalue() == (
+        'Falling behind the log stream: 11s behind at 0 entries/s\n'
+        'Caught up with the log stream\n')
+    assert (stats.entries, stats.max_lag) == (4, 11)
 
 
 @patch('dcos.http.get')
@@ -194,3 +418,80 @@ def test_dcos_task_metrics_agent_missing_slave(mocked_get_config_val,
     # Should a task not have a slave ID, expect an error
     with pytest.raises(DCOSException):
         _metrics(True, 'task_id', False)
+
+
+def test_download(tmpdir):
+    mesos_file = MagicMock()
+    mesos_file.download.side_effect = lambda f: f.write(b'log') or 3
+    output = str(tmpdir.join('stdout'))
+
+    with patch('dcos.mesos.DCOSClient'), \
+            patch('dcos.mesos.get_master') as get_master, \
+            patch('dcoscli.task.main._mesos_files',
+                  return_value=[mesos_file]):
+        get_master.return_value.tasks.return_value = [{'id': 'app.1'}]
+
+        args = ['task', 'download', '--output', output, 'app', 'stdout']
+        assert main(args) == 0
+
+    with open(output, 'rb') as f:
+        assert f.read() == b'log'
+
+
+def test_download_failure_keeps_existing_file(tmpdir):
+    def _download(f):
+        f.write(b'partial')
+        raise DCOSConnectionError('http://agent/files/read')
+
+    mesos_file = MagicMock()
+    mesos_file.download.side_effect = _download
+    output = tmpdir.join('stdout')
+    output.write_binary(b'old log')
+
+    with patch('dcos.mesos.DCOSClient'), \
+            patch('dcos.mesos.get_master') as get_master, \
+            patch('dcoscli.task.main._mesos_files',
+                  return_value=[mesos_file]):
+        get_master.return_value.tasks.return_value = [{'id': 'app.1'}]
+
+        args = ['task', 'download', '--output', str(output), 'app', 'stdout']
+        with mock_args(args):
+            assert main(args) == 1
+
+    assert output.read_binary() == b'old log'
+    assert tmpdir.listdir() == [output]
+
+
+def test_download_multiple_tasks():
+    with patch('dcos.mesos.DCOSClient'), \
+            patch('dcos.mesos.get_master') as get_master:
+        get_master.return_value.tasks.return_value = [
+            {'id': 'app.1'}, {'id': 'app.2'}]
+
+        stderr = (b"There are multiple tasks with ID matching [app]. "
+                  b"Please choose one:\n\tapp.1\n\tapp.2\n")
+        args = ['task', 'download', 'app', 'stdout']
+        assert_mock(main, args, returncode=1, stderr=stderr)
+
+
+def test_exec_all_matching():
+    results = [mesos.TaskExecResult('app.1', 0, 1.5, None),
+               mesos.TaskExecResult('app.2', None, 0.25,
+                                    DCOSException('gone'))]
+
+    with patch('dcos.mesos.DCOSClient'), \
+            patch('dcos.mesos.get_master') as get_master, \
+            patch('dcos.mesos.exec_tasks',
+                  return_value=results) as exec_tasks:
+        get_master.return_value.tasks.return_value = [
+            {'id': 'app.1'}, {'id': 'app.2'}]
+
+        stdout = (b"TASK   EXIT CODE   TIME  \n"
+                  b"app.1          0  1.50s  \n"
+                  b"app.2        ---  0.25s  \n")
+        stderr = b"Error running the command in task app.2: gone\n"
+        args = ['task', 'exec', '--all-matching', '--parallel=2', 'app',
+                'ls', '-l']
+        assert_mock(main, args, returncode=1, stdout=stdout, stderr=stderr)
+
+    assert exec_tasks.call_args[0] == (['app.1', 'app.2'], 'ls', ['-l'], 2)
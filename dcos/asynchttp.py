@@ -0,0 +1,701 @@
+"""
+Provides a minimal HTTP/1.1 client on asyncio streams, for the long-lived
+streaming requests that `dcos task exec` sends to Mesos agents.
+
+Requests are sent with the same DC/OS auth, SSL verification settings and
+connection timeout as :py:func:`dcos.http.request`. Like it, they prompt
+for credentials on a 401 if `core.prompt_login` is set, unless their body
+is streamed and can't be sent again, and honor the proxies and CA bundle
+configured through the environment (HTTP_PROXY, HTTPS_PROXY, NO_PROXY,
+REQUESTS_CA_BUNDLE). A request body can be streamed with chunked
+transfer encoding and a response body can be read as the data arrives.
+Both directions are flow controlled: a body is only produced as fast as the
+server accepts it, and the server's data is only read as fast as it is
+consumed. Connections are kept alive and reused by later requests to the
+same host.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import re
+import socket
+import ssl
+
+from requests.structures import CaseInsensitiveDict
+from requests.utils import (DEFAULT_CA_BUNDLE_PATH, get_auth_from_url,
+                            get_environ_proxies)
+
+from six.moves.urllib.parse import urlparse
+
+from dcos import config, http, util
+from dcos.errors import (DCOSAuthorizationException, DCOSBadRequest,
+                         DCOSConnectionError, DCOSException, DCOSHTTPException)
+
+logger = util.get_logger(__name__)
+
+READ_SIZE = 64 * 1024
+"""Maximum number of bytes returned by a single
+:py:meth:`Response.read_some` call, and the size of the read buffer of
+each connection"""
+
+_STATUS_LINE = re.compile(r'^(HTTP/1\.[01]) ([0-9]{3})(?: (.*))?$')
+
+
+class ConnectionPool(object):
+    """Sends requests on asyncio streams, keeping idle connections open for
+    reuse by later requests to the same scheme, host and port.
+
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    """
+
+    def __init__(self, toml_config=None):
+        if toml_config is None:
+            toml_config = config.get_config()
+
+        self._auth_token = config.get_config_val(
+            "core.dcos_acs_token", toml_config)
+        self._prompt_login = config.get_config_val(
+            "core.prompt_login", toml_config)
+        self._dcos_url = config.get_config_val("core.dcos_url", toml_config)
+        self._cosmos_url = config.get_config_val(
+            "package.cosmos_url", toml_config)
+        self._ssl_context = _ssl_context(
+            http._verify_ssl(None, toml_config))
+
+        self._idle = {}  # (scheme, host, port) -> [_Connection]
+        self.opened = 0
+        self.requests = 0
+
+    async def request(self, method, url, headers=None, body=None,
+                      is_success=http._default_is_success):
+        """Sends an HTTP request and reads the response headers.
+
+        :param method: HTTP method
+        :type method: str
+        :param url: URL of the request
+        :type url: str
+        :param headers: request headers
+        :type headers: dict | None
+        :param body: the request body, or a coroutine function returning
+                     the next piece of the body, and None at its end. The
+                     latter is sent with chunked transfer encoding.
+        :type body: bytes | function | None
+        :param is_success: Defines successful status codes for the request
+        :type is_success: Function from int to bool
+        :returns: the response, whose body is yet to be read
+        :rtype: Response
+        """
+
+        parsed_url = urlparse(url)
+        proxy = _proxy_for(url)
+        key = (parsed_url.scheme,
+               parsed_url.hostname,
+               parsed_url.port or
+               (443 if parsed_url.scheme == 'https' else 80),
+               proxy)
+        target = parsed_url.path or '/'
+        if parsed_url.query:
+            target += '?' + parsed_url.query
+
+        headers = CaseInsensitiveDict(headers or {})
+        headers.setdefault('Host', parsed_url.netloc)
+        auth = http._auth_for(
+            url, self._auth_token, self._dcos_url, self._cosmos_url)
+        if auth is not None:
+            headers['Authorization'] = "token={}".format(auth.token)
+        if proxy is not None and parsed_url.scheme == 'http':
+            # Plain HTTP requests are forwarded by the proxy, and name
+            # their target in full
+            target = '{}://{}{}'.format(
+                parsed_url.scheme, parsed_url.netloc, target)
+            headers.update(_proxy_headers(proxy))
+        if callable(body):
+            headers['Transfer-Encoding'] = 'chunked'
+        else:
+            headers['Content-Length'] = str(len(body or b''))
+
+        logger.info('Sending HTTP [%r] to [%r]: %r', method, url, headers)
+
+        connection = await self._connect(key, url)
+        self.requests += 1
+        try:
+            head = '{} {} HTTP/1.1\r\n{}\r\n'.format(
+                method.upper(),
+                target,
+                ''.join('{}: {}\r\n'.format(name, value)
+                        for name, value in headers.items()))
+            connection.writer.write(head.encode('latin-1'))
+            response = await connection.exchange(url, body)
+        except (OSError, asyncio.IncompleteReadError):
+            connection.close()
+            logger.exception("HTTP Connection Error")
+            raise DCOSConnectionError(url)
+        except BaseException:
+            connection.close()
+            raise
+
+        logger.info('Received HTTP response [%r]: %r',
+                    response.status_code,
+                    response.headers)
+
+        if is_success(response.status_code):
+            return response
+
+        # Read the error message so that the exception can show it
+        await response.read()
+        if response.status_code == 401:
+            await asyncio.get_event_loop().run_in_executor(
+                None, http._login_again, response, self._auth_token,
+                self._prompt_login and not callable(body), self._dcos_url)
+            # logged in again: the new token is in the cluster config
+            self._auth_token = config.get_config_val(
+                "core.dcos_acs_token", config.get_config())
+            return await self.request(method, url, headers, body, is_success)
+        elif response.status_code == 403:
+            raise DCOSAuthorizationException(response)
+        elif response.status_code == 400:
+            raise DCOSBadRequest(response)
+        else:
+            raise DCOSHTTPException(response)
+
+    def close(self):
+        """Closes the idle connections.
+
+        :rtype: None
+        """
+
+        for connections in self._idle.values():
+            for connection in connections:
+                connection.close()
+        self._idle.clear()
+
+    async def _connect(self, key, url):
+        """
+        :param key: scheme, host, port and proxy of the connection
+        :type key: (str, str, int, str | None)
+        :param url: URL of the request, for error messages
+        :type url: str
+        :returns: an idle connection to `key`, or a new one
+        :rtype: _Connection
+        """
+
+        idle = self._idle.get(key)
+        while idle:
+            connection = idle.pop()
+            if not connection.reader.at_eof():
+                return connection
+            connection.close()
+
+        scheme, host, port, proxy = key
+        try:
+            if proxy is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        host, port,
+                        ssl=self._ssl_context if scheme == 'https' else None,
+                        limit=READ_SIZE),
+                    http.DEFAULT_TIMEOUT)
+            elif scheme == 'http':
+                parsed_proxy = urlparse(proxy)
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        parsed_proxy.hostname, parsed_proxy.port or 80,
+                        limit=READ_SIZE),
+                    http.DEFAULT_TIMEOUT)
+            else:
+                sock = await asyncio.wait_for(
+                    asyncio.get_event_loop().run_in_executor(
+                        None, _open_tunnel, proxy, host, port, url),
+                    http.DEFAULT_TIMEOUT)
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        sock=sock,
+                        ssl=self._ssl_context,
+                        server_hostname=host,
+                        limit=READ_SIZE),
+                    http.DEFAULT_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.exception("HTTP Connection Timeout")
+            raise DCOSConnectionError(url)
+        except ssl.SSLError:
+            logger.exception("HTTP SSL Error")
+            raise DCOSException(
+                "An SSL error occurred. To configure your SSL settings, "
+                "please run: `dcos config set core.ssl_verify <value>`")
+        except OSError:
+            logger.exception("HTTP Connection Error")
+            raise DCOSConnectionError(url)
+
+        self.opened += 1
+        return _Connection(self, key, reader, writer)
+
+    def _release(self, connection):
+        """Makes an idle connection available to later requests.
+
+        :param connection: connection whose response was fully read
+        :type connection: _Connection
+        :rtype: None
+        """
+
+        self._idle.setdefault(connection.key, []).append(connection)
+
+
+class _Connection(object):
+    """An open connection of a :py:class:`ConnectionPool`.
+
+    :param pool: the pool the connection belongs to
+    :type pool: ConnectionPool
+    :param key: scheme, host and port of the connection
+    :type key: (str, str, int)
+    :param reader: the connection's reader
+    :type reader: asyncio.StreamReader
+    :param writer: the connection's writer
+    :type writer: asyncio.StreamWriter
+    """
+
+    def __init__(self, pool, key, reader, writer):
+        self.pool = pool
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+
+    async def exchange(self, url, body):
+        """Sends the request body and reads the response headers. If the
+        server responds before the whole body is sent, the rest of the
+        body is not sent.
+
+        :param url: URL of the request
+        :type url: str
+        :param body: the request body, see :py:meth:`ConnectionPool.request`
+        :type body: bytes | function | None
+        :returns: the response
+        :rtype: Response
+        """
+
+        send = asyncio.ensure_future(self._send_body(body))
+        receive = asyncio.ensure_future(self._receive_head(url))
+        try:
+            await asyncio.wait([send, receive],
+                               return_when=asyncio.FIRST_COMPLETED)
+            # A server which responds early may close the connection
+            # while the body is being sent; its response is still read.
+            if send.done() and not isinstance(send.exception(), OSError):
+                send.result()
+            response = await receive
+        finally:
+            receive.cancel()
+            if not send.done():
+                send.cancel()
+
+        if send.cancelled() or send.exception() is not None:
+            response.keep_alive = False
+        if response.done:
+            response._finish()
+        return response
+
+    async def _send_body(self, body):
+        """
+        :param body: the request body, see :py:meth:`ConnectionPool.request`
+        :type body: bytes | function | None
+        :rtype: None
+        """
+
+        writer = self.writer
+        if not callable(body):
+            if body:
+                writer.write(body)
+            await writer.drain()
+            return
+
+        while True:
+            data = await body()
+            if data is None:
+                break
+            if data:
+                writer.write(
+                    '{:x}\r\n'.format(len(data)).encode('ascii') + data +
+                    b'\r\n')
+                await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def _receive_head(self, url):
+        """
+        :param url: URL of the request
+        :type url: str
+        :returns: the response, with its status and headers
+        :rtype: Response
+        """
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        match = _STATUS_LINE.match(
+            status_line.decode('latin-1').rstrip('\r\n'))
+        if match is None:
+            logger.error('Invalid HTTP status line from [%r]: %r',
+                         url, status_line)
+            raise DCOSConnectionError(url)
+        version, status, reason = match.group(1, 2, 3)
+
+        headers = CaseInsensitiveDict()
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip()] = value.strip()
+
+        if not headers.get('Content-Length', '0').isdigit():
+            logger.error('Invalid Content-Length from [%r]: %r',
+                         url, headers['Content-Length'])
+            raise DCOSConnectionError(url)
+
+        keep_alive = (version == 'HTTP/1.1' and
+                      headers.get('Connection', '').lower() != 'close')
+        return Response(self, url, int(status), reason or '', headers,
+                        keep_alive)
+
+    def close(self):
+        """Closes the connection.
+
+        :rtype: None
+        """
+
+        self.writer.close()
+
+
+class Response(object):
+    """The response to a request sent by :py:class:`ConnectionPool`. Its
+    body is read with :py:meth:`read_some` or :py:meth:`read`; once it is
+    fully read, the connection is reused by later requests.
+
+    :param connection: the connection the response is read from
+    :type connection: _Connection
+    :param url: URL of the request
+    :type url: str
+    :param status_code: HTTP status code
+    :type status_code: int
+    :param reason: HTTP reason phrase
+    :type reason: str
+    :param headers: response headers
+    :type headers: CaseInsensitiveDict
+    :param keep_alive: whether the connection can be reused
+    :type keep_alive: bool
+    """
+
+    def __init__(self, connection, url, status_code, reason, headers,
+                 keep_alive):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.url = url
+        self.request = _Request(url)
+        self.keep_alive = keep_alive
+        self.content = None
+
+        self._connection = connection
+        if headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            self._parser = _ChunkedParser()
+            self._remaining = None
+        elif 'Content-Length' in headers:
+            self._parser = None
+            self._remaining = int(headers['Content-Length'])
+        else:
+            # The body ends when the server closes the connection
+            self._parser = None
+            self._remaining = None
+            self.keep_alive = False
+        self._done = status_code in (204, 304) or self._remaining == 0
+
+    @property
+    def done(self):
+        """
+        :returns: whether the whole body was read
+        :rtype: bool
+        """
+
+        return self._done
+
+    async def read_some(self):
+        """Reads the next part of the body: all of the body data that was
+        received so far, up to `READ_SIZE` bytes, or the next data to be
+        received if there is none.
+
+        :returns: body data, or b'' at the end of the body
+        :rtype: bytes
+        """
+
+        while not self._done:
+            size = READ_SIZE
+            if self._remaining is not None:
+                size = min(size, self._remaining)
+
+            try:
+                data = await self._connection.reader.read(size)
+            except OSError:
+                logger.exception("HTTP Connection Error")
+                self.keep_alive = False
+                self._finish()
+                raise DCOSConnectionError(self.url)
+            if not data:
+                if self._parser is not None or self._remaining:
+                    self.keep_alive = False
+                    self._finish()
+                    raise DCOSConnectionError(self.url)
+                self._done = True
+            elif self._parser is not None:
+                data = self._parser.feed(data)
+                self._done = self._parser.done
+            elif self._remaining is not None:
+                self._remaining -= len(data)
+                self._done = self._remaining == 0
+
+            if self._done:
+                self._finish()
+            if data:
+                return data
+
+        return b''
+
+    async def read(self):
+        """Reads the rest of the body.
+
+        :returns: the body
+        :rtype: bytes
+        """
+
+        chunks = []
+        while True:
+            data = await self.read_some()
+            if not data:
+                break
+            chunks.append(data)
+        self.content = b''.join(chunks)
+        return self.content
+
+    @property
+    def text(self):
+        """
+        :returns: the body read by :py:meth:`read`
+        :rtype: str
+        """
+
+        return (self.content or b'').decode('utf-8', 'replace')
+
+    def json(self):
+        """
+        :returns: the decoded body read by :py:meth:`read`
+        :rtype: dict | list
+        """
+
+        return json.loads(self.text)
+
+    def close(self):
+        """Closes the connection if the body was not fully read.
+
+        :rtype: None
+        """
+
+        if not self._done:
+            self._done = True
+            self.keep_alive = False
+        self._finish()
+
+    def _finish(self):
+        """Hands the connection back to the pool, or closes it.
+
+        :rtype: None
+        """
+
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if self.keep_alive:
+            connection.pool._release(connection)
+        else:
+            connection.close()
+
+
+class _Request(object):
+    """The parts of a request that errors refer to.
+
+    :param url: URL of the request
+    :type url: str
+    """
+
+    def __init__(self, url):
+        self.url = url
+
+
+class _ChunkedParser(object):
+    """Incrementally decodes a body sent with chunked transfer encoding."""
+
+    def __init__(self):
+        self.done = False
+        self._pending = b''  # an incomplete size or trailer line
+        self._remaining = 0  # bytes left in the current chunk
+        self._crlf = 0  # bytes left of the CRLF after the current chunk
+        self._trailers = False
+
+    def feed(self, data):
+        """
+        :param data: data received from the connection
+        :type data: bytes
+        :returns: the body data in `data`
+        :rtype: bytes
+        """
+
+        if self._pending:
+            data = self._pending + data
+            self._pending = b''
+
+        body = []
+        pos = 0
+        end = len(data)
+        while pos < end and not self.done:
+            if self._remaining:
+                take = min(self._remaining, end - pos)
+                body.append(data[pos:pos + take])
+                pos += take
+                self._remaining -= take
+                if not self._remaining:
+                    self._crlf = 2
+            elif self._crlf:
+                take = min(self._crlf, end - pos)
+                pos += take
+                self._crlf -= take
+            else:
+                newline = data.find(b'\n', pos)
+                if newline < 0:
+                    self._pending = data[pos:]
+                    break
+                line = data[pos:newline].strip()
+                pos = newline + 1
+                if self._trailers:
+                    self.done = not line
+                    continue
+
+                try:
+                    size = int(line.split(b';', 1)[0], 16)
+                except ValueError:
+                    raise DCOSException(
+                        "Invalid chunk size: {!r}".format(line))
+                if size == 0:
+                    self._trailers = True
+                self._remaining = size
+
+        return b''.join(body)
+
+
+def _proxy_for(url):
+    """
+    :param url: URL of a request
+    :type url: str
+    :returns: the URL of the proxy configured in the environment for
+              `url`, or None to connect directly
+    :rtype: str | None
+    """
+
+    proxies = get_environ_proxies(url)
+    proxy = proxies.get(urlparse(url).scheme) or proxies.get('all')
+    if not proxy:
+        return None
+    if '://' not in proxy:
+        proxy = 'http://' + proxy
+    return proxy
+
+
+def _proxy_headers(proxy):
+    """
+    :param proxy: URL of a proxy
+    :type proxy: str
+    :returns: the headers authenticating requests with the proxy
+    :rtype: dict
+    """
+
+    username, password = get_auth_from_url(proxy)
+    if not username:
+        return {}
+    credentials = '{}:{}'.format(username, password).encode('latin-1')
+    return {'Proxy-Authorization': 'Basic {}'.format(
+        base64.b64encode(credentials).decode('ascii'))}
+
+
+def _open_tunnel(proxy, host, port, url):
+    """Opens a connection to `host` and `port` tunnelled through `proxy`
+    with a CONNECT request.  This blocks, so it is run on an executor.
+
+    :param proxy: URL of the proxy
+    :type proxy: str
+    :param host: host to connect to
+    :type host: str
+    :param port: port to connect to
+    :type port: int
+    :param url: URL of the request, for error messages
+    :type url: str
+    :returns: the connected socket
+    :rtype: socket.socket
+    """
+
+    parsed_proxy = urlparse(proxy)
+    sock = socket.create_connection(
+        (parsed_proxy.hostname, parsed_proxy.port or 80),
+        timeout=http.DEFAULT_TIMEOUT)
+    try:
+        head = 'CONNECT {0}:{1} HTTP/1.1\r\nHost: {0}:{1}\r\n{2}\r\n'.format(
+            host, port,
+            ''.join('{}: {}\r\n'.format(name, value)
+                    for name, value in _proxy_headers(proxy).items()))
+        sock.sendall(head.encode('latin-1'))
+
+        response = b''
+        while b'\r\n\r\n' not in response:
+            data = sock.recv(READ_SIZE)
+            if not data:
+                raise DCOSConnectionError(url)
+            response += data
+
+        # Nothing follows the proxy's response until the tunnel is used
+        status_line = response.split(b'\r\n', 1)[0].decode('latin-1')
+        match = _STATUS_LINE.match(status_line)
+        if match is None or match.group(2) != '200':
+            logger.error('Proxy [%r] refused to connect to [%r]: %r',
+                         proxy, url, status_line)
+            raise DCOSConnectionError(url)
+    except BaseException:
+        sock.close()
+        raise
+
+    sock.settimeout(None)
+    return sock
+
+
+def _ssl_context(verify):
+    """
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str | None
+    :returns: the SSL context for https connections
+    :rtype: ssl.SSLContext
+    """
+
+    if verify is None or verify is True:
+        # Like requests, use the CA bundle set in the environment, or the
+        # one it ships with
+        verify = (os.environ.get('REQUESTS_CA_BUNDLE') or
+                  os.environ.get('CURL_CA_BUNDLE') or
+                  DEFAULT_CA_BUNDLE_PATH)
+
+    if isinstance(verify, str):
+        if os.path.isdir(verify):
+            return ssl.create_default_context(capath=verify)
+        return ssl.create_default_context(cafile=verify)
+
+    context = ssl.create_default_context()
+    if verify is False:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
@@ -285,8 +285,41 @@ def set_val(name, value, config_path=None):
     return toml_config, msg
 
 
+# Parsed config files, keyed by path. Each entry is a tuple of the file's
+# (mtime, size) at the time it was parsed and the parsed dictionary.
+_config_snapshots = {}
+
+
+def _file_signature(path):
+    """
+    :param path: path to the file
+    :type path: str
+    :returns: the modification time and size of the file, or None if it
+              doesn't exist
+    :rtype: (int, int) | None
+    """
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def clear_config_snapshots():
+    """Forget all the parsed config files, forcing the next load to read
+    them from disk.
+
+    :rtype: None
+    """
+
+    _config_snapshots.clear()
+
+
 def load_from_path(path, mutable=False):
-    """Loads a TOML file from the path
+    """Loads a TOML file from the path. Immutable loads are served from a
+    per-process snapshot which is invalidated when the file's modification
+    time or size changes.
 
     :param path: Path to the TOML file
     :type path: str
@@ -296,6 +329,13 @@ def load_from_path(path, mutable=False):
     :rtype: Toml | MutableToml
     """
 
+    if not mutable:
+        signature = _file_signature(path)
+        snapshot = _config_snapshots.get(path)
+        if signature is not None and snapshot is not None and \
+                snapshot[0] == signature:
+            return Toml(snapshot[1])
+
     util.ensure_file_exists(path)
     util.enforce_file_permissions(path)
     with util.open_file(path, 'r') as config_file:
@@ -304,7 +344,12 @@ def load_from_path(path, mutable=False):
         except Exception as e:
             raise DCOSException(
                 'Error parsing config file at [{}]: {}'.format(path, e))
-        return (MutableToml if mutable else Toml)(toml_obj)
+
+    if mutable:
+        return MutableToml(toml_obj)
+
+    _config_snapshots[path] = (_file_signature(path), toml_obj)
+    return Toml(toml_obj)
 
 
 def save(toml_config, config_path=None):
@@ -324,6 +369,8 @@ def save(toml_config, config_path=None):
     with util.open_file(config_path, 'w') as config_file:
         config_file.write(serial)
 
+    _config_snapshots.pop(config_path, None)
+
 
 def _get_path(toml_config, path):
     """
@@ -30,6 +30,13 @@ DCOS_LOG_LEVEL_ENV = 'DCOS_LOG_LEVEL'
 DCOS_DEBUG_ENV = 'DCOS_DEBUG'
 """Name of the environment variable to enable DC/OS debug messages"""
 
+DCOS_CACHE_TTL_ENV = 'DCOS_CACHE_TTL'
+"""Name of the environment variable overriding `core.cache_ttl`"""
+
+DCOS_TASK_EXEC_ENGINE_ENV = 'DCOS_TASK_EXEC_ENGINE'
+"""Name of the environment variable selecting the engine of `dcos task exec`:
+'threads' (the default) or 'asyncio'"""
+
 DCOS_PAGER_COMMAND_ENV = 'PAGER'
 """Command to use to page long command output (e.g. 'less -R')"""
 
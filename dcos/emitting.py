@@ -6,7 +6,9 @@ import json
 import os
 import pydoc
 import re
+import subprocess
 import sys
+import types
 from distutils import spawn
 
 import pager
@@ -63,7 +65,7 @@ def print_handler(event):
     """Default handler for printing event to stdout.
 
     :param event: event to emit to stdout
-    :type event: str, dict, list, or dcos.errors.Error
+    :type event: str, dict, list, generator of str, or dcos.errors.Error
     """
 
     pager_command = os.environ.get(constants.DCOS_PAGER_COMMAND_ENV)
@@ -75,6 +77,9 @@ def print_handler(event):
     elif isinstance(event, six.string_types):
         _page(event, pager_command)
 
+    elif isinstance(event, types.GeneratorType):
+        _page_chunks(event, pager_command)
+
     elif isinstance(event, errors.Error):
         print(event.error(), file=sys.stderr)
         sys.stderr.flush()
@@ -102,7 +107,8 @@ def publish_table(emitter, objs, table_fn, json_):
     :type emitter: Emitter
     :param objs: objects to print
     :type objs: [object]
-    :param table_fn: function used to generate a PrettyTable from `objs`
+    :param table_fn: function used to generate a PrettyTable, or a table
+                     with a `chunks` generator, from `objs`
     :type table_fn: objs -> PrettyTable
     :param json_: whether or not to publish a json representation
     :type json_: bool
@@ -113,11 +119,62 @@ def publish_table(emitter, objs, table_fn, json_):
         emitter.publish(objs)
     else:
         table = table_fn(objs)
+        if hasattr(table, 'chunks'):
+            # a streamed table is published as it is rendered
+            emitter.publish(table.chunks())
+            return
+
         output = six.text_type(table)
         if output:
             emitter.publish(output)
 
 
+# Number of objects encoded at once by json_chunks
+JSON_CHUNK_SIZE = 100
+
+
+def json_chunks(objs):
+    """Encodes `objs` as a JSON array, a few objects at a time, as they are
+    produced.  Publishing the chunks prints the same output as publishing
+    the list of `objs`, without holding its whole encoding in memory.  The
+    objects themselves are only streamed if `objs` produces them lazily;
+    a list is encoded in chunks but stays in memory.  The chunks are
+    highlighted only if stdout is a TTY.
+
+    :param objs: objects to encode
+    :type objs: iterable
+    :returns: the lines of the array, JSON_CHUNK_SIZE objects at a time
+    :rtype: generator of str
+    """
+
+    highlight = sys.stdout.isatty() and not util.is_windows_platform()
+
+    def _chunk(lines):
+        text = '\n'.join(lines)
+        return _highlight_json(text) if highlight else text
+
+    # the encoded objects which are yet to be printed, but the last one,
+    # which is only followed by a comma once another object is produced
+    pending = ['[']
+    last = None
+    for obj in objs:
+        if last is not None:
+            pending.append(last + ',')
+            if len(pending) >= JSON_CHUNK_SIZE:
+                yield _chunk(pending)
+                pending = []
+
+        last = json.dumps(obj, sort_keys=True, indent=2)
+        last = '  ' + re.sub(r'\s+$', '', last, 0, re.M).replace('\n', '\n  ')
+
+    if last is None:
+        yield _chunk(['[]'])
+        return
+
+    pending += [last, ']']
+    yield _chunk(pending)
+
+
 def _process_json(event):
     """Conditionally highlights the supplied JSON value.
 
@@ -175,6 +232,82 @@ def _page(output, pager_command=None):
         print(output)
 
 
+def _page_chunks(chunks, pager_command=None):
+    """Like :py:func:`_page`, but for output which is produced in chunks of
+    lines.  Each chunk is printed, or written to the pager, as soon as it is
+    produced.  Whether to page is decided from the first chunk.
+
+    :param chunks: chunks of lines, without the trailing newline
+    :type chunks: generator of str
+    :param pager_command: pager to use
+    :type pager_command: str
+    :rtype: None
+    """
+
+    first = next(chunks, None)
+    if first is None:
+        return
+
+    if not sys.stdout.isatty() or util.is_windows_platform():
+        paginate = False
+    else:
+        try:
+            paginate = config.get_config_val("core.pagination")
+        except Exception:
+            paginate = True
+        paginate = paginate and pager.getheight() - 1 < first.count('\n')
+
+    if pager_command is None:
+        pager_command = 'less -R'
+
+    if paginate and \
+            spawn.find_executable(pager_command.split(' ')[0]) is not None:
+        _pipe_chunks(first, chunks, pager_command)
+        return
+
+    print(first)
+    sys.stdout.flush()
+    for chunk in chunks:
+        print(chunk)
+        sys.stdout.flush()
+
+
+def _pipe_chunks(first, chunks, pager_command):
+    """Writes chunks of lines to the stdin of a pager as they are produced,
+    until they are all written or the pager exits.
+
+    :param first: first chunk
+    :type first: str
+    :param chunks: other chunks
+    :type chunks: generator of str
+    :param pager_command: pager to use
+    :type pager_command: str
+    :rtype: None
+    """
+
+    proc = subprocess.Popen(pager_command, shell=True, stdin=subprocess.PIPE,
+                            universal_newlines=True)
+    try:
+        proc.stdin.write(first + '\n')
+        for chunk in chunks:
+            proc.stdin.write(chunk + '\n')
+            proc.stdin.flush()
+        proc.stdin.close()
+    except (IOError, KeyboardInterrupt):
+        # the pager was quit before the end of the output
+        pass
+    finally:
+        chunks.close()
+
+    while True:
+        try:
+            proc.wait()
+            break
+        except KeyboardInterrupt:
+            # like pydoc.pipepager, let the pager handle Ctrl-C
+            pass
+
+
 def _highlight_json(json_value):
     """
     :param json_value: JSON value to syntax-highlight
@@ -1,5 +1,10 @@
+import atexit
+import functools
+import threading
+
 import requests
 
+from requests.adapters import HTTPAdapter
 from requests.auth import AuthBase
 
 from six.moves.urllib.parse import urlparse
@@ -15,6 +20,13 @@ logger = util.get_logger(__name__)
 
 DEFAULT_TIMEOUT = 5
 
+DEFAULT_POOL_SIZE = util.STREAM_CONCURRENCY
+"""Default number of connections kept alive per host. Matches the size of
+the `util.stream` thread pool so that every worker can hold a connection."""
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
 
 def _default_is_success(status_code):
     """Returns true if the success status is between [200, 300).
@@ -98,8 +110,10 @@ def _request(method,
         url,
         kwargs.get('headers'))
 
+    session = _get_session(url, toml_config)
+
     try:
-        response = requests.request(
+        response = session.request(
             method=method,
             url=url,
             timeout=timeout,
@@ -131,6 +145,211 @@ def _request(method,
     return response
 
 
+def _pool_settings(toml_config=None):
+    """Returns the connection pool settings from the `core.http_pool_size`
+    and `core.http_keep_alive` config properties.
+
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: pool size and whether connections are kept alive
+    :rtype: (int, bool)
+    """
+
+    if toml_config is None:
+        toml_config = config.get_config()
+
+    pool_size = config.get_config_val("core.http_pool_size", toml_config)
+    try:
+        pool_size = int(pool_size) if pool_size else DEFAULT_POOL_SIZE
+    except ValueError:
+        pool_size = DEFAULT_POOL_SIZE
+
+    keep_alive = config.get_config_val("core.http_keep_alive", toml_config)
+    if isinstance(keep_alive, str):
+        keep_alive = keep_alive.lower() != "false"
+    elif keep_alive is None:
+        keep_alive = True
+
+    return max(pool_size, 1), keep_alive
+
+
+def _get_session(url, toml_config=None):
+    """Returns the `requests.Session` used to send requests to `url`.
+    Sessions are created once per process for each scheme and host, and
+    keep their connections alive so that later requests to the same host
+    reuse them instead of opening a new TCP/TLS connection. Sessions are
+    safe to share between the threads of `util.stream`.
+
+    :param url: URL the request will be sent to
+    :type url: str
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: session for the host of `url`
+    :rtype: requests.Session
+    """
+
+    parsed_url = urlparse(url)
+    key = (parsed_url.scheme, parsed_url.netloc)
+
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            pool_size, keep_alive = _pool_settings(toml_config)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1,
+                                  pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if not keep_alive:
+                session.headers['Connection'] = 'close'
+            _sessions[key] = session
+    return session
+
+
+def connection_stats():
+    """Returns how many connections were opened and how many requests
+    reused an already open connection, summed across all hosts.
+
+    :returns: dict with the `opened`, `requests` and `reused` counts
+    :rtype: dict
+    """
+
+    opened = 0
+    sent = 0
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    for session in sessions:
+        adapter = session.get_adapter('http://')
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+
+    return {'opened': opened,
+            'requests': sent,
+            'reused': max(sent - opened, 0)}
+
+
+def close_sessions():
+    """Closes all pooled sessions and their connections.
+
+    :rtype: None
+    """
+
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+@atexit.register
+def _log_connection_stats():
+    """Log the connection pool statistics when the process exits."""
+
+    if _sessions:
+        logger.info('HTTP connection stats: %r', connection_stats())
+
+
+@functools.lru_cache(maxsize=128)
+def _is_cluster_netloc(scheme, netloc, dcos_url, cosmos_url):
+    """Returns whether a request to `scheme`://`netloc` is a request to
+    the DC/OS cluster, i.e. it matches the scheme and netloc of either
+    `core.dcos_url` or `package.cosmos_url`. The answer is cached per
+    netloc and configured URLs.
+
+    :param scheme: scheme of the request URL
+    :type scheme: str
+    :param netloc: netloc of the request URL
+    :type netloc: str
+    :param dcos_url: value of `core.dcos_url`
+    :type dcos_url: str | None
+    :param cosmos_url: value of `package.cosmos_url`
+    :type cosmos_url: str | None
+    :rtype: bool
+    """
+
+    for expected_url in (dcos_url, cosmos_url):
+        if expected_url is None:
+            continue
+        expected = urlparse(expected_url)
+        if expected.scheme == scheme and expected.netloc == netloc:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=16)
+def _acs_auth(token):
+    """
+    :param token: DC/OS ACS token
+    :type token: str
+    :returns: the auth object for `token`
+    :rtype: DCOSAcsAuth
+    """
+
+    return DCOSAcsAuth(token)
+
+
+def _auth_for(url, auth_token, dcos_url, cosmos_url):
+    """Returns the auth to use for a request to `url`. Only requests to the
+    DC/OS cluster are sent with DC/OS auth.
+
+    :param url: request URL
+    :type url: str
+    :param auth_token: value of `core.dcos_acs_token`
+    :type auth_token: str | None
+    :param dcos_url: value of `core.dcos_url`
+    :type dcos_url: str | None
+    :param cosmos_url: value of `package.cosmos_url`
+    :type cosmos_url: str | None
+    :rtype: DCOSAcsAuth | None
+    """
+
+    if not auth_token:
+        return None
+
+    parsed_url = urlparse(url)
+    if _is_cluster_netloc(parsed_url.scheme, parsed_url.netloc,
+                          dcos_url, cosmos_url):
+        return _acs_auth(auth_token)
+    return None
+
+
+def _login_again(response, auth_token, prompt_login, dcos_url):
+    """Handles a 401 response: asks the user for their credentials if
+    `core.prompt_login` is set, and otherwise raises.
+
+    :param response: the 401 response
+    :type response: Response
+    :param auth_token: value of `core.dcos_acs_token`
+    :type auth_token: str | None
+    :param prompt_login: value of `core.prompt_login`
+    :type prompt_login: bool | None
+    :param dcos_url: value of `core.dcos_url`
+    :type dcos_url: str | None
+    :rtype: None
+    """
+
+    if prompt_login:
+        # I don't like having imports that aren't at the top level, but
+        # this is to resolve a circular import issue between dcos.http and
+        # dcos.auth
+        from dcos.auth import header_challenge_auth
+
+        header_challenge_auth(urlparse(dcos_url).geturl())
+    elif auth_token is not None:
+        msg = ("Your core.dcos_acs_token is invalid. "
+               "Please run: `dcos auth login`")
+        raise DCOSAuthenticationException(msg)
+    else:
+        raise DCOSAuthenticationException(response)
+
+
 def request(method,
             url,
             is_success=_default_is_success,
@@ -164,24 +383,10 @@ def request(method,
 
     auth_token = config.get_config_val("core.dcos_acs_token", toml_config)
     prompt_login = config.get_config_val("core.prompt_login", toml_config)
-    dcos_url = urlparse(config.get_config_val("core.dcos_url", toml_config))
-    cosmos_url = urlparse(
-        config.get_config_val("package.cosmos_url", toml_config))
-    parsed_url = urlparse(url)
+    dcos_url = config.get_config_val("core.dcos_url", toml_config)
+    cosmos_url = config.get_config_val("package.cosmos_url", toml_config)
 
-    # only request with DC/OS Auth if request is to DC/OS cluster
-    # request should match scheme + netloc
-    def _request_match(expected_url, actual_url):
-        return expected_url.scheme == actual_url.scheme and \
-                    expected_url.netloc == actual_url.netloc
-
-    request_to_cluster = _request_match(dcos_url, parsed_url) or \
-        _request_match(cosmos_url, parsed_url)
-
-    if auth_token and request_to_cluster:
-        auth = DCOSAcsAuth(auth_token)
-    else:
-        auth = None
+    auth = _auth_for(url, auth_token, dcos_url, cosmos_url)
 
     response = _request(method, url, is_success, timeout,
                         auth=auth, verify=verify, toml_config=toml_config,
@@ -190,26 +395,13 @@ def request(method,
     if is_success(response.status_code):
         return response
     elif response.status_code == 401:
-        if prompt_login:
-            # I don't like having imports that aren't at the top level, but
-            # this is to resolve a circular import issue between dcos.http and
-            # dcos.auth
-            from dcos.auth import header_challenge_auth
-
-            header_challenge_auth(dcos_url.geturl())
-            # if header_challenge_auth succeeded, then we auth-ed correctly and
-            # thus can safely recursively call ourselves and not have to worry
-            # about an infinite loop
-            return request(method=method, url=url,
-                           is_success=is_success, timeout=timeout,
-                           verify=verify, **kwargs)
-        else:
-            if auth_token is not None:
-                msg = ("Your core.dcos_acs_token is invalid. "
-                       "Please run: `dcos auth login`")
-                raise DCOSAuthenticationException(msg)
-            else:
-                raise DCOSAuthenticationException(response)
+        _login_again(response, auth_token, prompt_login, dcos_url)
+        # if the login succeeded, then we auth-ed correctly and thus can
+        # safely recursively call ourselves and not have to worry about an
+        # infinite loop
+        return request(method=method, url=url,
+                       is_success=is_success, timeout=timeout,
+                       verify=verify, **kwargs)
     elif response.status_code == 422:
         raise DCOSUnprocessableException(response)
     elif response.status_code == 403:
@@ -0,0 +1,531 @@
+"""
+Provides an opt-in on-disk cache for the large, read-mostly JSON documents
+the CLI fetches from the cluster, such as the Mesos master's state.json and
+Marathon's /v2/apps.
+
+The cache is enabled by setting `core.cache_ttl` to a number of seconds.
+Within that time a cached response is returned without contacting the
+server. Once it is older, the request is revalidated with the response's
+ETag and Last-Modified headers, so that a server which supports them only
+has to answer 304 Not Modified. The cache lives in the "cache"
+subdirectory of the cluster's config directory and the least recently used
+responses are evicted once it grows past `core.cache_max_size` megabytes.
+
+`get()` can be used wherever `http.get()` is used for such documents; it
+falls back to `http.get()` when the cache is disabled.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from six.moves import urllib
+
+from dcos import config, http, util
+
+logger = util.get_logger(__name__)
+
+DEFAULT_MAX_SIZE = 64
+"""Default maximum size of the cache, in megabytes"""
+
+CACHE_CHUNK_SIZE = 64 * 1024
+"""Size of the chunks in which responses are written to and read from
+disk"""
+
+_stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get(url, params=None, **kwargs):
+    """Sends a GET request, serving the response from the on-disk cache
+    when `core.cache_ttl` is set. Only use it for idempotent requests
+    whose response is a JSON document.
+
+    :param url: URL for the new Request object
+    :type url: str
+    :param params: GET parameters
+    :type params: dict | None
+    :param kwargs: Additional arguments to requests.request
+                   (see py:func:`http.request`)
+    :type kwargs: dict
+    :returns: the response; cached responses only support `status_code`,
+              `url`, `headers`, `content`, `text`, `json()`,
+              `iter_content()` and `close()`
+    :rtype: Response | CachedResponse
+    """
+
+    cache = get_cache(kwargs.get('toml_config'))
+    if cache is None:
+        return http.get(url, params=params, **kwargs)
+    return cache.get(url, params, **kwargs)
+
+
+def invalidate(urls, toml_config=None):
+    """Removes the stored responses to GET requests of `urls`, whatever
+    their parameters, e.g. once a request changed the documents.
+
+    :param urls: URLs of the documents, without parameters
+    :type urls: [str]
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :rtype: None
+    """
+
+    cache = get_cache(toml_config)
+    if cache is not None:
+        cache.invalidate(urls)
+
+
+def get_cache(toml_config=None):
+    """Returns the cache of the attached cluster.
+
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: the cache, or None if it is disabled or no cluster is
+              attached
+    :rtype: ResponseCache | None
+    """
+
+    if toml_config is None:
+        toml_config = config.get_config()
+
+    ttl = _int_config_val('core.cache_ttl', toml_config, 0)
+    if ttl <= 0:
+        return None
+
+    if config.uses_deprecated_config():
+        config_dir = os.path.dirname(config.get_global_config_path())
+    else:
+        config_dir = config.get_attached_cluster_path()
+    if config_dir is None:
+        return None
+
+    max_size = _int_config_val(
+        'core.cache_max_size', toml_config, DEFAULT_MAX_SIZE)
+    return ResponseCache(os.path.join(config_dir, 'cache'),
+                         ttl,
+                         max(max_size, 1) * 1024 * 1024)
+
+
+def cache_stats():
+    """Returns how many cached responses were used without contacting the
+    server, how many were revalidated with a 304 and how many were
+    fetched again.
+
+    :returns: dict with the `hits`, `revalidated` and `misses` counts
+    :rtype: dict
+    """
+
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(name):
+    """
+    :param name: name of the counter to increment
+    :type name: str
+    :rtype: None
+    """
+
+    with _stats_lock:
+        _stats[name] += 1
+
+
+@atexit.register
+def _log_cache_stats():
+    """Log the cache hit rate when the process exits."""
+
+    stats = cache_stats()
+    total = sum(stats.values())
+    if total:
+        logger.info('HTTP cache stats: %r, hit rate %.0f%%',
+                    stats,
+                    100.0 * (stats['hits'] + stats['revalidated']) / total)
+
+
+def _int_config_val(name, toml_config, default):
+    """
+    :param name: name of the config property
+    :type name: str
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :param default: value to use if the property is unset or invalid
+    :type default: int
+    :returns: the integer value of the property
+    :rtype: int
+    """
+
+    value = config.get_config_val(name, toml_config)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        logger.warning('Ignoring invalid value for %s: %r', name, value)
+        return default
+
+
+class ResponseCache(object):
+    """Stores responses in `directory`, one pair of files per URL: the
+    body, and its metadata as JSON.
+
+    :param directory: directory in which to store the responses
+    :type directory: str
+    :param ttl: number of seconds during which a stored response is used
+                without revalidating it
+    :type ttl: int
+    :param max_size: maximum total size of the stored bodies, in bytes
+    :type max_size: int
+    """
+
+    def __init__(self, directory, ttl, max_size):
+        self._directory = directory
+        self._ttl = ttl
+        self._max_size = max_size
+
+    def get(self, url, params=None, **kwargs):
+        """Sends a GET request unless a fresh response is stored for it.
+
+        :param url: URL for the new Request object
+        :type url: str
+        :param params: GET parameters
+        :type params: dict | None
+        :param kwargs: Additional arguments to requests.request
+                       (see py:func:`http.request`)
+        :type kwargs: dict
+        :returns: the response
+        :rtype: Response | CachedResponse
+        """
+
+        key = _cache_key(url, params)
+        meta = self._read_meta(key)
+        if meta is not None and time.time() - meta['stored_at'] < self._ttl:
+            _count('hits')
+            return self._cached_response(key, meta)
+
+        headers = dict(kwargs.pop('headers', None) or
+                       {'Accept': 'application/json'})
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        is_success = kwargs.pop('is_success', http._default_is_success)
+        kwargs.pop('stream', None)
+        response = http.get(
+            url,
+            params=params,
+            headers=headers,
+            stream=True,
+            is_success=lambda status: status == 304 or is_success(status),
+            **kwargs)
+
+        if response.status_code == 304 and meta is not None:
+            response.close()
+            _count('revalidated')
+            meta['stored_at'] = time.time()
+            self._write_meta(key, meta)
+            return self._cached_response(key, meta)
+
+        _count('misses')
+        if response.status_code != 200:
+            return response
+
+        try:
+            meta = self._store(key, response)
+        finally:
+            response.close()
+        self._evict(keep=key)
+        return self._cached_response(key, meta)
+
+    def invalidate(self, urls):
+        """Removes the stored responses to GET requests of `urls`, whatever
+        their parameters.
+
+        :param urls: URLs of the documents, without parameters
+        :type urls: [str]
+        :rtype: None
+        """
+
+        urls = set(urls)
+        for name in _listdir(self._directory):
+            key, suffix = os.path.splitext(name)
+            if suffix != '.json':
+                continue
+            meta = self._read_meta(key)
+            if meta is not None and \
+                    meta.get('url', '').partition('?')[0] in urls:
+                _remove(self._path(key, '.json'))
+                _remove(self._path(key, '.body'))
+
+    def clear(self):
+        """Removes all the stored responses.
+
+        :rtype: None
+        """
+
+        for name in _listdir(self._directory):
+            _remove(os.path.join(self._directory, name))
+
+    def _path(self, key, suffix):
+        """
+        :param key: cache key of the response
+        :type key: str
+        :param suffix: '.body' or '.json'
+        :type suffix: str
+        :returns: path of the file
+        :rtype: str
+        """
+
+        return os.path.join(self._directory, key + suffix)
+
+    def _read_meta(self, key):
+        """
+        :param key: cache key of the response
+        :type key: str
+        :returns: the metadata of the stored response, or None if there is
+                  none
+        :rtype: dict | None
+        """
+
+        try:
+            with open(self._path(key, '.json')) as meta_file:
+                meta = json.load(meta_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if not os.path.exists(self._path(key, '.body')):
+            return None
+        return meta
+
+    def _write_meta(self, key, meta):
+        """
+        :param key: cache key of the response
+        :type key: str
+        :param meta: metadata of the stored response
+        :type meta: dict
+        :rtype: None
+        """
+
+        self._write_atomically(
+            self._path(key, '.json'),
+            [json.dumps(meta).encode('utf-8')])
+
+    def _store(self, key, response):
+        """Writes the body of `response` to disk chunk by chunk.
+
+        :param key: cache key of the response
+        :type key: str
+        :param response: response to store
+        :type response: Response
+        :returns: the metadata of the stored response
+        :rtype: dict
+        """
+
+        self._write_atomically(
+            self._path(key, '.body'),
+            response.iter_content(CACHE_CHUNK_SIZE))
+
+        meta = {
+            'url': response.url,
+            'stored_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_type': response.headers.get('Content-Type'),
+        }
+        self._write_meta(key, meta)
+        return meta
+
+    def _write_atomically(self, path, chunks):
+        """Writes `chunks` to a temporary file which then replaces `path`,
+        so that concurrent CLI processes never read a partial file. The
+        file is only readable by the user, like the config file.
+
+        :param path: path of the file
+        :type path: str
+        :param chunks: content of the file
+        :type chunks: iterable of bytes
+        :rtype: None
+        """
+
+        util.ensure_dir_exists(self._directory)
+        fd, temp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            _remove(temp_path)
+            raise
+
+    def _cached_response(self, key, meta):
+        """
+        :param key: cache key of the response
+        :type key: str
+        :param meta: metadata of the stored response
+        :type meta: dict
+        :returns: the stored response
+        :rtype: CachedResponse
+        """
+
+        path = self._path(key, '.body')
+        try:
+            # The modification time of the body orders the eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return CachedResponse(path, meta)
+
+    def _evict(self, keep):
+        """Removes the least recently used responses until the stored
+        bodies fit in `max_size`.
+
+        :param keep: cache key of a response which must not be removed
+        :type keep: str
+        :rtype: None
+        """
+
+        bodies = []
+        total = 0
+        for name in _listdir(self._directory):
+            if not name.endswith('.body'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self._directory, name))
+            except OSError:
+                continue
+            bodies.append((stat.st_mtime, stat.st_size, name[:-len('.body')]))
+            total += stat.st_size
+
+        for _, size, key in sorted(bodies):
+            if total <= self._max_size:
+                break
+            if key == keep:
+                continue
+            logger.info('Evicting cached response: %r', key)
+            _remove(self._path(key, '.json'))
+            _remove(self._path(key, '.body'))
+            total -= size
+
+
+class CachedResponse(object):
+    """A response read back from the cache. It implements the parts of
+    `requests.Response` that the CLI uses for JSON documents.
+
+    :param path: path of the stored body
+    :type path: str
+    :param meta: metadata of the stored response
+    :type meta: dict
+    """
+
+    status_code = 200
+
+    def __init__(self, path, meta):
+        self._path = path
+        self._content = None
+        self.url = meta.get('url')
+        self.headers = {}
+        if meta.get('content_type'):
+            self.headers['Content-Type'] = meta['content_type']
+
+    @property
+    def content(self):
+        """
+        :returns: the body of the response
+        :rtype: bytes
+        """
+
+        if self._content is None:
+            with open(self._path, 'rb') as body:
+                self._content = body.read()
+        return self._content
+
+    @property
+    def text(self):
+        """
+        :returns: the body of the response
+        :rtype: str
+        """
+
+        return self.content.decode('utf-8')
+
+    def json(self, **kwargs):
+        """
+        :param kwargs: arguments to `json.loads`
+        :type kwargs: dict
+        :returns: the decoded body of the response
+        :rtype: dict | list
+        """
+
+        return json.loads(self.text, **kwargs)
+
+    def iter_content(self, chunk_size=CACHE_CHUNK_SIZE):
+        """Reads the body of the response from disk chunk by chunk.
+
+        :param chunk_size: size of the chunks
+        :type chunk_size: int
+        :returns: the body of the response
+        :rtype: generator of bytes
+        """
+
+        if self._content is not None:
+            yield self._content
+            return
+
+        with open(self._path, 'rb') as body:
+            for chunk in iter(lambda: body.read(chunk_size), b''):
+                yield chunk
+
+    def close(self):
+        """Nothing to release; provided for `contextlib.closing`."""
+
+        self._content = None
+
+
+def _cache_key(url, params):
+    """
+    :param url: request URL
+    :type url: str
+    :param params: GET parameters
+    :type params: dict | None
+    :returns: name under which the response to the request is stored
+    :rtype: str
+    """
+
+    if params:
+        url += '?' + urllib.parse.urlencode(sorted(params.items()))
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def _listdir(directory):
+    """
+    :param directory: path to the directory
+    :type directory: str
+    :returns: the names of the files in `directory`, or an empty list if it
+              doesn't exist
+    :rtype: [str]
+    """
+
+    try:
+        return os.listdir(directory)
+    except OSError:
+        return []
+
+
+def _remove(path):
+    """Removes a file, ignoring errors since another process may have
+    already removed it.
+
+    :param path: path to the file
+    :type path: str
+    :rtype: None
+    """
+
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,374 @@
+"""
+Provides incremental parsing of large JSON documents, such as the
+Mesos master's state.json, which only keeps the parts of the document
+described by a "projection":
+
+    {'frameworks': [{'id': True, 'tasks': [{'id': True}]}]}
+
+A projection is one of:
+
+* True: keep the whole value.
+* a dict: the value is an object; keep only the listed keys, each
+  projected with its own projection.
+* a list with a single projection: the value is an array; project each
+  of its items.
+
+Values which are not kept are skipped without ever holding more than one
+chunk of the document in memory. Values which fit in the current chunk
+are decoded by the C JSON decoder in one step, so the Python-level walk
+only happens for the containers that straddle chunks.
+"""
+
+import codecs
+import json
+import re
+
+from dcos.errors import DCOSException
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_decoder = json.JSONDecoder()
+
+
+def load(chunks, projection=True, encoding='utf-8'):
+    """Parses a JSON document from an iterator of byte chunks, keeping only
+    the parts of it described by `projection`.
+
+    :param chunks: the JSON document, e.g. `Response.iter_content()`
+    :type chunks: iterator of bytes
+    :param projection: the parts of the document to keep
+    :type projection: bool | dict | list
+    :param encoding: encoding of the document
+    :type encoding: str
+    :returns: the projected document
+    :rtype: dict | list | str | int | float | bool | None
+    """
+
+    reader = _Reader(chunks, encoding)
+    value = _project(reader, projection)
+    if reader.peek(eof_ok=True) is not None:
+        raise DCOSException('Invalid JSON document: unexpected trailing data')
+    return value
+
+
+def iter_items(chunks, projection=True, encoding='utf-8'):
+    """Parses a JSON array from an iterator of byte chunks, yielding each
+    of its items, projected with `projection`, as soon as it is parsed.
+
+    :param chunks: the JSON document, e.g. `Response.iter_content()`
+    :type chunks: iterator of bytes
+    :param projection: the parts of each item to keep
+    :type projection: bool | dict | list
+    :param encoding: encoding of the document
+    :type encoding: str
+    :returns: the projected items
+    :rtype: generator
+    """
+
+    reader = _Reader(chunks, encoding)
+    for item in _iter_array(reader, projection):
+        yield item
+
+
+def iter_field_items(chunks, key, projection=True, encoding='utf-8'):
+    """Parses the array under `key` in a JSON object from an iterator of
+    byte chunks, such as Marathon's `{"tasks": [...]}`, yielding each of
+    its items, projected with `projection`, as soon as it is parsed.  The
+    fields before `key` are skipped, and nothing is read after the array.
+    Nothing is yielded if the object has no such field.
+
+    :param chunks: the JSON document, e.g. `Response.iter_content()`
+    :type chunks: iterator of bytes
+    :param key: the field of the array
+    :type key: str
+    :param projection: the parts of each item to keep
+    :type projection: bool | dict | list
+    :param encoding: encoding of the document
+    :type encoding: str
+    :returns: the projected items
+    :rtype: generator
+    """
+
+    reader = _Reader(chunks, encoding)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        if reader.decode() == key:
+            reader.expect(':')
+            break
+        reader.expect(':')
+        _project(reader, None)
+        if reader.next_char() == '}':
+            return
+        reader.back()
+        reader.expect(',')
+
+    for item in _iter_array(reader, projection):
+        yield item
+
+
+def _iter_array(reader, projection):
+    """Parses the next value from `reader`, which must be an array, yielding
+    each of its items, projected with `projection`.
+
+    :param reader: reader positioned before a JSON array
+    :type reader: _Reader
+    :param projection: the parts of each item to keep
+    :type projection: bool | dict | list
+    :returns: the projected items
+    :rtype: generator
+    """
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.expect(']')
+        return
+
+    while True:
+        yield _project(reader, projection)
+        if reader.next_char() == ']':
+            break
+        reader.back()
+        reader.expect(',')
+
+
+def select(value, projection):
+    """Applies `projection` to an already decoded JSON value.
+
+    :param value: decoded JSON value
+    :type value: dict | list | str | int | float | bool | None
+    :param projection: the parts of the value to keep
+    :type projection: bool | dict | list
+    :returns: the projected value
+    :rtype: dict | list | str | int | float | bool | None
+    """
+
+    if isinstance(projection, dict) and isinstance(value, dict):
+        return {key: select(value[key], sub_projection)
+                for key, sub_projection in projection.items()
+                if key in value}
+    elif isinstance(projection, list) and isinstance(value, list):
+        return [select(item, projection[0]) for item in value]
+    else:
+        return value
+
+
+def _project(reader, projection):
+    """Parses the next value from `reader`, applying `projection` to it.
+    A `projection` of None skips the value.
+
+    :param reader: reader positioned before a JSON value
+    :type reader: _Reader
+    :param projection: the parts of the value to keep
+    :type projection: bool | dict | list | None
+    :returns: the projected value
+    :rtype: dict | list | str | int | float | bool | None
+    """
+
+    if projection is True:
+        return reader.decode()
+
+    complete, value = reader.try_decode()
+    if complete:
+        return None if projection is None else select(value, projection)
+
+    char = reader.peek()
+    if char == '{':
+        fields = projection if isinstance(projection, dict) else {}
+        result = {}
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.expect('}')
+            return result
+        while True:
+            key = reader.decode()
+            reader.expect(':')
+            value = _project(reader, fields.get(key))
+            if key in fields:
+                result[key] = value
+            if reader.next_char() == '}':
+                break
+            reader.back()
+            reader.expect(',')
+        return None if projection is None else result
+
+    elif char == '[':
+        items = projection[0] if isinstance(projection, list) else None
+        result = []
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.expect(']')
+            return result
+        while True:
+            value = _project(reader, items)
+            if projection is not None:
+                result.append(value)
+            if reader.next_char() == ']':
+                break
+            reader.back()
+            reader.expect(',')
+        return None if projection is None else result
+
+    else:
+        value = reader.decode()
+        return None if projection is None else value
+
+
+class _Reader(object):
+    """Buffers a stream of byte chunks as text, dropping the text that was
+    already consumed whenever a new chunk is read.
+
+    :param chunks: byte chunks
+    :type chunks: iterator of bytes
+    :param encoding: encoding of the chunks
+    :type encoding: str
+    """
+
+    def __init__(self, chunks, encoding):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder(encoding)()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def peek(self, eof_ok=False):
+        """Skips whitespace and returns the next character without
+        consuming it.
+
+        :param eof_ok: whether to return None at the end of the document
+                       instead of failing
+        :type eof_ok: bool
+        :returns: the next character
+        :rtype: str | None
+        """
+
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                if eof_ok:
+                    return None
+                raise DCOSException(
+                    'Invalid JSON document: unexpected end of document')
+
+    def next_char(self):
+        """Skips whitespace and consumes the next character.
+
+        :returns: the next character
+        :rtype: str
+        """
+
+        char = self.peek()
+        self._pos += 1
+        return char
+
+    def back(self):
+        """Un-consumes the character returned by `next_char()`."""
+
+        self._pos -= 1
+
+    def expect(self, expected):
+        """Consumes the next character, which must be `expected`.
+
+        :param expected: expected character
+        :type expected: str
+        """
+
+        char = self.next_char()
+        if char != expected:
+            raise DCOSException(
+                'Invalid JSON document: expected {!r} but found {!r}'.format(
+                    expected, char))
+
+    def try_decode(self):
+        """Decodes the next value if it is entirely in the buffer.
+
+        :returns: whether the value was decoded, and the value
+        :rtype: (bool, object)
+        """
+
+        char = self.peek()
+        try:
+            value, end = _decoder.raw_decode(self._buffer, self._pos)
+        except ValueError:
+            return False, None
+
+        # A number at the end of the buffer may continue in the next chunk,
+        # e.g. "1" followed by ".5" or "1e" followed by "9"
+        if not self._eof and char not in '{["' and \
+                (end == len(self._buffer) or self._buffer[end] in '.eE+-'):
+            return False, None
+
+        self._pos = end
+        return True, value
+
+    def decode(self):
+        """Decodes the next value, reading as many chunks as needed.
+
+        :returns: the value
+        :rtype: object
+        """
+
+        while True:
+            complete, value = self.try_decode()
+            if complete:
+                return value
+            if not self._grow():
+                # At the end of the document, let the decoder report the
+                # actual error.
+                try:
+                    value, self._pos = _decoder.raw_decode(
+                        self._buffer, self._pos)
+                except ValueError as e:
+                    raise DCOSException(
+                        'Invalid JSON document: {}'.format(e))
+                return value
+
+    def _grow(self):
+        """Reads chunks until the unconsumed part of the buffer doubles in
+        size, so that retrying a decode is amortized linear.
+
+        :returns: False if no more data could be read
+        :rtype: bool
+        """
+
+        target = 2 * (len(self._buffer) - self._pos)
+        read = False
+        while self._read():
+            read = True
+            if len(self._buffer) - self._pos >= target:
+                break
+        return read
+
+    def _read(self):
+        """Appends the next non-empty chunk to the buffer.
+
+        :returns: False at the end of the document
+        :rtype: bool
+        """
+
+        if self._eof:
+            return False
+
+        for chunk in self._chunks:
+            text = self._text_decoder.decode(chunk)
+            if text:
+                self._append(text)
+                return True
+
+        self._eof = True
+        text = self._text_decoder.decode(b'', final=True)
+        self._append(text)
+        return bool(text)
+
+    def _append(self, text):
+        """
+        :param text: text to append to the unconsumed part of the buffer
+        :type text: str
+        """
+
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
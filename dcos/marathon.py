@@ -1,12 +1,136 @@
+import collections
+import contextlib
+import itertools
 import json
+import time
 
 from six.moves import urllib
 
-from dcos import config, http, rpcclient, util
-from dcos.errors import DCOSException, DCOSHTTPException
+from dcos import config, http, httpcache, jsonstream, rpcclient, sse, util
+from dcos.errors import (DCOSConnectionError, DCOSException,
+                         DCOSHTTPException)
 
 logger = util.get_logger(__name__)
 
+DEPLOYMENT_EVENT_TYPES = ['deployment_info',
+                          'deployment_step_success',
+                          'deployment_step_failure',
+                          'deployment_success',
+                          'deployment_failed']
+"""Types of the Marathon events about the progress of deployments"""
+
+EVENT_READ_TIMEOUT = 30
+"""Number of seconds to wait for an event before the connection to the event
+stream is considered lost"""
+
+READ_SIZE = 64 * 1024
+"""Number of bytes read from the connection at once when a listing is
+parsed as it is received"""
+
+BULK_CONCURRENCY = 8
+"""Maximum number of requests that a bulk operation sends to Marathon at
+once"""
+
+BULK_RETRIES = 2
+"""Number of times a bulk operation retries the request for an item when
+Marathon is unreachable or fails with a server error"""
+
+CACHED_PATHS = ['v2/apps', 'v2/deployments', 'v2/groups']
+"""Paths of the listings read through the HTTP cache, which requests that
+change apps, groups or pods invalidate"""
+
+BULK_RETRY_DELAY = 1.0
+"""Number of seconds to wait before the first retry of an item; the delay
+doubles on each further retry"""
+
+BulkResult = collections.namedtuple(
+    'BulkResult', ['id', 'deployment_id', 'error'])
+"""The outcome of a bulk operation for one item: its ID, the ID of the
+deployment it started, if any, and the DCOSException it failed with, or
+None"""
+
+Change = collections.namedtuple('Change', ['path', 'old', 'new'])
+"""A difference between two definitions: the path of the field, as a tuple
+of keys and list indexes, and its old and new values, either of which may
+be ABSENT"""
+
+
+class _Absent(object):
+    def __repr__(self):
+        return 'ABSENT'
+
+
+ABSENT = _Absent()
+"""The value of a field missing from a definition"""
+
+READ_ONLY_FIELDS = {
+    'apps': ('deployments', 'lastTaskFailure', 'readinessCheckResults',
+             'taskStats', 'tasks', 'tasksHealthy', 'tasksRunning',
+             'tasksStaged', 'tasksUnhealthy', 'versionInfo'),
+    'groups': ('versionInfo',),
+    'pods': ('version',),
+}
+"""Fields of the definitions returned by Marathon that it ignores in
+updates, per resource type"""
+
+DEFAULT_VALUES = {
+    'apps': {
+        ('backoffFactor',): 1.15,
+        ('backoffSeconds',): 1,
+        ('container', 'docker', 'forcePullImage'): False,
+        ('container', 'docker', 'portMappings', '*', 'hostPort'): 0,
+        ('container', 'docker', 'portMappings', '*', 'protocol'): 'tcp',
+        ('container', 'docker', 'privileged'): False,
+        ('container', 'portMappings', '*', 'hostPort'): 0,
+        ('container', 'portMappings', '*', 'protocol'): 'tcp',
+        ('disk',): 0,
+        ('healthChecks', '*', 'delaySeconds'): 15,
+        ('healthChecks', '*', 'gracePeriodSeconds'): 300,
+        ('healthChecks', '*', 'ignoreHttp1xx'): False,
+        ('healthChecks', '*', 'intervalSeconds'): 60,
+        ('healthChecks', '*', 'maxConsecutiveFailures'): 3,
+        ('healthChecks', '*', 'portIndex'): 0,
+        ('healthChecks', '*', 'timeoutSeconds'): 20,
+        ('instances',): 1,
+        ('maxLaunchDelaySeconds',): 3600,
+        ('portDefinitions', '*', 'protocol'): 'tcp',
+        ('requirePorts',): False,
+        ('upgradeStrategy', 'maximumOverCapacity'): 1,
+        ('upgradeStrategy', 'minimumHealthCapacity'): 1,
+    },
+    'pods': {
+        ('containers', '*', 'resources', 'disk'): 0,
+        ('containers', '*', 'resources', 'gpus'): 0,
+        ('executorResources', 'cpus'): 0.1,
+        ('executorResources', 'disk'): 10,
+        ('executorResources', 'mem'): 32,
+        ('networks',): [{'mode': 'host'}],
+        ('scaling', 'instances'): 1,
+        ('scaling', 'kind'): 'fixed',
+        ('scheduling', 'backoff', 'backoff'): 1,
+        ('scheduling', 'backoff', 'backoffFactor'): 1.15,
+        ('scheduling', 'backoff', 'maxLaunchDelay'): 3600,
+        ('scheduling', 'killSelection'): 'YOUNGEST_FIRST',
+        ('scheduling', 'unreachableStrategy', 'expungeAfterSeconds'): 0,
+        ('scheduling', 'unreachableStrategy', 'inactiveAfterSeconds'): 0,
+        ('scheduling', 'upgrade', 'maximumOverCapacity'): 1,
+        ('scheduling', 'upgrade', 'minimumHealthCapacity'): 1,
+    },
+}
+"""Marathon's defaults for the fields it fills in when they are left out
+of a definition, per resource type.  Paths use '*' for list indexes."""
+
+ASSIGNED_FIELDS = {
+    'apps': (
+        ('container', 'docker', 'portMappings', '*', 'servicePort'),
+        ('container', 'portMappings', '*', 'servicePort'),
+        ('portDefinitions', '*', 'port'),
+    ),
+}
+"""Fields Marathon assigns a value to when they are left out of a
+definition, per resource type, and keeps in updates which leave them
+out"""
+
 
 def create_client(toml_config=None):
     """Creates a Marathon client with the supplied configuration.
@@ -56,6 +180,28 @@ class Client(object):
     def __init__(self, rpc_client):
         self._rpc = rpc_client
 
+    def _write_req(self, method_fn, path, *args, **kwargs):
+        """Make an HTTP request that may change apps, groups or pods, and
+        remove the cached listings it may make stale.
+
+        :param method_fn: function to call that invokes a specific HTTP method
+        :type method_fn: function
+        :param path: the endpoint path to append to the base URL
+        :type path: str
+        :param args: additional args to pass to `method_fn`
+        :type args: [object]
+        :param kwargs: kwargs to pass to `method_fn`
+        :type kwargs: dict
+        :returns: `method_fn` return value
+        :rtype: requests.Response
+        """
+
+        try:
+            return self._rpc.http_req(method_fn, path, *args, **kwargs)
+        finally:
+            httpcache.invalidate(
+                [self._rpc.url(cached) for cached in CACHED_PATHS])
+
     def get_about(self):
         """Returns info about Marathon instance
 
@@ -100,7 +246,7 @@ class Client(object):
         :rtype: list of dict
         """
 
-        response = self._rpc.http_req(http.get, 'v2/groups')
+        response = self._rpc.http_req(httpcache.get, 'v2/groups')
         return response.json().get('groups')
 
     def get_group(self, group_id, version=None):
@@ -145,23 +291,41 @@ class Client(object):
 
         path = 'v2/apps{}/versions'.format(app_id)
 
-        response = self._rpc.http_req(http.get, path)
-
-        if max_count is None:
-            return response.json().get('versions')
-        else:
-            return response.json().get('versions')[:max_count]
+        # Marathon can't limit the versions it returns, so the response is
+        # parsed as it is received and the connection closed once
+        # `max_count` versions are read
+        response = self._rpc.http_req(http.get, path, stream=True)
+        versions = _iter_json_array(response, 'versions')
+        try:
+            return list(itertools.islice(versions, max_count))
+        finally:
+            versions.close()
 
-    def get_apps(self):
+    def get_apps(self, embed=None):
         """Get a list of known applications.
 
+        :param embed: the `embed` values to request, e.g. `apps.counts`,
+                      instead of Marathon's default ones
+        :type embed: [str] | None
         :returns: list of known applications
         :rtype: [dict]
         """
 
-        response = self._rpc.http_req(http.get, 'v2/apps')
+        params = None if embed is None else {'embed': embed}
+        response = self._rpc.http_req(httpcache.get, 'v2/apps', params=params)
         return response.json().get('apps')
 
+    def iter_apps(self):
+        """Returns the known applications as they are received, without
+        reading the whole list first.
+
+        :returns: the applications
+        :rtype: generator of dict
+        """
+
+        response = self._rpc.http_req(http.get, 'v2/apps', stream=True)
+        return _iter_json_array(response, 'apps')
+
     def get_apps_for_framework(self, framework_name):
         """ Return all apps running the given framework.
 
@@ -189,7 +353,7 @@ class Client(object):
         else:
             app_json = app_resource
 
-        response = self._rpc.http_req(http.post, 'v2/apps', json=app_json)
+        response = self._write_req(http.post, 'v2/apps', json=app_json)
         return response.json().get('deployments', {})[0].get('id')
 
     def _update_req(
@@ -211,7 +375,7 @@ class Client(object):
         path_template = 'v2/{}/{{}}'.format(resource_type)
         path = self._marathon_id_path_format(path_template, resource_id)
         params = self._force_params(force)
-        return self._rpc.http_req(
+        return self._write_req(
             http.put, path, params=params, json=resource_json)
 
     def _update(self, resource_type, resource_id, resource_json, force=False):
@@ -290,10 +454,10 @@ class Client(object):
         params = self._force_params(force)
         path = 'v2/apps{}'.format(app_id)
 
-        response = self._rpc.http_req(http.put,
-                                      path,
-                                      params=params,
-                                      json={'instances': int(instances)})
+        response = self._write_req(http.put,
+                                   path,
+                                   params=params,
+                                   json={'instances': int(instances)})
 
         deployment = response.json().get('deploymentId')
         return deployment
@@ -314,10 +478,10 @@ class Client(object):
         params = self._force_params(force)
         path = 'v2/groups{}'.format(group_id)
 
-        response = self._rpc.http_req(http.put,
-                                      path,
-                                      params=params,
-                                      json={'scaleBy': scale_factor})
+        response = self._write_req(http.put,
+                                   path,
+                                   params=params,
+                                   json={'scaleBy': scale_factor})
 
         deployment = response.json().get('deploymentId')
         return deployment
@@ -342,13 +506,15 @@ class Client(object):
         :type app_id: str
         :param force: whether to override running deployments
         :type force: bool
-        :rtype: None
+        :returns: the resulting deployment ID
+        :rtype: str
         """
 
         app_id = util.normalize_marathon_id_path(app_id)
         params = self._force_params(force)
         path = 'v2/apps{}'.format(app_id)
-        self._rpc.http_req(http.delete, path, params=params)
+        response = self._write_req(http.delete, path, params=params)
+        return response.json().get('deploymentId')
 
     def remove_group(self, group_id, force=False):
         """Completely removes the requested application.
@@ -364,7 +530,7 @@ class Client(object):
         params = self._force_params(force)
         path = 'v2/groups{}'.format(group_id)
 
-        self._rpc.http_req(http.delete, path, params=params)
+        self._write_req(http.delete, path, params=params)
 
     def kill_tasks(self, app_id, scale=None, host=None):
         """Kills the tasks for a given application,
@@ -384,7 +550,7 @@ class Client(object):
         if scale:
             params['scale'] = scale
         path = 'v2/apps{}/tasks'.format(app_id)
-        response = self._rpc.http_req(http.delete, path, params=params)
+        response = self._write_req(http.delete, path, params=params)
         return response.json()
 
     def kill_and_scale_tasks(self, task_ids, scale=None, wipe=None):
@@ -411,10 +577,10 @@ class Client(object):
         if wipe:
             params['wipe'] = wipe
 
-        response = self._rpc.http_req(http.post,
-                                      path,
-                                      params=params,
-                                      json={'ids': task_ids})
+        response = self._write_req(http.post,
+                                   path,
+                                   params=params,
+                                   json={'ids': task_ids})
 
         return response.json()
 
@@ -433,9 +599,130 @@ class Client(object):
         params = self._force_params(force)
         path = 'v2/apps{}/restart'.format(app_id)
 
-        response = self._rpc.http_req(http.post, path, params=params)
+        response = self._write_req(http.post, path, params=params)
         return response.json()
 
+    def get_apps_under(self, group_id):
+        """Returns all the applications in a group and in its subgroups.
+
+        :param group_id: the ID of the group
+        :type group_id: str
+        :returns: the applications, depth first
+        :rtype: [dict]
+        """
+
+        apps = []
+        groups = [self.get_group(group_id)]
+        while groups:
+            group = groups.pop()
+            apps.extend(group.get('apps', []))
+            groups.extend(reversed(group.get('groups', [])))
+        return apps
+
+    def restart_apps(self, app_ids, force=False,
+                     concurrency=BULK_CONCURRENCY, retries=BULK_RETRIES):
+        """Performs a rolling restart of several applications.
+
+        :param app_ids: the ids of the applications to restart
+        :type app_ids: iterable of str
+        :param force: whether to override running deployments
+        :type force: bool
+        :param concurrency: maximum number of requests sent at once
+        :type concurrency: int
+        :param retries: number of retries for each application
+        :type retries: int
+        :returns: the outcome for each application, as it completes
+        :rtype: generator of BulkResult
+        """
+
+        def restart(app_id):
+            return self.restart_app(app_id, force).get('deploymentId')
+
+        return self.bulk(restart, app_ids, concurrency, retries)
+
+    def stop_apps(self, app_ids, force=False,
+                  concurrency=BULK_CONCURRENCY, retries=BULK_RETRIES):
+        """Scales several applications to zero instances.
+
+        :param app_ids: the ids of the applications to stop
+        :type app_ids: iterable of str
+        :param force: whether to override running deployments
+        :type force: bool
+        :param concurrency: maximum number of requests sent at once
+        :type concurrency: int
+        :param retries: number of retries for each application
+        :type retries: int
+        :returns: the outcome for each application, as it completes
+        :rtype: generator of BulkResult
+        """
+
+        return self.bulk(lambda app_id: self.stop_app(app_id, force),
+                         app_ids, concurrency, retries)
+
+    def remove_apps(self, app_ids, force=False,
+                    concurrency=BULK_CONCURRENCY, retries=BULK_RETRIES):
+        """Completely removes several applications.
+
+        :param app_ids: the ids of the applications to remove
+        :type app_ids: iterable of str
+        :param force: whether to override running deployments
+        :type force: bool
+        :param concurrency: maximum number of requests sent at once
+        :type concurrency: int
+        :param retries: number of retries for each application
+        :type retries: int
+        :returns: the outcome for each application, as it completes
+        :rtype: generator of BulkResult
+        """
+
+        return self.bulk(lambda app_id: self.remove_app(app_id, force),
+                         app_ids, concurrency, retries)
+
+    def bulk(self, fn, ids, concurrency=BULK_CONCURRENCY,
+             retries=BULK_RETRIES):
+        """Applies a single-resource operation to several resources in
+        parallel, sending at most `concurrency` requests at once.  An item
+        whose request fails because Marathon is unreachable or returns a
+        server error is retried up to `retries` times; other errors, e.g.
+        a resource locked by a deployment, are reported right away.  A
+        failed item doesn't stop the others.
+
+        :param fn: the operation, which returns a deployment ID or None
+        :type fn: function(str) -> str | None
+        :param ids: the IDs of the resources
+        :type ids: iterable of str
+        :param concurrency: maximum number of requests sent at once
+        :type concurrency: int
+        :param retries: number of retries for each item
+        :type retries: int
+        :returns: the outcome for each item, as it completes
+        :rtype: generator of BulkResult
+        """
+
+        def apply(resource_id):
+            delay = BULK_RETRY_DELAY
+            attempt = 0
+            while True:
+                try:
+                    return fn(resource_id)
+                except DCOSException as e:
+                    if attempt >= retries or not _is_transient(e):
+                        raise
+                    logger.info('Retrying %s in %ss: %s',
+                                resource_id, delay, e)
+                time.sleep(delay)
+                delay *= 2
+                attempt += 1
+
+        results = util.stream(apply, ids,
+                              key=lambda resource_id: None,
+                              key_concurrency=concurrency)
+        for job, resource_id in results:
+            try:
+                yield BulkResult(resource_id, job.result(), None)
+            except DCOSException as e:
+                yield BulkResult(resource_id, None, e)
+
     def get_deployment(self, deployment_id):
         """Returns a deployment.
 
@@ -453,6 +740,59 @@ class Client(object):
 
         return deployment
 
+    def get_deployments_if_modified(self, validators=None):
+        """Returns the list of deployments, unless it hasn't changed since the
+        response the `validators` were returned with.  Marathon is asked with
+        a conditional request, and the list is only transferred again if it
+        changed, or if Marathon doesn't support conditional requests.
+
+        :param validators: validators returned by the previous call
+        :type validators: dict | None
+        :returns: the deployments, or None if they are unchanged, and the
+            validators of the response
+        :rtype: (list of dict | None, dict)
+        """
+
+        headers = {'Accept': 'application/json'}
+        validators = validators or {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        response = self._rpc.http_req(
+            http.get,
+            'v2/deployments',
+            headers=headers,
+            is_success=lambda status: status == 304 or 200 <= status < 300)
+        if response.status_code == 304:
+            return None, validators
+
+        return response.json(), {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+
+    def get_deployment_events(self):
+        """Subscribes to the deployment events of Marathon's event stream.
+        The subscription is made right away, so that no event published
+        after this method returns is missed.
+
+        :returns: the events received by each read from the stream; their
+            data is JSON
+        :rtype: generator of [dcos.sse.Event]
+        """
+
+        response = self._rpc.http_req(
+            http.get,
+            'v2/events',
+            params={'event_type': DEPLOYMENT_EVENT_TYPES},
+            headers={'Accept': 'text/event-stream'},
+            stream=True,
+            # there may be no event for a long while
+            timeout=(http.DEFAULT_TIMEOUT, EVENT_READ_TIMEOUT))
+        return sse.read_events(response)
+
     def get_deployments(self, app_id=None):
         """Returns a list of deployments, optionally limited to an app.
 
@@ -462,7 +802,7 @@ class Client(object):
         :rtype: list of dict
         """
 
-        response = self._rpc.http_req(http.get, 'v2/deployments')
+        response = self._rpc.http_req(httpcache.get, 'v2/deployments')
 
         if app_id is not None:
             app_id = util.normalize_marathon_id_path(app_id)
@@ -492,7 +832,7 @@ class Client(object):
         params = self._force_params(force)
         path = 'v2/deployments/{}'.format(deployment_id)
 
-        response = self._rpc.http_req(http.delete, path, params=params)
+        response = self._write_req(http.delete, path, params=params)
 
         if force:
             return None
@@ -529,18 +869,34 @@ class Client(object):
         :rtype: [dict]
         """
 
-        response = self._rpc.http_req(http.get, 'v2/tasks')
+        return list(self.iter_tasks(app_id))
 
-        if app_id is not None:
-            app_id = util.normalize_marathon_id_path(app_id)
-            tasks = [
-                task for task in response.json()['tasks']
-                if app_id == task['appId']
-            ]
+    def iter_tasks(self, app_id=None):
+        """Returns the tasks, optionally limited to an app, as they are
+        received.  The tasks of an app are fetched from the app's own
+        endpoint, rather than filtered from the tasks of the whole cluster.
+
+        :param app_id: the id of the application
+        :type app_id: str | None
+        :returns: the tasks
+        :rtype: generator of dict
+        """
+
+        if app_id is None:
+            path = 'v2/tasks'
         else:
-            tasks = response.json()['tasks']
+            app_id = util.normalize_marathon_id_path(app_id)
+            path = 'v2/apps{}/tasks'.format(app_id)
+
+        try:
+            response = self._rpc.http_req(http.get, path, stream=True)
+        except DCOSException as e:
+            # an app that doesn't exist has no tasks
+            if app_id is None or _http_status(e) != 404:
+                raise
+            return iter([])
 
-        return tasks
+        return _iter_json_array(response, 'tasks')
 
     def get_task(self, task_id):
         """Returns a task
@@ -576,10 +932,10 @@ class Client(object):
         else:
             params = {'wipe': 'true'}
 
-        response = self._rpc.http_req(http.post,
-                                      'v2/tasks/delete',
-                                      params=params,
-                                      json={'ids': [task_id]})
+        response = self._write_req(http.post,
+                                   'v2/tasks/delete',
+                                   params=params,
+                                   json={'ids': [task_id]})
 
         task = next(
             (task for task in response.json()['tasks']
@@ -603,7 +959,7 @@ class Client(object):
         else:
             group_json = group_resource
 
-        response = self._rpc.http_req(http.post, 'v2/groups', json=group_json)
+        response = self._write_req(http.post, 'v2/groups', json=group_json)
         return response.json().get("deploymentId")
 
     def get_leader(self):
@@ -625,7 +981,7 @@ class Client(object):
         :rtype: dict
         """
 
-        response = self._rpc.http_req(http.post, 'v2/pods', json=pod_json)
+        response = self._write_req(http.post, 'v2/pods', json=pod_json)
         return response.headers.get('Marathon-Deployment-Id')
 
     def remove_pod(self, pod_id, force=False):
@@ -640,7 +996,7 @@ class Client(object):
 
         path = self._marathon_id_path_format('v2/pods/{}', pod_id)
         params = self._force_params(force)
-        self._rpc.http_req(http.delete, path, params=params)
+        self._write_req(http.delete, path, params=params)
 
     def show_pod(self, pod_id):
         """Returns a representation of the requested pod.
@@ -699,7 +1055,7 @@ class Client(object):
         """
 
         path = self._marathon_id_path_format('v2/pods/{}::instances', pod_id)
-        response = self._rpc.http_req(http.delete, path, json=instance_ids)
+        response = self._write_req(http.delete, path, json=instance_ids)
         return self._parse_json(response)
 
     def pod_feature_supported(self):
@@ -805,6 +1161,245 @@ class Client(object):
             raise DCOSException(template.format(response.text))
 
 
+def diff_definitions(resource_type, current, desired):
+    """Compares the definition of an app, group or pod with the one an
+    update would give it, and returns the payload that applies only the
+    changes.
+
+    Marathon returns definitions with all their defaults filled in, while
+    updates usually leave them out.  A missing or null value is therefore
+    the same as an empty list or object, or as Marathon's default for the
+    field (see DEFAULT_VALUES).  Read-only fields are ignored, and so are
+    the fields Marathon assigns (see ASSIGNED_FIELDS) when the update
+    leaves them out.
+
+    For apps and groups, only the top-level fields of `desired` are
+    compared: a field left out of the update is kept as it is.  Marathon
+    replaces each field the update gives as a whole, so the nested fields
+    of those are all compared.  The payload holds the top-level fields
+    that changed.  Pods are
+    replaced as a whole, so a field missing from `desired` that doesn't
+    have its default value is a change too, and the payload is all of
+    `desired`.
+
+    :param resource_type: one of 'apps', 'groups', or 'pods'
+    :type resource_type: str
+    :param current: the current definition
+    :type current: dict
+    :param desired: the update
+    :type desired: dict
+    :returns: the changes, and the payload to send, or None if the update
+              doesn't change anything
+    :rtype: ([Change], dict | None)
+    """
+
+    changes = []
+    _diff(resource_type,
+          (),
+          _normalize_definition(resource_type, current),
+          _normalize_definition(resource_type, desired),
+          changes,
+          merge=resource_type != 'pods')
+
+    if not changes:
+        return changes, None
+    if resource_type == 'pods':
+        return changes, desired
+
+    changed = set(change.path[0] for change in changes)
+    return changes, {key: value for key, value in desired.items()
+                     if key in changed}
+
+
+def _normalize_definition(resource_type, definition):
+    """
+    :param resource_type: one of 'apps', 'groups', or 'pods'
+    :type resource_type: str
+    :param definition: an app, group or pod definition
+    :type definition: dict
+    :returns: a copy of the definition without its read-only fields, with
+              normalized IDs
+    :rtype: dict
+    """
+
+    normalized = {key: value for key, value in definition.items()
+                  if key not in READ_ONLY_FIELDS[resource_type]}
+    if isinstance(normalized.get('id'), str):
+        normalized['id'] = util.normalize_marathon_id_path(normalized['id'])
+
+    if resource_type == 'groups':
+        for key, nested_type in (('apps', 'apps'), ('groups', 'groups')):
+            if isinstance(normalized.get(key), list):
+                normalized[key] = [
+                    _normalize_definition(nested_type, nested)
+                    if isinstance(nested, dict) else nested
+                    for nested in normalized[key]]
+    return normalized
+
+
+def _field_pattern(resource_type, path):
+    """
+    :param resource_type: one of 'apps', 'groups', or 'pods'
+    :type resource_type: str
+    :param path: the path of a field in a definition
+    :type path: tuple
+    :returns: the type of the resource the field belongs to, and the path
+              of the field in it, with '*' for list indexes
+    :rtype: (str, tuple)
+    """
+
+    # the apps and subgroups of a group have their own fields
+    while resource_type == 'groups' and len(path) >= 2 and \
+            path[0] in ('apps', 'groups') and isinstance(path[1], int):
+        resource_type, path = path[0], path[2:]
+
+    pattern = tuple('*' if isinstance(key, int) else key for key in path)
+    return resource_type, pattern
+
+
+def _default_value(resource_type, path):
+    """
+    :param resource_type: one of 'apps', 'groups', or 'pods'
+    :type resource_type: str
+    :param path: the path of a field in a definition
+    :type path: tuple
+    :returns: Marathon's default for the field, or ABSENT
+    :rtype: object
+    """
+
+    resource_type, pattern = _field_pattern(resource_type, path)
+    return DEFAULT_VALUES.get(resource_type, {}).get(pattern, ABSENT)
+
+
+def _is_assigned(resource_type, path):
+    """
+    :param resource_type: one of 'apps', 'groups', or 'pods'
+    :type resource_type: str
+    :param path: the path of a field in a definition
+    :type path: tuple
+    :returns: whether Marathon assigns the field when it is left out
+    :rtype: bool
+    """
+
+    resource_type, pattern = _field_pattern(resource_type, path)
+    return pattern in ASSIGNED_FIELDS.get(resource_type, ())
+
+
+def _diff(resource_type, path, old, new, changes, merge):
+    """Appends the differences between two values to `changes`.  Objects
+    are compared field by field, and lists of the same length item by
+    item.
+
+    :param resource_type: one of 'apps', 'groups', or 'pods'
+    :type resource_type: str
+    :param path: the path of the values
+    :type path: tuple
+    :param old: the old value, or ABSENT
+    :type old: object
+    :param new: the new value, or ABSENT
+    :type new: object
+    :param changes: the changes found so far
+    :type changes: [Change]
+    :param merge: whether only the fields of `new` are compared, if it is
+                  the whole definition
+    :type merge: bool
+    :rtype: None
+    """
+
+    if (new is ABSENT or new is None) and _is_assigned(resource_type, path):
+        return
+
+    default = _default_value(resource_type, path)
+    old_value = default if old is ABSENT or old is None else old
+    new_value = default if new is ABSENT or new is None else new
+
+    if isinstance(old_value, (dict, _Absent)) and \
+            isinstance(new_value, (dict, _Absent)) and \
+            (isinstance(old_value, dict) or isinstance(new_value, dict)):
+        old_fields = old_value if isinstance(old_value, dict) else {}
+        new_fields = new_value if isinstance(new_value, dict) else {}
+        keys = set(new_fields)
+        if not merge or path:
+            keys.update(old_fields)
+        for key in sorted(keys):
+            _diff(resource_type,
+                  path + (key,),
+                  old_fields.get(key, ABSENT),
+                  new_fields.get(key, ABSENT),
+                  changes,
+                  merge)
+    elif isinstance(old_value, list) and isinstance(new_value, list) and \
+            len(old_value) == len(new_value):
+        for index, (old_item, new_item) in enumerate(
+                zip(old_value, new_value)):
+            _diff(resource_type, path + (index,), old_item, new_item,
+                  changes, merge)
+    elif _is_empty(old_value) and _is_empty(new_value):
+        return
+    elif old_value != new_value:
+        changes.append(Change(path, old, new))
+
+
+def _is_empty(value):
+    """
+    :param value: a value of a definition, or ABSENT
+    :type value: object
+    :returns: whether the value is missing, or an empty list or object
+    :rtype: bool
+    """
+
+    return value is ABSENT or value == [] or value == {}
+
+
+def _iter_json_array(response, key):
+    """Parses the array under `key` in the JSON object of a streamed
+    response as it is received, and closes the response once the array is
+    read or the generator is closed.
+
+    :param response: streamed response
+    :type response: requests.Response
+    :param key: the key of the array in the object
+    :type key: str
+    :returns: the items of the array
+    :rtype: generator
+    """
+
+    with contextlib.closing(response):
+        for item in jsonstream.iter_field_items(
+                response.iter_content(chunk_size=READ_SIZE), key):
+            yield item
+
+
+def _http_status(error):
+    """
+    :param error: the error of a request to Marathon
+    :type error: DCOSException
+    :returns: the HTTP status of the response, if the request failed with
+              one
+    :rtype: int | None
+    """
+
+    # RpcClient.http_req raises HTTP errors from the DCOSHTTPException
+    cause = getattr(error, '__cause__', None)
+    if isinstance(cause, DCOSHTTPException):
+        return cause.status()
+    return None
+
+
+def _is_transient(error):
+    """
+    :param error: the error of a request to Marathon
+    :type error: DCOSException
+    :returns: whether the request may succeed if it is sent again
+    :rtype: bool
+    """
+
+    if isinstance(error, DCOSConnectionError):
+        return True
+    status = _http_status(error)
+    return status is not None and status >= 500
+
+
 def get_app_or_pod_id(app_or_pod):
     """Gets the app or pod ID from the given app or pod
 
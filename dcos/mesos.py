@@ -1,20 +1,26 @@
+import asyncio
 import base64
+import bisect
+import collections
+import concurrent.futures
+import contextlib
 import fnmatch
 import itertools
 import json
 import os
+import re
 import signal
 import sys
 import threading
 import time
 import uuid
 
-from functools import partial
-from queue import Queue
+from queue import Empty, Queue
 
 from six.moves import urllib
 
-from dcos import config, http, recordio, util
+from dcos import (asynchttp, config, http, httpcache, jsonstream, recordio,
+                  util)
 
 from dcos.errors import DCOSException, DCOSHTTPException
 
@@ -31,20 +37,103 @@ COMPLETED_TASK_STATES = [
     "TASK_UNKNOWN"
 ]
 
+_TASK_FIELDS = {'id': True, 'name': True, 'state': True,
+                'slave_id': True, 'framework_id': True}
+_FRAMEWORK_TASK_FIELDS = {'id': True, 'active': True, 'user': True,
+                          'tasks': [_TASK_FIELDS],
+                          'completed_tasks': [_TASK_FIELDS]}
+_SERVICE_FIELDS = {'id': True, 'name': True, 'hostname': True,
+                   'active': True, 'resources': True,
+                   'tasks': [{'id': True}]}
 
-def get_master(dcos_client=None):
+TASK_STATE_PROJECTION = {
+    'slaves': [{'id': True, 'hostname': True, 'pid': True}],
+    'frameworks': [_FRAMEWORK_TASK_FIELDS],
+    'completed_frameworks': [_FRAMEWORK_TASK_FIELDS],
+}
+"""The parts of the master's state.json needed to list tasks.  See
+:py:mod:`dcos.jsonstream` for the projection format."""
+
+SERVICE_STATE_PROJECTION = {
+    'frameworks': [_SERVICE_FIELDS],
+    'completed_frameworks': [_SERVICE_FIELDS],
+}
+"""The parts of the master's state.json needed to list services."""
+
+LEADER_STATE_PROJECTION = {
+    'hostname': True, 'id': True, 'pid': True, 'version': True}
+"""The parts of the master's state.json describing the leading master."""
+
+STATE_CHUNK_SIZE = 64 * 1024
+"""Size of the chunks in which a projected state.json is parsed."""
+
+FILE_READ_CONCURRENCY = 4
+"""Maximum number of files/read.json requests in flight for one MesosFile
+read."""
+
+FILE_READ_WORKERS = 16
+"""Number of threads in the pool shared by all multi-chunk MesosFile
+reads."""
+
+FILE_READ_CHUNK_SIZE = 1024 * 1024
+"""Initial number of bytes requested per files/read.json request."""
+
+FILE_READ_MIN_CHUNK_SIZE = 64 * 1024
+FILE_READ_MAX_CHUNK_SIZE = 16 * 1024 * 1024
+"""Bounds of the adaptive files/read.json chunk size."""
+
+FILE_READ_TARGET_DURATION = 1.0
+"""Chunks shrink when a files/read.json request takes longer than this many
+seconds, and grow while requests take less than a quarter of it."""
+
+FILE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+"""Size of the chunks in which files/download responses are written out."""
+
+
+_file_read_executor = None
+_file_read_executor_lock = threading.Lock()
+
+
+def _get_file_read_executor():
+    """Returns the thread pool shared by all multi-chunk MesosFile reads.
+    It is kept apart from :py:func:`dcos.util.get_executor`, since reads
+    are often made from that pool's threads and waiting there for work
+    queued on the same pool could deadlock it.
+
+    :returns: the file read thread pool
+    :rtype: concurrent.futures.ThreadPoolExecutor
+    """
+
+    global _file_read_executor
+    with _file_read_executor_lock:
+        if _file_read_executor is None:
+            _file_read_executor = concurrent.futures.ThreadPoolExecutor(
+                FILE_READ_WORKERS)
+        return _file_read_executor
+
+
+def get_master(dcos_client=None, projection=None, resources=None):
     """Create a Master object using the url stored in the
     'core.mesos_master_url' property if it exists.  Otherwise, we use
     the `core.dcos_url` property
 
     :param dcos_client: DCOSClient
     :type dcos_client: DCOSClient | None
+    :param projection: the parts of state.json to keep, or None to keep
+                       all of it
+    :type projection: dict | None
+    :param resources: only fetch these resources from the master's
+                      narrower endpoints.  See
+                      :py:meth:`DCOSClient.get_master_resources`
+    :type resources: [str] | None
     :returns: master state object
     :rtype: Master
     """
 
     dcos_client = dcos_client or DCOSClient()
-    return Master(dcos_client.get_master_state())
+    if resources is None:
+        return Master(dcos_client.get_master_state(projection))
+    return Master(dcos_client.get_master_resources(resources, projection))
 
 
 class DCOSClient(object):
@@ -107,15 +196,104 @@ class DCOSClient(object):
             return urllib.parse.urljoin(self._dcos_url,
                                         'slave/{}/{}'.format(slave_id, path))
 
-    def get_master_state(self):
-        """Get the Mesos master state json object
+    def get_master_state(self, projection=None):
+        """Get the Mesos master state json object.  If `projection` is
+        given, the response is parsed incrementally and only the parts of
+        it described by `projection` are kept in memory.
 
+        :param projection: the parts of state.json to keep, e.g.
+                           TASK_STATE_PROJECTION, or None to keep all of it
+        :type projection: dict | None
         :returns: Mesos' master state json object
         :rtype: dict
         """
 
-        url = self.master_url('master/state.json')
-        return http.get(url, timeout=self._timeout).json()
+        return self._get_master_json('master/state.json', projection,
+                                     cached=True)
+
+    def get_master_resources(self, resources, projection=None):
+        """Get a subset of the Mesos master state from the master's
+        narrower endpoints, shaped like state.json so it can be used by
+        :py:class:`Master`.  Falls back to state.json if the master doesn't
+        have these endpoints.
+
+        `resources` may contain:
+
+        * 'frameworks': fetched from /frameworks, with their tasks grouped
+          by the master as in state.json
+
+        :param resources: resources to fetch
+        :type resources: [str]
+        :param projection: the parts of state.json to keep, or None to keep
+                           all of it
+        :type projection: dict | None
+        :returns: Mesos' master state json object, limited to `resources`
+        :rtype: dict
+        """
+
+        try:
+            return self._get_master_resources(resources, projection)
+        except DCOSHTTPException as e:
+            if e.response.status_code != 404:
+                raise
+            logger.info('Master endpoint not found, using state.json: %s', e)
+            return self.get_master_state(projection)
+
+    def _get_master_resources(self, resources, projection):
+        """See :py:meth:`get_master_resources`
+
+        :param resources: resources to fetch
+        :type resources: [str]
+        :param projection: the parts of state.json to keep
+        :type projection: dict | None
+        :returns: Mesos' master state json object, limited to `resources`
+        :rtype: dict
+        """
+
+        framework_projection = None
+        if projection is not None:
+            framework_projection = (projection.get('frameworks') or [{}])[0]
+
+        state = {}
+        if 'frameworks' in resources:
+            frameworks_projection = None
+            if framework_projection is not None:
+                frameworks_projection = {
+                    'frameworks': [framework_projection],
+                    'completed_frameworks': [framework_projection]}
+            frameworks = self._get_master_json('master/frameworks',
+                                               frameworks_projection)
+            state['frameworks'] = frameworks.get('frameworks', [])
+            state['completed_frameworks'] = frameworks.get(
+                'completed_frameworks', [])
+
+        return state
+
+    def _get_master_json(self, path, projection=None, cached=False):
+        """GET a JSON document from the master.  If `projection` is
+        given, the response is parsed incrementally and only the parts of
+        it described by `projection` are kept in memory.
+
+        :param path: the path suffix of the URL
+        :type path: str
+        :param projection: the parts of the document to keep
+        :type projection: dict | None
+        :param cached: whether the response may be served from the on-disk
+                       cache, see :py:mod:`dcos.httpcache`
+        :type cached: bool
+        :returns: the JSON document
+        :rtype: dict
+        """
+
+        url = self.master_url(path)
+        get = httpcache.get if cached else http.get
+        if projection is None:
+            return get(url, timeout=self._timeout).json()
+
+        with contextlib.closing(
+                get(url, timeout=self._timeout, stream=True)) as r:
+            return jsonstream.load(r.iter_content(STATE_CHUNK_SIZE),
+                                   projection)
 
     def get_slave_state(self, slave_id, private_url):
         """Get the Mesos slave state json object
@@ -141,8 +319,7 @@ class DCOSClient(object):
         :rtype: dict
         """
 
-        url = self.master_url('master/state-summary')
-        return http.get(url, timeout=self._timeout).json()
+        return self._get_master_json('master/state-summary', cached=True)
 
     def slave_file_read(self, slave_id, private_url, path, offset, length):
         """See the master_file_read() docs
@@ -219,6 +396,41 @@ class DCOSClient(object):
                   'offset': offset}
         return http.get(url, params=params, timeout=self._timeout).json()
 
+    def slave_file_download(self, slave_id, private_url, path):
+        """See the master_file_download() docs
+
+        :param slave_id: slave ID
+        :type slave_id: str
+        :param private_url: The slave's private URL derived from its
+                            pid.  Used when we're accessing mesos
+                            directly, rather than through DC/OS.
+        :type private_url: str
+        :param path: absolute path to download
+        :type path: str
+        :returns: streamed files/download response
+        :rtype: requests.Response
+        """
+
+        url = self.slave_url(slave_id,
+                             private_url,
+                             'files/download')
+        return http.get(url, params={'path': path}, stream=True,
+                        timeout=self._timeout)
+
+    def master_file_download(self, path):
+        """Downloads a file as its raw bytes, unlike files/read.json which
+        returns the data as a JSON string.
+
+        :param path: absolute path to download
+        :type path: str
+        :returns: streamed files/download response
+        :rtype: requests.Response
+        """
+
+        url = self.master_url('files/download')
+        return http.get(url, params={'path': path}, stream=True,
+                        timeout=self._timeout)
+
     def shutdown_framework(self, framework_id):
         """Shuts down a Mesos framework
 
@@ -327,6 +539,7 @@ class Master(object):
         self._state = state
         self._frameworks = {}
         self._slaves = {}
+        self._index = None
 
     def state(self):
         """Returns master's master/state.json.
@@ -348,6 +561,10 @@ class Master(object):
         :rtype: Slave
         """
 
+        exact_match = self._indexes().slaves.get(fltr)
+        if exact_match is not None:
+            return self._slave_obj(exact_match)
+
         slaves = self.slaves(fltr)
 
         if len(slaves) == 0:
@@ -380,6 +597,12 @@ class Master(object):
         :rtype: Task
         """
 
+        exact_matches = [
+            entry for entry in self._indexes().tasks.get(fltr, [])
+            if _task_entry_selected(entry, completed, False)]
+        if len(exact_matches) == 1:
+            return self._task_entry_obj(exact_matches[0])
+
         tasks = self.tasks(fltr, completed)
 
         if len(tasks) == 0:
@@ -404,10 +627,10 @@ class Master(object):
         :rtype: Framework
         """
 
-        for f in self._framework_dicts(True, True):
-            if f['id'] == framework_id:
-                return self._framework_obj(f)
-        return None
+        framework = self._indexes().frameworks.get(framework_id)
+        if framework is None:
+            return None
+        return self._framework_obj(framework)
 
     def slaves(self, fltr=""):
         """Returns those slaves that have `fltr` in their 'id'
@@ -436,26 +659,31 @@ class Master(object):
         :rtype: [Task]
         """
 
-        keys = ['tasks']
-        show_completed = completed or all_
-        if show_completed:
-            keys.extend(['completed_tasks'])
+        index = self._indexes()
+        if fltr is None:
+            entries = index.entries
+        else:
+            glob_matches = index.glob_matches(fltr)
+            entries = [entry for entry in index.entries
+                       if fltr in entry.id or entry.seq in glob_matches]
+
+        return [self._task_entry_obj(entry) for entry in entries
+                if _task_entry_selected(entry, completed, all_)]
 
-        tasks = []
-        # get all frameworks
-        for framework in self._framework_dicts(True, True, True):
-            for task in _merge(framework, keys):
-                state = task.get("state")
-                if completed and state not in COMPLETED_TASK_STATES:
-                        continue
+    def slave_tasks(self, slave_id, completed=False):
+        """Returns the tasks that were scheduled on the slave `slave_id`
 
-                if fltr is None or \
-                        fltr in task['id'] or \
-                        fnmatch.fnmatchcase(task['id'], fltr):
-                    task = self._framework_obj(framework).task(task['id'])
-                    tasks.append(task)
+        :param slave_id: the slave's ID
+        :type slave_id: str
+        :param completed: also include completed tasks
+        :type completed: bool
+        :returns: a list of tasks
+        :rtype: [Task]
+        """
 
-        return tasks
+        return [self._task_entry_obj(entry)
+                for entry in self._indexes().slave_tasks.get(slave_id, [])
+                if _task_entry_selected(entry, False, completed)]
 
     def get_container_id(self, task_id):
         """Returns the container ID for a task ID matching `task_id`
@@ -467,14 +695,15 @@ class Master(object):
         """
 
         def _get_task(task_id):
-            candidates = []
-            if 'frameworks' in self.state():
-                for framework in self.state()['frameworks']:
-                    if 'tasks' in framework:
-                        for task in framework['tasks']:
-                            if 'id' in task:
-                                if task['id'].startswith(task_id):
-                                    candidates.append(task)
+            exact_matches = [
+                entry.task for entry in self._indexes().tasks.get(task_id, [])
+                if not entry.completed and not entry.framework_completed]
+            if len(exact_matches) == 1:
+                return exact_matches[0]
+
+            candidates = [
+                entry.task for entry in self._indexes().prefix_matches(task_id)
+                if not entry.completed and not entry.framework_completed]
 
             if len(candidates) == 1:
                 return candidates[0]
@@ -539,6 +768,29 @@ class Master(object):
         url = urllib.parse.urljoin(self._base_url(), path)
         return http.get(url, **kwargs)
 
+    def _indexes(self):
+        """Returns the lookup indexes for this master's state.json.  They
+        are built on first use, once per state document.
+
+        :returns: indexes
+        :rtype: _MasterIndex
+        """
+
+        if self._index is None:
+            self._index = _MasterIndex(self.state() or {})
+        return self._index
+
+    def _task_entry_obj(self, entry):
+        """Returns the Task object for an index entry
+
+        :param entry: task index entry
+        :type entry: _TaskEntry
+        :returns: Task
+        :rtype: Task
+        """
+
+        return self._framework_obj(entry.framework)._task_obj(entry.task)
+
     def _slave_obj(self, slave):
         """Returns the Slave object corresponding to the provided `slave`
         dict.  Creates it if it doesn't exist already.
@@ -674,6 +926,7 @@ class Framework(object):
         self._framework = framework
         self._master = master
         self._tasks = {}  # id->Task map
+        self._task_dicts = None  # id->task dict map, built on first use
 
     def task(self, task_id):
         """Returns a task by id
@@ -684,10 +937,15 @@ class Framework(object):
         :rtype: Task
         """
 
-        for task in _merge(self._framework, ['tasks', 'completed_tasks']):
-            if task['id'] == task_id:
-                return self._task_obj(task)
-        return None
+        if self._task_dicts is None:
+            self._task_dicts = {}
+            for task in _merge(self._framework, ['tasks', 'completed_tasks']):
+                self._task_dicts.setdefault(task['id'], task)
+
+        task = self._task_dicts.get(task_id)
+        if task is None:
+            return None
+        return self._task_obj(task)
 
     def _task_obj(self, task):
         """Returns the Task object corresponding to the provided `task`
@@ -817,7 +1075,8 @@ class Task(object):
 
 class MesosFile(object):
     """File-like object that is backed by a remote slave or master file.
-    Uses the files/read.json endpoint.
+    Uses the files/read.json endpoint, and files/download for
+    :py:meth:`download`.
 
     If `task` is provided, the file host is `task.slave()`.  If
     `slave` is provided, the file host is `slave`.  It is invalid to
@@ -852,6 +1111,18 @@ class MesosFile(object):
         self._path = path
         self._dcos_client = dcos_client or DCOSClient()
         self._cursor = 0
+        self._chunk_size = FILE_READ_CHUNK_SIZE
+        self._read_cap = None
+
+    def slave_id(self):
+        """ID of the slave the file lives on
+
+        :returns: the slave's ID, or None if the file lives on the leading
+                  master
+        :rtype: str | None
+        """
+
+        return self._slave['id'] if self._slave else None
 
     def size(self):
         """Size of the file
@@ -905,15 +1176,186 @@ class MesosFile(object):
         :rtype: str
         """
 
-        data = ''
-        while length is None or length - len(data) > 0:
-            chunk_length = -1 if length is None else length - len(data)
-            chunk = self._fetch_chunk(chunk_length)
-            if chunk == '':
-                break
-            data += chunk
+        start = self._cursor
+        if length is None:
+            end = self.size()
+            buf = bytearray(max(end - start, 0))
+        else:
+            end = start + length
+            buf = bytearray()
+
+        pos = 0
+        for chunk in self._iter_range(start, end):
+            buf[pos:pos + len(chunk)] = chunk
+            pos += len(chunk)
+        del buf[pos:]
+
+        self._cursor = start + pos
+        return buf.decode('utf-8')
+
+    def download(self, file_obj):
+        """Copies the file, as its raw bytes, to `file_obj` as they are
+        fetched from files/download, without holding the whole file in
+        memory.  Unlike :py:meth:`read`, this works for binary files too.
+
+        :param file_obj: binary file to write to
+        :type file_obj: file
+        :returns: number of bytes copied
+        :rtype: int
+        """
 
-        return data
+        if self._slave:
+            response = self._dcos_client.slave_file_download(
+                self._slave['id'], self._slave.http_url(), self._host_path())
+        else:
+            response = self._dcos_client.master_file_download(
+                self._host_path())
+
+        copied = 0
+        with contextlib.closing(response):
+            for chunk in response.iter_content(FILE_DOWNLOAD_CHUNK_SIZE):
+                file_obj.write(chunk)
+                copied += len(chunk)
+        return copied
+
+    def _iter_range(self, start, end):
+        """Fetches the bytes of the file between `start` and `end`, or up to
+        the end of the file if it is shorter, and yields them in order.
+
+        Ranges larger than a chunk are fetched with up to
+        FILE_READ_CONCURRENCY files/read.json requests in flight, on a
+        shared thread pool; a request that is the only one in flight is
+        made in the calling thread instead. The
+        chunk size adapts as responses come back: agents cap the length of
+        a single read (to 16 pages by default), so a short read followed
+        by more data sets the chunk size to that cap; otherwise chunks
+        grow while responses are fast and shrink when they are slow.
+
+        :param start: offset of the first byte
+        :type start: int
+        :param end: offset after the last byte
+        :type end: int
+        :returns: chunks of data
+        :rtype: generator of bytes
+        """
+
+        if end <= start:
+            return
+
+        # Each entry is (offset, length, future, probe); `probe` is the
+        # length of a preceding short read that this entry will confirm as
+        # the agent's cap if it returns data.
+        pending = collections.deque()
+        offset = start
+        try:
+            while pending or offset < end:
+                while offset < end and \
+                        len(pending) < FILE_READ_CONCURRENCY:
+                    length = min(self._chunk_size, end - offset)
+                    inline = not pending and offset + length >= end
+                    pending.append((
+                        offset, length,
+                        self._submit_read(offset, length, inline),
+                        None))
+                    offset += length
+
+                chunk_offset, length, future, probe = pending.popleft()
+                data, elapsed = future.result()
+                if not data:
+                    break
+
+                if probe is not None:
+                    logger.info('Agent caps file reads at %d bytes', probe)
+                    self._read_cap = self._chunk_size = probe
+                elif len(data) == length:
+                    self._adapt_chunk_size(length, elapsed)
+
+                yield data
+
+                if len(data) < length:
+                    # Either the end of the file, or the agent's cap.
+                    # Fetch the rest of the chunk before anything after
+                    # it; if the cap is already known, in pieces of that
+                    # size.
+                    rest = chunk_offset + len(data)
+                    rest_end = chunk_offset + length
+                    piece = self._read_cap or (rest_end - rest)
+                    piece_offsets = range(rest, rest_end, piece)
+                    inline = not pending and len(piece_offsets) == 1
+                    pieces = [
+                        (piece_offset,
+                         min(piece, rest_end - piece_offset),
+                         self._submit_read(
+                             piece_offset,
+                             min(piece, rest_end - piece_offset),
+                             inline),
+                         None if self._read_cap else len(data))
+                        for piece_offset in piece_offsets]
+                    pending.extendleft(reversed(pieces))
+        finally:
+            for _, _, future, _ in pending:
+                future.cancel()
+
+    def _submit_read(self, offset, length, inline):
+        """Starts a files/read.json request for `length` bytes at `offset`.
+
+        :param offset: offset of the first byte
+        :type offset: int
+        :param length: number of bytes to read
+        :type length: int
+        :param inline: whether to make the request in the calling thread,
+                       because it is the only one in flight
+        :type inline: bool
+        :returns: the future of the (data, elapsed) pair
+        :rtype: concurrent.futures.Future
+        """
+
+        if not inline:
+            return _get_file_read_executor().submit(
+                self._read_at, offset, length)
+
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(self._read_at(offset, length))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _adapt_chunk_size(self, length, elapsed):
+        """Grows or shrinks the chunk size after a full read of `length`
+        bytes took `elapsed` seconds.
+
+        :param length: number of bytes read
+        :type length: int
+        :param elapsed: duration of the request, in seconds
+        :type elapsed: float
+        :rtype: None
+        """
+
+        if self._read_cap is not None or length != self._chunk_size:
+            return
+
+        if elapsed < FILE_READ_TARGET_DURATION / 4:
+            self._chunk_size = min(2 * self._chunk_size,
+                                   FILE_READ_MAX_CHUNK_SIZE)
+        elif elapsed > FILE_READ_TARGET_DURATION:
+            self._chunk_size = max(self._chunk_size // 2,
+                                   FILE_READ_MIN_CHUNK_SIZE)
+
+    def _read_at(self, offset, length):
+        """Fetches `length` bytes at `offset` without moving the cursor.
+
+        :param offset: start location
+        :type offset: int
+        :param length: number of bytes to fetch
+        :type length: int
+        :returns: data read, and how long the request took in seconds
+        :rtype: (bytes, float)
+        """
+
+        started = time.time()
+        data = self._fetch(self._params(length, offset=offset))["data"]
+        return data.encode('utf-8'), time.time() - started
 
     def _host_path(self):
         """ The absolute path to the file on slave.
@@ -1009,9 +1451,14 @@ class MesosFile(object):
             return "master:{0}".format(self._path)
 
 
-class TaskIO(object):
-    """Object used to stream I/O between a
-    running Mesos task and the local terminal.
+class _TaskIOBase(object):
+    """The state and the messages shared by the engines which stream I/O
+    between a running Mesos task and the local terminal:
+    :py:class:`TaskIO` and :py:class:`AsyncTaskIO`.
+
+    Subclasses define `_run_session()`, which launches the command and
+    streams its I/O until it exits, once :py:meth:`run` has set up the
+    terminal.
 
     :param task: task ID
     :type task: str
@@ -1025,6 +1472,11 @@ class TaskIO(object):
     :param tty: whether to allocate a tty for this command and attach
                 the local terminal to it
     :type tty: bool
+    :param client: client to use, instead of creating one
+    :type client: DCOSClient | None
+    :param master: master state to find the task in, instead of
+                   fetching it
+    :type master: Master | None
     """
 
     # The interval to send heartbeat messages to
@@ -1032,8 +1484,24 @@ class TaskIO(object):
     HEARTBEAT_INTERVAL = 30
     HEARTBEAT_INTERVAL_NANOSECONDS = HEARTBEAT_INTERVAL * 1000000000
 
+    # The bounds of the size of the reads from STDIN. Reads start
+    # small and double while STDIN keeps filling them, e.g. when a
+    # file is piped in, so that bulk input is sent in large messages.
+    INPUT_MIN_READ_SIZE = 1024
+    INPUT_MAX_READ_SIZE = 1024 * 1024
+
+    # The maximum number of bytes of queued input messages to send
+    # to the agent in a single write.
+    INPUT_BATCH_SIZE = 4 * 1024 * 1024
+
+    # The number of bytes of output to buffer before writing them to
+    # STDOUT or STDERR. Buffered output is also written once all the
+    # received output is processed, and right away when attached to
+    # a tty.
+    OUTPUT_FLUSH_SIZE = 1024 * 1024
+
     def __init__(self, task_id, cmd=None, args=None,
-                 interactive=False, tty=False):
+                 interactive=False, tty=False, client=None, master=None):
         # Store relevant parameters of the call for later.
         self.cmd = cmd
         self.interactive = interactive
@@ -1041,8 +1509,10 @@ class TaskIO(object):
         self.args = args
 
         # Create a client and grab a reference to the DC/OS master.
-        client = DCOSClient()
-        master = get_master(client)
+        if client is None:
+            client = DCOSClient()
+        if master is None:
+            master = get_master(client)
 
         # Get the task and make sure its container was launched by the UCR.
         # Since task's containers are launched by the UCR by default, we want
@@ -1084,36 +1554,9 @@ class TaskIO(object):
         self.decoder = recordio.Decoder(
             lambda s: json.loads(s.decode("UTF-8")))
 
-        # Set up queues to send messages between threads used for
-        # reading/writing to STDIN/STDOUT/STDERR and threads
-        # sending/receiving data over the network.
-        self.input_queue = Queue()
-        self.output_queue = Queue()
-
-        # Set up an event to block attaching
-        # input until attaching output is complete.
-        self.attach_input_event = threading.Event()
-        self.attach_input_event.clear()
-
-        # Set up an event to block printing the output
-        # until an attach input event has successfully
-        # been established.
-        self.print_output_event = threading.Event()
-        self.print_output_event.clear()
-
-        # Set up an event to block the main thread
-        # from exiting until signaled to do so.
-        self.exit_event = threading.Event()
-        self.exit_event.clear()
-
-        # Use a class variable to store exceptions thrown on
-        # other threads and raise them on the main thread before
-        # exiting.
-        self.exception = None
-
     def run(self):
-        """Run the helper threads in this class which enable streaming
-        of STDIN/STDOUT/STDERR between the CLI and the Mesos Agent API.
+        """Stream STDIN/STDOUT/STDERR between the CLI and the Mesos
+        Agent API until the command exits.
 
         If a tty is requested, we take over the current terminal and
         put it into raw mode. We make sure to reset the terminal back
@@ -1122,14 +1565,7 @@ class TaskIO(object):
 
         # Without a TTY.
         if not self.tty:
-            try:
-                self._start_threads()
-                self.exit_event.wait()
-            except Exception as e:
-                self.exception = e
-
-            if self.exception:
-                raise self.exception
+            self._run_session()
             return
 
         # With a TTY.
@@ -1147,88 +1583,70 @@ class TaskIO(object):
         try:
             if self.interactive:
                 tty.setraw(fd, when=termios.TCSANOW)
-                self._window_resize(signal.SIGWINCH, None)
-                signal.signal(signal.SIGWINCH, self._window_resize)
 
-            self._start_threads()
-            self.exit_event.wait()
-        except Exception as e:
-            self.exception = e
+            self._run_session()
+        finally:
+            termios.tcsetattr(
+                sys.stdin.fileno(),
+                termios.TCSAFLUSH,
+                oldtermios)
+
+    def _stdin_encoder(self):
+        """Returns a function which encodes STDIN data into a RecordIO
+        encoded ATTACH_CONTAINER_INPUT message. The JSON around the data is
+        only serialized once.
+
+        :returns: function taking the data as bytes and returning the
+                  encoded message
+        :rtype: function
+        """
 
-        termios.tcsetattr(
-            sys.stdin.fileno(),
-            termios.TCSAFLUSH,
-            oldtermios)
+        # base64 data needs no escaping in JSON, so it can be spliced in
+        # place of a marker.
+        marker = str(uuid.uuid4())
+        message = {
+            'type': 'ATTACH_CONTAINER_INPUT',
+            'attach_container_input': {
+                'type': 'PROCESS_IO',
+                'process_io': {
+                    'type': 'DATA',
+                    'data': {
+                        'type': 'STDIN',
+                        'data': marker}}}}
 
-        if self.exception:
-            raise self.exception
+        prefix, _, suffix = self.encoder.serialize(message).partition(
+            marker.encode('utf-8'))
+        overhead = len(prefix) + len(suffix)
 
-    def _thread_wrapper(self, func):
-        """A wrapper around all threads used in this class
+        def encode(chunk):
+            data = base64.b64encode(chunk)
+            header = str(overhead + len(data)).encode('utf-8') + b'\n'
+            return b''.join((header, prefix, data, suffix))
 
-        If a thread throws an exception, it will unblock the main
-        thread and save the exception in a class variable. The main
-        thread will then rethrow the exception before exiting.
+        return encode
 
-        :param func: The start function for the thread
-        :type func: function
-        """
-        try:
-            func()
-        except Exception as e:
-            self.exception = e
-            self.exit_event.set()
+    def _next_read_size(self, read_size, length):
+        """Adapts the size of the reads from STDIN to how much data the
+        last read returned.
 
-    def _start_threads(self):
-        """Start all threads associated with this class
+        :param read_size: size of the last read
+        :type read_size: int
+        :param length: number of bytes the last read returned
+        :type length: int
+        :returns: size of the next read
+        :rtype: int
         """
-        if self.interactive:
-            # Collects input from STDIN and puts
-            # it in the input_queue as data messages.
-            thread = threading.Thread(
-                target=self._thread_wrapper,
-                args=(self._input_thread,))
-            thread.daemon = True
-            thread.start()
-
-            # Prepares heartbeat control messages and
-            # puts them in the input queueaat a specific
-            # heartbeat interval.
-            thread = threading.Thread(
-                 target=self._thread_wrapper,
-                 args=(self._heartbeat_thread,))
-            thread.daemon = True
-            thread.start()
-
-            # Opens a persistent connection with the mesos agent and
-            # feeds it both control and data messages from the input
-            # queue via ATTACH_CONTAINER_INPUT messages.
-            thread = threading.Thread(
-                 target=self._thread_wrapper,
-                 args=(self._attach_container_input,))
-            thread.daemon = True
-            thread.start()
-
-        # Opens a persistent connection with a mesos agent, reads
-        # data messages from it and feeds them to an output_queue.
-        thread = threading.Thread(
-            target=self._thread_wrapper,
-            args=(self._launch_nested_container_session,))
-        thread.daemon = True
-        thread.start()
 
-        # Collects data messages from the output queue and writes
-        # their content to STDOUT and STDERR.
-        thread = threading.Thread(
-            target=self._thread_wrapper,
-            args=(self._output_thread,))
-        thread.daemon = True
-        thread.start()
+        if length == read_size:
+            return min(read_size * 2, self.INPUT_MAX_READ_SIZE)
+        elif length < read_size // 2:
+            return max(read_size // 2, self.INPUT_MIN_READ_SIZE)
+        return read_size
 
-    def _launch_nested_container_session(self):
-        """Sends a request to the Mesos Agent to launch a new
-        nested container and attach to its output stream.
-        The output stream is then sent back in the response.
+    def _launch_message(self):
+        """
+        :returns: the LAUNCH_NESTED_CONTAINER_SESSION call for the command
+        :rtype: dict
         """
 
         message = {
@@ -1250,14 +1668,216 @@ class TaskIO(object):
                         'type': 'MESOS',
                         'tty_info': {}}
 
-        req_extra_args = {
-            'stream': True,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Accept': 'application/recordio',
-                'Message-Accept': 'application/json'}}
+        return message
 
-        response = http.post(
+    def _attach_input_message(self):
+        """
+        :returns: the ATTACH_CONTAINER_INPUT message which starts the
+                  input stream of the command
+        :rtype: dict
+        """
+
+        return {
+            'type': 'ATTACH_CONTAINER_INPUT',
+            'attach_container_input': {
+                'type': 'CONTAINER_ID',
+                'container_id': {
+                    'parent': self.parent_id,
+                    'value': self.container_id}}}
+
+    def _heartbeat_message(self):
+        """
+        :returns: the heartbeat control message for the input stream
+        :rtype: dict
+        """
+
+        nanoseconds = self.HEARTBEAT_INTERVAL_NANOSECONDS
+
+        return {
+            'type': 'ATTACH_CONTAINER_INPUT',
+            'attach_container_input': {
+                'type': 'PROCESS_IO',
+                'process_io': {
+                    'type': 'CONTROL',
+                    'control': {
+                        'type': 'HEARTBEAT',
+                        'heartbeat': {
+                              'interval': {
+                                   'nanoseconds': nanoseconds}}}}}}
+
+    def _window_size_message(self):
+        """
+        :returns: the control message with the current dimensions of the
+                  terminal
+        :rtype: dict
+        """
+
+        # Determine the size of our terminal, and create the message to be sent
+        rows, columns = os.popen('stty size', 'r').read().split()
+
+        return {
+            'type': 'ATTACH_CONTAINER_INPUT',
+            'attach_container_input': {
+                'type': 'PROCESS_IO',
+                'process_io': {
+                    'type': 'CONTROL',
+                    'control': {
+                        'type': 'TTY_INFO',
+                        'tty_info': {
+                              'window_size': {
+                                  'rows': int(rows),
+                                  'columns': int(columns)}}}}}}
+
+
+class TaskIO(_TaskIOBase):
+    """Object used to stream I/O between a
+    running Mesos task and the local terminal.
+
+    :param task: task ID
+    :type task: str
+    :param cmd: a command to launch inside the task's container
+    :type cmd: str
+    :param args: Additional arguments for the command
+    :type args: str
+    :param interactive: whether to attach STDIN of the current
+                        terminal to the new command being launched
+    :type interactive: bool
+    :param tty: whether to allocate a tty for this command and attach
+                the local terminal to it
+    :type tty: bool
+    """
+
+    # How long to wait for more input to fill a write when no tty is
+    # attached. With a tty, keystrokes are sent as soon as they are read.
+    INPUT_BATCH_DELAY = 0.005
+
+    def __init__(self, task_id, cmd=None, args=None,
+                 interactive=False, tty=False):
+        super(TaskIO, self).__init__(task_id, cmd, args, interactive, tty)
+
+        # Set up queues to send messages between threads used for
+        # reading/writing to STDIN/STDOUT/STDERR and threads
+        # sending/receiving data over the network.
+        self.input_queue = Queue()
+        self.output_queue = Queue()
+
+        # Set up an event to block attaching
+        # input until attaching output is complete.
+        self.attach_input_event = threading.Event()
+        self.attach_input_event.clear()
+
+        # Set up an event to block printing the output
+        # until an attach input event has successfully
+        # been established.
+        self.print_output_event = threading.Event()
+        self.print_output_event.clear()
+
+        # Set up an event to block the main thread
+        # from exiting until signaled to do so.
+        self.exit_event = threading.Event()
+        self.exit_event.clear()
+
+        # Use a class variable to store exceptions thrown on
+        # other threads and raise them on the main thread before
+        # exiting.
+        self.exception = None
+
+    def _run_session(self):
+        """Run the helper threads in this class which enable streaming
+        of STDIN/STDOUT/STDERR between the CLI and the Mesos Agent API.
+        """
+
+        try:
+            if self.tty and self.interactive:
+                self._window_resize(signal.SIGWINCH, None)
+                signal.signal(signal.SIGWINCH, self._window_resize)
+
+            self._start_threads()
+            self.exit_event.wait()
+        except Exception as e:
+            self.exception = e
+
+        if self.exception:
+            raise self.exception
+
+    def _thread_wrapper(self, func):
+        """A wrapper around all threads used in this class
+
+        If a thread throws an exception, it will unblock the main
+        thread and save the exception in a class variable. The main
+        thread will then rethrow the exception before exiting.
+
+        :param func: The start function for the thread
+        :type func: function
+        """
+        try:
+            func()
+        except Exception as e:
+            self.exception = e
+            self.exit_event.set()
+
+    def _start_threads(self):
+        """Start all threads associated with this class
+        """
+        if self.interactive:
+            # Collects input from STDIN and puts
+            # it in the input_queue as data messages.
+            thread = threading.Thread(
+                target=self._thread_wrapper,
+                args=(self._input_thread,))
+            thread.daemon = True
+            thread.start()
+
+            # Prepares heartbeat control messages and
+            # puts them in the input queueaat a specific
+            # heartbeat interval.
+            thread = threading.Thread(
+                 target=self._thread_wrapper,
+                 args=(self._heartbeat_thread,))
+            thread.daemon = True
+            thread.start()
+
+            # Opens a persistent connection with the mesos agent and
+            # feeds it both control and data messages from the input
+            # queue via ATTACH_CONTAINER_INPUT messages.
+            thread = threading.Thread(
+                 target=self._thread_wrapper,
+                 args=(self._attach_container_input,))
+            thread.daemon = True
+            thread.start()
+
+        # Opens a persistent connection with a mesos agent, reads
+        # data messages from it and feeds them to an output_queue.
+        thread = threading.Thread(
+            target=self._thread_wrapper,
+            args=(self._launch_nested_container_session,))
+        thread.daemon = True
+        thread.start()
+
+        # Collects data messages from the output queue and writes
+        # their content to STDOUT and STDERR.
+        thread = threading.Thread(
+            target=self._thread_wrapper,
+            args=(self._output_thread,))
+        thread.daemon = True
+        thread.start()
+
+    def _launch_nested_container_session(self):
+        """Sends a request to the Mesos Agent to launch a new
+        nested container and attach to its output stream.
+        The output stream is then sent back in the response.
+        """
+
+        message = self._launch_message()
+
+        req_extra_args = {
+            'stream': True,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Accept': 'application/recordio',
+                'Message-Accept': 'application/json'}}
+
+        response = http.post(
             self.agent_url,
             data=json.dumps(message),
             **req_extra_args)
@@ -1266,8 +1886,9 @@ class TaskIO(object):
 
     def _process_output_stream(self, response):
         """Gets data streamed over the given response and places the
-        returned messages into our output_queue. Only expects to
-        receive data messages.
+        received chunks into our output_queue, followed by None at the
+        end of the stream. The chunks are decoded by the output thread
+        so that this thread only reads from the network.
 
         :param response: Response from an http post
         :type response: requests.models.Response
@@ -1286,17 +1907,14 @@ class TaskIO(object):
 
         try:
             for chunk in response.iter_content(chunk_size=None):
-                records = self.decoder.decode(chunk)
-
-                for r in records:
-                    if r.get('type') and r['type'] == 'DATA':
-                        self.output_queue.put(r['data'])
+                self.output_queue.put(chunk)
         except Exception as e:
             raise DCOSException(
                 "Error parsing output stream: {error}".format(error=e))
 
-        self.output_queue.join()
-        self.exit_event.set()
+        # The output thread signals the exit event once it has
+        # written all the output.
+        self.output_queue.put(None)
 
     def _attach_container_input(self):
         """Streams all input data (e.g. STDIN) from the client to the agent
@@ -1311,15 +1929,7 @@ class TaskIO(object):
             :returns: A RecordIO encoded message
             """
 
-            message = {
-                'type': 'ATTACH_CONTAINER_INPUT',
-                'attach_container_input': {
-                    'type': 'CONTAINER_ID',
-                    'container_id': {
-                        'parent': self.parent_id,
-                        'value': self.container_id}}}
-
-            yield self.encoder.encode(message)
+            yield self.encoder.encode(self._attach_input_message())
 
         def _input_streamer():
             """Generator function yielding ATTACH_CONTAINER_INPUT
@@ -1332,11 +1942,11 @@ class TaskIO(object):
 
             yield next(_initial_input_streamer())
 
-            while True:
-                record = self.input_queue.get()
-                if not record:
-                    break
-                yield record
+            done = False
+            while not done:
+                batch, done = self._input_batch(self.input_queue.get())
+                if batch:
+                    yield batch
 
         req_extra_args = {
             'headers': {
@@ -1380,61 +1990,107 @@ class TaskIO(object):
             data=_input_streamer(),
             **req_extra_args)
 
+    def _input_batch(self, record):
+        """Coalesces `record` with the input messages queued after it, up to
+        `INPUT_BATCH_SIZE` bytes, so that they are sent in a single write.
+        Without a tty, waits up to `INPUT_BATCH_DELAY` seconds for more
+        messages.
+
+        :param record: RecordIO encoded message, or None at the end of the
+                       input
+        :type record: bytes | None
+        :returns: the encoded messages, and whether the end of the input
+                  was reached
+        :rtype: (bytes, bool)
+        """
+
+        if not record:
+            return b'', True
+
+        records = [record]
+        size = len(record)
+        deadline = time.time() + (0 if self.tty else self.INPUT_BATCH_DELAY)
+        while size < self.INPUT_BATCH_SIZE:
+            timeout = deadline - time.time()
+            try:
+                if timeout > 0:
+                    record = self.input_queue.get(timeout=timeout)
+                else:
+                    record = self.input_queue.get_nowait()
+            except Empty:
+                break
+
+            if not record:
+                return b''.join(records), True
+            records.append(record)
+            size += len(record)
+
+        return b''.join(records), False
+
     def _input_thread(self):
         """Reads from STDIN and places a message
         with that data onto the input_queue.
         """
 
-        message = {
-            'type': 'ATTACH_CONTAINER_INPUT',
-            'attach_container_input': {
-                'type': 'PROCESS_IO',
-                'process_io': {
-                    'type': 'DATA',
-                    'data': {
-                        'type': 'STDIN',
-                        'data': ''}}}}
+        encode = self._stdin_encoder()
+        fd = sys.stdin.fileno()
+        read_size = self.INPUT_MIN_READ_SIZE
 
-        for chunk in iter(partial(os.read, sys.stdin.fileno(), 1024), b''):
-            message[
-                'attach_container_input'][
-                    'process_io'][
-                        'data'][
-                            'data'] = base64.b64encode(chunk).decode('utf-8')
+        while True:
+            chunk = os.read(fd, read_size)
+            if not chunk:
+                break
 
-            self.input_queue.put(self.encoder.encode(message))
+            self.input_queue.put(encode(chunk))
+            read_size = self._next_read_size(read_size, len(chunk))
 
         # Push an empty string to indicate EOF to the server and push
         # 'None' to signal that we are done processing input.
-        message['attach_container_input']['process_io']['data']['data'] = ''
-        self.input_queue.put(self.encoder.encode(message))
+        self.input_queue.put(encode(b''))
         self.input_queue.put(None)
 
     def _output_thread(self):
-        """Reads from the output_queue and writes the data
-        to the appropriate STDOUT or STDERR.
+        """Reads chunks of the output stream from the output_queue, decodes
+        their data messages and writes the data to the appropriate STDOUT
+        or STDERR.
+
+        The chunks queued so far are decoded together and their data is
+        buffered. It is written once `OUTPUT_FLUSH_SIZE` bytes are buffered,
+        the output_queue is empty, or, when attached to a tty, the chunks
+        are processed.
         """
 
-        while True:
-            # Get a message from the output queue and decode it.
-            # Then write the data to the appropriate stdout or stderr.
-            output = self.output_queue.get()
-            if not output.get('data'):
-                raise DCOSException("Error no 'data' field in output message")
-
-            data = output['data']
-            data = base64.b64decode(data.encode('utf-8'))
+        writer = _OutputWriter(
+            self.decoder, sys.stdout, sys.stderr, self.OUTPUT_FLUSH_SIZE)
+
+        done = False
+        while not done:
+            # Take all the chunks received so far, up to
+            # `OUTPUT_FLUSH_SIZE` bytes, and decode them at once.
+            chunks = []
+            size = 0
+            idle = False
+            chunk = self.output_queue.get()
+            while True:
+                if chunk is None:
+                    done = True
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.OUTPUT_FLUSH_SIZE:
+                    break
+                try:
+                    chunk = self.output_queue.get_nowait()
+                except Empty:
+                    idle = True
+                    break
 
-            if output.get('type') and output['type'] == 'STDOUT':
-                sys.stdout.buffer.write(data)
-                sys.stdout.flush()
-            elif output.get('type') and output['type'] == 'STDERR':
-                sys.stderr.buffer.write(data)
-                sys.stderr.flush()
-            else:
-                raise DCOSException("Unsupported data type in output stream")
+            writer.write(b''.join(chunks))
+            if idle or self.tty:
+                writer.flush()
 
-            self.output_queue.task_done()
+        writer.flush()
+        self.exit_event.set()
 
     def _heartbeat_thread(self):
         """Generates a heartbeat message to send over the
@@ -1442,24 +2098,11 @@ class TaskIO(object):
         inserts it in the input queue.
         """
 
-        interval = self.HEARTBEAT_INTERVAL
-        nanoseconds = self.HEARTBEAT_INTERVAL_NANOSECONDS
-
-        message = {
-            'type': 'ATTACH_CONTAINER_INPUT',
-            'attach_container_input': {
-                'type': 'PROCESS_IO',
-                'process_io': {
-                    'type': 'CONTROL',
-                    'control': {
-                        'type': 'HEARTBEAT',
-                        'heartbeat': {
-                              'interval': {
-                                   'nanoseconds': nanoseconds}}}}}}
+        message = self._heartbeat_message()
 
         while True:
             self.input_queue.put(self.encoder.encode(message))
-            time.sleep(interval)
+            time.sleep(self.HEARTBEAT_INTERVAL)
 
     def _window_resize(self, signum, frame):
         """Signal handler for SIGWINCH.
@@ -1473,23 +2116,737 @@ class TaskIO(object):
         :type frame: frame
         """
 
-        # Determine the size of our terminal, and create the message to be sent
-        rows, columns = os.popen('stty size', 'r').read().split()
+        self.input_queue.put(
+            self.encoder.encode(self._window_size_message()))
 
-        message = {
-            'type': 'ATTACH_CONTAINER_INPUT',
-            'attach_container_input': {
-                'type': 'PROCESS_IO',
-                'process_io': {
-                    'type': 'CONTROL',
-                    'control': {
-                        'type': 'TTY_INFO',
-                        'tty_info': {
-                              'window_size': {
-                                  'rows': int(rows),
-                                  'columns': int(columns)}}}}}}
 
-        self.input_queue.put(self.encoder.encode(message))
+class AsyncTaskIO(_TaskIOBase):
+    """Streams I/O between a running Mesos task and the local terminal like
+    :py:class:`TaskIO`, but runs STDIN, STDOUT, the heartbeats and both
+    HTTP streams to the agent as tasks of one asyncio event loop instead
+    of four threads.
+
+    STDIN is only read as fast as the agent accepts the input, and the
+    output stream is only read as fast as it is written out. Many
+    sessions can run concurrently on one event loop by awaiting their
+    :py:meth:`session` coroutines.
+
+    :param task: task ID
+    :type task: str
+    :param cmd: a command to launch inside the task's container
+    :type cmd: str
+    :param args: Additional arguments for the command
+    :type args: str
+    :param interactive: whether to attach STDIN of the current
+                        terminal to the new command being launched
+    :type interactive: bool
+    :param tty: whether to allocate a tty for this command and attach
+                the local terminal to it
+    :type tty: bool
+    :param client: client to use, instead of creating one
+    :type client: DCOSClient | None
+    :param master: master state to find the task in, instead of
+                   fetching it
+    :type master: Master | None
+    :param stdout: stream to write the command's STDOUT to, instead of
+                   sys.stdout
+    :type stdout: file | None
+    :param stderr: stream to write the command's STDERR to, instead of
+                   sys.stderr
+    :type stderr: file | None
+    :param pool: connection pool to send the requests with, so that
+                 sessions share the connections to their agents
+    :type pool: asynchttp.ConnectionPool | None
+    """
+
+    # The maximum number of encoded input messages waiting to be sent
+    # to the agent. STDIN is not read while the queue is full.
+    INPUT_QUEUE_SIZE = 16
+
+    # Sessions sharing an event loop rarely find all of their received
+    # output processed, so keep their buffers small.
+    OUTPUT_FLUSH_SIZE = 64 * 1024
+
+    def __init__(self, task_id, cmd=None, args=None,
+                 interactive=False, tty=False, client=None, master=None,
+                 stdout=None, stderr=None, pool=None):
+        super(AsyncTaskIO, self).__init__(
+            task_id, cmd, args, interactive, tty, client, master)
+
+        self.stdout = stdout
+        self.stderr = stderr
+        self.pool = pool
+        self.input_queue = None
+
+    def _run_session(self):
+        """Run the session on a new event loop."""
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.session())
+        finally:
+            loop.close()
+
+    async def session(self):
+        """Launches the command and streams its I/O until its output ends.
+
+        :rtype: None
+        """
+
+        loop = asyncio.get_event_loop()
+        pool = self.pool
+        if pool is None:
+            pool = asynchttp.ConnectionPool()
+
+        self.input_queue = asyncio.Queue(maxsize=self.INPUT_QUEUE_SIZE)
+        watch_window = self.tty and self.interactive
+        tasks = []
+
+        try:
+            response = await pool.request(
+                'POST',
+                self.agent_url,
+                headers={'Content-Type': 'application/json',
+                         'Accept': 'application/recordio',
+                         'Message-Accept': 'application/json'},
+                body=json.dumps(self._launch_message()).encode('utf-8'))
+
+            try:
+                # Make sure that the input can be attached before
+                # printing any output, like TaskIO.
+                if self.interactive and await self._check_input(pool):
+                    if watch_window:
+                        loop.add_signal_handler(
+                            signal.SIGWINCH, self._window_resize)
+                        self._window_resize()
+
+                    tasks += [asyncio.ensure_future(self._read_stdin()),
+                              asyncio.ensure_future(self._send_heartbeats()),
+                              asyncio.ensure_future(self._attach_input(pool))]
+
+                output = asyncio.ensure_future(self._write_output(response))
+                tasks.append(output)
+
+                # Raise the errors of the other tasks as they happen.
+                pending = set(tasks)
+                while not output.done():
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+            finally:
+                response.close()
+        finally:
+            if watch_window:
+                loop.remove_signal_handler(signal.SIGWINCH)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.wait(tasks)
+            if self.pool is None:
+                pool.close()
+
+    async def wait(self):
+        """Waits for the command to exit.
+
+        :returns: the exit code of the command, 128 plus the number of the
+                  signal which killed it, or None if the agent doesn't know
+                  how it exited
+        :rtype: int | None
+        """
+
+        pool = self.pool
+        if pool is None:
+            pool = asynchttp.ConnectionPool()
+
+        try:
+            response = await pool.request(
+                'POST',
+                self.agent_url,
+                headers={'Content-Type': 'application/json',
+                         'Accept': 'application/json'},
+                body=json.dumps(self._wait_message()).encode('utf-8'))
+            await response.read()
+        finally:
+            if self.pool is None:
+                pool.close()
+
+        try:
+            status = response.json()['wait_nested_container'].get(
+                'exit_status')
+        except (ValueError, KeyError, AttributeError) as e:
+            raise DCOSException(
+                "Error parsing WAIT_NESTED_CONTAINER response: {error}"
+                .format(error=e))
+
+        return _exit_code(status)
+
+    def _wait_message(self):
+        """
+        :returns: the WAIT_NESTED_CONTAINER call for the command
+        :rtype: dict
+        """
+
+        return {
+            'type': 'WAIT_NESTED_CONTAINER',
+            'wait_nested_container': {
+                'container_id': {
+                    'parent': self.parent_id,
+                    'value': self.container_id}}}
+
+    async def _check_input(self, pool):
+        """Sends the initial ATTACH_CONTAINER_INPUT message on its own, to
+        make sure that the input can be attached. A 500 response means
+        that the container has already finished running, in which case
+        its output is still printed.
+
+        :param pool: connection pool to send the request with
+        :type pool: asynchttp.ConnectionPool
+        :returns: whether the input can be attached
+        :rtype: bool
+        """
+
+        try:
+            response = await pool.request(
+                'POST',
+                self.agent_url,
+                headers=self._input_headers(),
+                body=self.encoder.encode(self._attach_input_message()))
+        except DCOSHTTPException as e:
+            if e.response.status_code != 500:
+                raise
+            return False
+
+        await response.read()
+        return True
+
+    async def _attach_input(self, pool):
+        """Streams the messages of the input_queue to the agent, coalescing
+        the queued messages into writes of up to `INPUT_BATCH_SIZE` bytes.
+
+        :param pool: connection pool to send the request with
+        :type pool: asynchttp.ConnectionPool
+        :rtype: None
+        """
+
+        first = self.encoder.encode(self._attach_input_message())
+        done = False
+
+        async def _next_batch():
+            nonlocal first, done
+
+            if first is not None:
+                batch, first = first, None
+                return batch
+            if done:
+                return None
+
+            records = []
+            size = 0
+            record = await self.input_queue.get()
+            while record is not None:
+                records.append(record)
+                size += len(record)
+                if size >= self.INPUT_BATCH_SIZE:
+                    break
+                try:
+                    record = self.input_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+
+            if record is None:
+                done = True
+                if not records:
+                    return None
+            return b''.join(records)
+
+        response = await pool.request(
+            'POST',
+            self.agent_url,
+            headers=self._input_headers(),
+            body=_next_batch)
+        await response.read()
+
+    def _input_headers(self):
+        """
+        :returns: the headers of the ATTACH_CONTAINER_INPUT calls
+        :rtype: dict
+        """
+
+        return {'Content-Type': 'application/recordio',
+                'Message-Content-Type': 'application/json',
+                'Accept': 'application/json'}
+
+    async def _read_stdin(self):
+        """Reads STDIN and puts messages with its data onto the input_queue,
+        followed by an empty message at the end of the input and None.
+
+        :rtype: None
+        """
+
+        encode = self._stdin_encoder()
+        fd = sys.stdin.fileno()
+        read_size = self.INPUT_MIN_READ_SIZE
+
+        while True:
+            chunk = await _read_when_ready(fd, read_size)
+            if not chunk:
+                break
+
+            await self.input_queue.put(encode(chunk))
+            read_size = self._next_read_size(read_size, len(chunk))
+
+        await self.input_queue.put(encode(b''))
+        await self.input_queue.put(None)
+
+    async def _send_heartbeats(self):
+        """Puts a heartbeat message onto the input_queue every
+        `HEARTBEAT_INTERVAL` seconds.
+
+        :rtype: None
+        """
+
+        message = self.encoder.encode(self._heartbeat_message())
+
+        while True:
+            await self.input_queue.put(message)
+            await asyncio.sleep(self.HEARTBEAT_INTERVAL)
+
+    def _window_resize(self):
+        """SIGWINCH handler which sends the new dimensions of the terminal.
+        The message is dropped if the input_queue is full; the next resize
+        sends the current dimensions again.
+
+        :rtype: None
+        """
+
+        try:
+            self.input_queue.put_nowait(
+                self.encoder.encode(self._window_size_message()))
+        except asyncio.QueueFull:
+            pass
+
+    async def _write_output(self, response):
+        """Reads the output stream of the session and writes its data to
+        STDOUT and STDERR. The data is written once `OUTPUT_FLUSH_SIZE`
+        bytes are buffered, all the received data is processed, or, when
+        attached to a tty, right away.
+
+        :param response: response to the LAUNCH_NESTED_CONTAINER_SESSION
+                         call
+        :type response: asynchttp.Response
+        :rtype: None
+        """
+
+        writer = _OutputWriter(self.decoder,
+                               self.stdout or sys.stdout,
+                               self.stderr or sys.stderr,
+                               self.OUTPUT_FLUSH_SIZE)
+
+        read = asyncio.ensure_future(response.read_some())
+        try:
+            while True:
+                data = await read
+                if not data:
+                    break
+
+                read = asyncio.ensure_future(response.read_some())
+                writer.write(data)
+
+                # Give the next read a chance to take the data which
+                # was already received. If there is none, write the
+                # output out.
+                await asyncio.sleep(0)
+                if self.tty or not read.done():
+                    writer.flush()
+        finally:
+            read.cancel()
+
+        writer.flush()
+
+
+class _OutputWriter(object):
+    """Decodes the output stream of a nested container session and writes
+    the data of its DATA messages to STDOUT or STDERR. The data is buffered
+    until `flush_size` bytes are buffered or :py:meth:`flush` is called.
+    Output to STDOUT and STDERR is written in the order it was received.
+
+    :param decoder: RecordIO decoder of the output stream
+    :type decoder: recordio.Decoder
+    :param stdout: stream to write STDOUT to. The data is written to its
+                   `buffer` if it is a text stream.
+    :type stdout: file
+    :param stderr: stream to write STDERR to
+    :type stderr: file
+    :param flush_size: number of bytes to buffer
+    :type flush_size: int
+    """
+
+    def __init__(self, decoder, stdout, stderr, flush_size):
+        self._decoder = decoder
+        self._streams = {'STDOUT': stdout, 'STDERR': stderr}
+        self._flush_size = flush_size
+
+        # Decoded data not written yet, and the stream it belongs to.
+        self._buf = bytearray()
+        self._buf_stream = None
+
+    def write(self, data):
+        """Decodes a part of the output stream and buffers its data.
+
+        :param data: RecordIO encoded messages, possibly incomplete
+        :type data: bytes
+        :rtype: None
+        """
+
+        try:
+            records = self._decoder.decode(data)
+        except Exception as e:
+            raise DCOSException(
+                "Error parsing output stream: {error}".format(error=e))
+
+        for record in records:
+            if record.get('type') != 'DATA':
+                continue
+
+            output = record['data']
+            if not output.get('data'):
+                raise DCOSException(
+                    "Error no 'data' field in output message")
+
+            stream = self._streams.get(output.get('type'))
+            if stream is None:
+                raise DCOSException(
+                    "Unsupported data type in output stream")
+
+            if stream is not self._buf_stream:
+                self.flush()
+                self._buf_stream = stream
+
+            self._buf.extend(base64.b64decode(output['data']))
+            if len(self._buf) >= self._flush_size:
+                self.flush()
+
+    def flush(self):
+        """Writes the buffered data.
+
+        :rtype: None
+        """
+
+        if self._buf:
+            stream = self._buf_stream
+            getattr(stream, 'buffer', stream).write(self._buf)
+            stream.flush()
+            del self._buf[:]
+
+
+TaskExecResult = collections.namedtuple(
+    'TaskExecResult', ['task_id', 'exit_code', 'elapsed', 'error'])
+"""The outcome of running a command in a task with :py:func:`exec_tasks`:
+the command's exit code (None if it is unknown), the number of seconds
+the session took, and the error which stopped it, if any."""
+
+
+def exec_tasks(task_ids, cmd, args=None, parallel=10, client=None,
+               master=None, stdout=None, stderr=None):
+    """Runs a command in a new nested container of each of the tasks, at
+    most `parallel` at a time. The sessions run on one event loop and share
+    a connection pool, so sessions with the same agent reuse its
+    connections. Each line of output is prefixed with its task's ID.
+
+    :param task_ids: IDs of the tasks
+    :type task_ids: [str]
+    :param cmd: the command to launch inside the tasks' containers
+    :type cmd: str
+    :param args: additional arguments for the command
+    :type args: [str]
+    :param parallel: maximum number of concurrent sessions
+    :type parallel: int
+    :param client: client to use, instead of creating one
+    :type client: DCOSClient | None
+    :param master: master state to find the tasks in, instead of
+                   fetching it
+    :type master: Master | None
+    :param stdout: stream to write the commands' STDOUT to, instead of
+                   sys.stdout
+    :type stdout: file | None
+    :param stderr: stream to write the commands' STDERR to, instead of
+                   sys.stderr
+    :type stderr: file | None
+    :returns: the results, in the order of `task_ids`
+    :rtype: [TaskExecResult]
+    """
+
+    if client is None:
+        client = DCOSClient()
+    if master is None:
+        master = get_master(client)
+
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    width = max([len(task_id) for task_id in task_ids] or [0])
+    pool = asynchttp.ConnectionPool()
+
+    async def _exec(task_id, semaphore):
+        prefix = '{} | '.format(task_id.ljust(width)).encode('utf-8')
+        task_stdout = _LinePrefixer(prefix, stdout)
+        task_stderr = _LinePrefixer(prefix, stderr)
+
+        async with semaphore:
+            start = time.time()
+            try:
+                task_io = AsyncTaskIO(
+                    task_id, cmd, args or [], client=client, master=master,
+                    stdout=task_stdout, stderr=task_stderr, pool=pool)
+                await task_io.session()
+                exit_code = await task_io.wait()
+            except DCOSException as e:
+                return TaskExecResult(task_id, None, time.time() - start, e)
+            finally:
+                task_stdout.close()
+                task_stderr.close()
+
+        return TaskExecResult(task_id, exit_code, time.time() - start, None)
+
+    async def _exec_all():
+        semaphore = asyncio.Semaphore(max(parallel, 1))
+        try:
+            return await asyncio.gather(
+                *[_exec(task_id, semaphore) for task_id in task_ids])
+        finally:
+            pool.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_exec_all())
+    finally:
+        loop.close()
+
+
+class _LinePrefixer(object):
+    """A binary stream which writes complete lines to `stream`, each
+    prefixed with `prefix`, so that the output of concurrent sessions
+    sharing `stream` is interleaved line by line.
+
+    :param prefix: prefix of the lines
+    :type prefix: bytes
+    :param stream: stream to write the lines to
+    :type stream: file
+    """
+
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = getattr(stream, 'buffer', stream)
+        self._partial = b''
+
+    def write(self, data):
+        """
+        :param data: data to write
+        :type data: bytes
+        :rtype: None
+        """
+
+        lines = (self._partial + bytes(data)).split(b'\n')
+        self._partial = lines.pop()
+        if lines:
+            self._stream.write(b''.join(
+                self._prefix + line + b'\n' for line in lines))
+
+    def flush(self):
+        """
+        :rtype: None
+        """
+
+        self._stream.flush()
+
+    def close(self):
+        """Writes the last line, even if it is incomplete.
+
+        :rtype: None
+        """
+
+        if self._partial:
+            self._stream.write(self._prefix + self._partial + b'\n')
+            self._partial = b''
+        self._stream.flush()
+
+
+def _exit_code(status):
+    """Decodes the exit status of a nested container, which is the status
+    returned by wait(2).
+
+    :param status: exit status
+    :type status: int | None
+    :returns: the exit code, 128 plus the number of the signal which
+              killed the process, or None if `status` is None
+    :rtype: int | None
+    """
+
+    if status is None:
+        return None
+    if status & 0x7f == 0:
+        return (status >> 8) & 0xff
+    return 128 + (status & 0x7f)
+
+
+_TaskEntry = collections.namedtuple(
+    '_TaskEntry',
+    ['seq', 'id', 'task', 'framework', 'completed', 'framework_completed'])
+"""A task in the master's state.json, along with its framework and whether
+it comes from a `completed_*` list.  `seq` is the task's position in
+state.json, used to keep results in their original order."""
+
+
+class _MasterIndex(object):
+    """Hash and prefix indexes over a master's state.json, so that lookups
+    by ID don't have to walk every framework and task.
+
+    :param state: Mesos master's state.json
+    :type state: dict
+    """
+
+    def __init__(self, state):
+        self.entries = []  # [_TaskEntry] in state.json order
+        self.tasks = {}  # task id -> [_TaskEntry]
+        self.frameworks = {}  # framework id -> framework dict
+        self.slaves = {}  # slave id -> slave dict
+        self.slave_tasks = {}  # slave id -> [_TaskEntry]
+
+        for slave in state.get('slaves', []):
+            self.slaves[slave['id']] = slave
+
+        frameworks = [(framework, True)
+                      for framework in state.get('completed_frameworks', [])]
+        frameworks += [(framework, False)
+                       for framework in state.get('frameworks', [])]
+
+        for framework, framework_completed in frameworks:
+            self.frameworks.setdefault(framework['id'], framework)
+            for key, completed in (('tasks', False),
+                                   ('completed_tasks', True)):
+                for task in framework.get(key, []):
+                    entry = _TaskEntry(len(self.entries), task['id'], task,
+                                       framework, completed,
+                                       framework_completed)
+                    self.entries.append(entry)
+                    self.tasks.setdefault(entry.id, []).append(entry)
+                    if 'slave_id' in task:
+                        self.slave_tasks.setdefault(
+                            task['slave_id'], []).append(entry)
+
+        # sorted (task id, seq) pairs, searched with bisect for prefix
+        # lookups.  Built on first use.
+        self._sorted_ids = None
+
+    def prefix_matches(self, prefix):
+        """Returns the entries of the tasks whose ID starts with `prefix`,
+        in state.json order.
+
+        :param prefix: task ID prefix
+        :type prefix: str
+        :returns: matching entries
+        :rtype: [_TaskEntry]
+        """
+
+        seqs = sorted(self._prefix_seqs(prefix))
+        return [self.entries[seq] for seq in seqs]
+
+    def glob_matches(self, pattern):
+        """Returns the positions of the tasks whose ID matches the glob
+        `pattern`.  Only the IDs sharing the pattern's literal prefix are
+        tested against it.
+
+        :param pattern: glob pattern
+        :type pattern: str
+        :returns: positions of the matching entries
+        :rtype: set(int)
+        """
+
+        prefix = re.split(r'[*?\[]', pattern, 1)[0]
+        if prefix == pattern:
+            # Without wildcards a glob only matches the exact ID, which the
+            # substring filter already covers.
+            return set()
+
+        match = re.compile(fnmatch.translate(pattern)).match
+        return set(seq for seq in self._prefix_seqs(prefix)
+                   if match(self.entries[seq].id))
+
+    def _prefix_seqs(self, prefix):
+        """
+        :param prefix: task ID prefix
+        :type prefix: str
+        :returns: positions of the tasks whose ID starts with `prefix`
+        :rtype: generator of int
+        """
+
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(
+                (entry.id, entry.seq) for entry in self.entries)
+
+        start = bisect.bisect_left(self._sorted_ids, (prefix,))
+        for i in range(start, len(self._sorted_ids)):
+            task_id, seq = self._sorted_ids[i]
+            if not task_id.startswith(prefix):
+                break
+            yield seq
+
+
+def _task_entry_selected(entry, completed, all_):
+    """Returns whether a task index entry is selected by the `completed`
+    and `all_` flags of :py:meth:`Master.tasks`.
+
+    :param entry: task index entry
+    :type entry: _TaskEntry
+    :param completed: completed tasks only
+    :type completed: bool
+    :param all_: include all tasks
+    :type all_: bool
+    :rtype: bool
+    """
+
+    if entry.completed and not (completed or all_):
+        return False
+    if completed and entry.task.get("state") not in COMPLETED_TASK_STATES:
+        return False
+    return True
+
+
+async def _read_when_ready(fd, size):
+    """Reads up to `size` bytes from `fd` once it is readable, without
+    blocking the event loop while waiting for data. Unlike a pipe
+    transport, this doesn't switch `fd` to non-blocking mode, which
+    would also affect a terminal shared with STDOUT.
+
+    :param fd: file descriptor to read
+    :type fd: int
+    :param size: maximum number of bytes to read
+    :type size: int
+    :returns: the data, or b'' at the end of the file
+    :rtype: bytes
+    """
+
+    loop = asyncio.get_event_loop()
+    readable = loop.create_future()
+
+    def _readable():
+        if not readable.done():
+            readable.set_result(None)
+
+    try:
+        loop.add_reader(fd, _readable)
+    except NotImplementedError:
+        # e.g. the proactor event loop on Windows
+        return (await loop.run_in_executor(None, os.read, fd, size))
+    except OSError:
+        # Regular files can't be polled, and reading them doesn't block
+        return os.read(fd, size)
+
+    try:
+        await readable
+    finally:
+        loop.remove_reader(fd)
+    return os.read(fd, size)
 
 
 def parse_pid(pid):
@@ -95,12 +95,16 @@ class Decoder(object):
     def __init__(self, deserialize):
         self.deserialize = deserialize
         self.state = self.HEADER
-        self.buffer = bytes("", "UTF-8")
+        self.buffer = bytearray()
         self.length = 0
 
     def decode(self, data):
         """Decode a 'RecordIO' formatted message to its original type.
 
+        Headers are found with a buffer search and each record is sliced
+        out in one step. Only the incomplete record at the end of `data`
+        is kept between calls, in a buffer that grows in place.
+
         :param data: an array of 'UTF-8' encoded bytes that make up a
                       partial 'RecordIO' message. Subsequent calls to this
                       function maintain state to build up a full 'RecordIO'
@@ -116,40 +120,54 @@ class Decoder(object):
         if self.state == self.FAILED:
             raise DCOSException("Decoder is in a FAILED state")
 
-        records = []
+        # Parse `data` in place unless there is a partial record left from
+        # the previous call.
+        if self.buffer:
+            self.buffer += data
+            source = self.buffer
+        else:
+            source = data
 
-        for c in data:
-            if self.state == self.HEADER:
-                if c != ord('\n'):
-                    self.buffer += bytes([c])
-                    continue
-
-                try:
-                    self.length = int(self.buffer.decode("UTF-8"))
-                except Exception as exception:
-                    self.state = self.FAILED
-                    raise DCOSException("Failed to decode length"
-                                        "'{buffer}': {error}"
-                                        .format(buffer=self.buffer,
-                                                error=exception))
-
-                self.buffer = bytes("", "UTF-8")
-                self.state = self.RECORD
-
-                # Note that for 0 length records, we immediately decode.
-                if self.length <= 0:
-                    records.append(self.deserialize(self.buffer))
+        records = []
+        pos = 0
+        with memoryview(source) as view:
+            while True:
+                if self.state == self.HEADER:
+                    end = source.find(b'\n', pos)
+                    if end == -1:
+                        break
+
+                    try:
+                        self.length = int(bytes(view[pos:end]))
+                    except Exception as exception:
+                        self.state = self.FAILED
+                        raise DCOSException("Failed to decode length"
+                                            "'{buffer}': {error}"
+                                            .format(buffer=bytes(
+                                                view[pos:end]),
+                                                    error=exception))
+
+                    pos = end + 1
+                    self.state = self.RECORD
+
+                    # Note that for 0 length records, we immediately decode.
+                    if self.length <= 0:
+                        records.append(self.deserialize(b''))
+                        self.state = self.HEADER
+
+                elif self.state == self.RECORD:
+                    if len(source) - pos < self.length:
+                        break
+
+                    end = pos + self.length
+                    records.append(self.deserialize(bytes(view[pos:end])))
+                    pos = end
                     self.state = self.HEADER
 
-            elif self.state == self.RECORD:
-                assert self.length
-                assert len(self.buffer) < self.length
+            if source is data:
+                self.buffer += view[pos:]
 
-                self.buffer += bytes([c])
-
-                if len(self.buffer) == self.length:
-                    records.append(self.deserialize(self.buffer))
-                    self.buffer = bytes("", "UTF-8")
-                    self.state = self.HEADER
+        if source is self.buffer:
+            del self.buffer[:pos]
 
         return records
@@ -2,7 +2,7 @@ import json
 
 import jsonschema
 import pkg_resources
-
+import six
 from six.moves import urllib
 
 from dcos import http, util
@@ -102,6 +102,16 @@ class RpcClient(object):
 
         return 'Error: {}'.format(message)
 
+    def url(self, path):
+        """
+        :param path: the endpoint path to append to this object's base URL
+        :type path: str
+        :returns: the URL of the endpoint
+        :rtype: str
+        """
+
+        return self._base_url + path.lstrip('/')
+
     def http_req(self, method_fn, path, *args, **kwargs):
         """Make an HTTP request, and raise a DCOS-specific exception for
         HTTP error codes.
@@ -118,7 +128,7 @@ class RpcClient(object):
         :rtype: requests.Response
         """
 
-        url = self._base_url + path.lstrip('/')
+        url = self.url(path)
 
         if 'timeout' not in kwargs:
             kwargs['timeout'] = self._timeout
@@ -145,7 +155,9 @@ class RpcClient(object):
                 request_method=e.response.request.method,
                 request_url=e.response.request.url,
                 json_body=json_body)
-            raise DCOSException(message)
+            # the HTTP error stays attached as the cause, so that callers can
+            # tell server errors worth retrying from the others
+            six.raise_from(DCOSException(message), e)
 
 
 def _get_response_text(response):
@@ -1,6 +1,22 @@
+import collections
+import contextlib
+
+import requests
+from requests.packages import urllib3
+from six.moves import http_client
 from sseclient import SSEClient
 
-from . import http
+from . import http, util
+from .errors import DCOSConnectionError
+
+logger = util.get_logger(__name__)
+
+READ_SIZE = 64 * 1024
+"""Maximum number of bytes to read from the connection at once"""
+
+Event = collections.namedtuple('Event', ['id', 'event', 'data'])
+"""A server sent event: the last event ID received, the event type, or None
+for the default type, and the event's data."""
 
 
 def get(url, **kwargs):
@@ -17,3 +33,154 @@ def get(url, **kwargs):
     :rtype: sseclient.SSEClient
     """
     return SSEClient(url, session=http, **kwargs)
+
+
+def stream(url, **kwargs):
+    """Make a get request to a streaming endpoint which implements SSE and
+    parse the events as they are received. Unlike :py:func:`get`, the
+    events are parsed with :py:class:`EventParser` straight from the
+    connection's buffer, and are returned in batches: all the events
+    completed by one read. It does not reconnect when the stream ends or
+    drops; a dropped connection raises DCOSConnectionError.
+
+    :param url: server sent events streaming URL
+    :type url: str
+    :param kwargs: arbitrary params for `dcos.http.get`
+    :type kwargs: dict
+    :returns: lists of the events completed by each read
+    :rtype: generator of [Event]
+    """
+
+    kwargs.setdefault('headers', {'Accept': 'text/event-stream'})
+    response = http.get(url, stream=True, **kwargs)
+    return read_events(response)
+
+
+def read_events(response):
+    """Parses the events of a streamed `text/event-stream` response as they
+    are received, like :py:func:`stream`, and closes the response once the
+    stream ends or the generator is closed.
+
+    :param response: streamed response
+    :type response: requests.Response
+    :returns: lists of the events completed by each read
+    :rtype: generator of [Event]
+    """
+
+    with contextlib.closing(response):
+        parser = EventParser()
+        received = _iter_received(response)
+        while True:
+            try:
+                chunk = next(received)
+            except StopIteration:
+                return
+            except (requests.exceptions.RequestException,
+                    urllib3.exceptions.HTTPError,
+                    http_client.HTTPException,
+                    OSError) as e:
+                logger.info('Lost the connection to %s: %s', response.url, e)
+                raise DCOSConnectionError(response.url)
+
+            events = parser.feed(chunk)
+            if events:
+                yield events
+
+
+def _iter_received(response):
+    """Reads the body of a streamed response as it is received.
+
+    :param response: response to read
+    :type response: requests.Response
+    :returns: the data returned by each read, up to `READ_SIZE` bytes
+    :rtype: iterator of bytes
+    """
+
+    # read1() returns whatever is already buffered instead of waiting
+    # for a full read; older urllib3 versions only return each HTTP chunk
+    # as it arrives.
+    read1 = getattr(response.raw, 'read1', None)
+    if read1 is None:
+        return response.iter_content(chunk_size=None)
+    return iter(lambda: read1(READ_SIZE), b'')
+
+
+class EventParser(object):
+    """Incremental parser of a `text/event-stream`. Data is fed to it as it
+    is received, in pieces of any size, and complete lines are parsed in
+    place in its buffer. Lines may end with LF or CRLF.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._data = []
+        self._event = None
+
+        self.last_event_id = ''
+        """ID of the last event, which applies to all the later events
+        until the next ID is received"""
+
+        self.retry = None
+        """Reconnection time in milliseconds requested by the server"""
+
+    def feed(self, data):
+        """Parses a piece of the stream.
+
+        :param data: the next piece of the stream
+        :type data: bytes
+        :returns: the events completed by `data`
+        :rtype: [Event]
+        """
+
+        buf = self._buf
+        buf += data
+
+        events = []
+        start = 0
+        while True:
+            end = buf.find(b'\n', start)
+            if end < 0:
+                break
+
+            line_end = end
+            if line_end > start and buf[line_end - 1] == 13:  # CR
+                line_end -= 1
+
+            if line_end == start:
+                # A blank line ends the event
+                if self._data:
+                    events.append(Event(self.last_event_id,
+                                        self._event,
+                                        '\n'.join(self._data)))
+                    del self._data[:]
+                self._event = None
+            elif buf[start] != 58:  # lines starting with ':' are comments
+                self._field(bytes(buf[start:line_end]))
+
+            start = end + 1
+
+        if start:
+            del buf[:start]
+        return events
+
+    def _field(self, line):
+        """
+        :param line: a field of the event, without the line ending
+        :type line: bytes
+        :rtype: None
+        """
+
+        name, _, value = line.partition(b':')
+        if value[:1] == b' ':
+            value = value[1:]
+
+        if name == b'data':
+            self._data.append(value.decode('utf-8', 'replace'))
+        elif name == b'id':
+            if b'\0' not in value:
+                self.last_event_id = value.decode('utf-8', 'replace')
+        elif name == b'event':
+            self._event = value.decode('utf-8', 'replace')
+        elif name == b'retry':
+            if value.isdigit():
+                self.retry = int(value)
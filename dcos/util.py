@@ -12,6 +12,7 @@ import shutil
 import stat
 import sys
 import tempfile
+import threading
 import time
 
 import jsonschema
@@ -625,25 +626,159 @@ def io_exception(path, errno):
 
 
 STREAM_CONCURRENCY = 20
+"""Number of threads in the pool shared by all `stream` calls"""
 
+STREAM_KEY_CONCURRENCY = 4
+"""Default maximum number of calls `stream` runs at once for objects with
+the same key, e.g. for files on the same agent"""
 
-def stream(fn, objs):
+_executor = None
+_executor_lock = threading.Lock()
+
+_stream_local = threading.local()
+"""`in_stream` is True in the pool's threads while they run a `stream`
+call"""
+
+
+def get_executor():
+    """Returns the thread pool shared by the whole process.  It is created
+    on first use, so that fan-outs reuse the same STREAM_CONCURRENCY
+    threads, and with them their pooled HTTP connections, instead of
+    starting new ones every time.
+
+    :returns: the shared thread pool
+    :rtype: concurrent.futures.ThreadPoolExecutor
+    """
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                STREAM_CONCURRENCY)
+        return _executor
+
+
+def stream(fn, objs, ordered=False, key=None,
+           key_concurrency=STREAM_KEY_CONCURRENCY):
     """Apply `fn` to `objs` in parallel, yielding the (Future, obj) for
-    each as it completes.
+    each as it completes, or in the order of `objs` if `ordered` is True.
+
+    The calls run on the shared thread pool, and at most
+    2 * STREAM_CONCURRENCY objects are taken from `objs` at a time, so
+    `objs` may be a large or lazy iterable.  Calls that haven't started
+    are cancelled when the caller stops iterating, e.g. on Ctrl-C.
+
+    When `fn` calls `stream` itself, the nested calls run one at a time in
+    the calling thread: waiting for the shared pool from one of its own
+    threads could deadlock it.
 
     :param fn: function
     :type fn: function
     :param objs: objs
-    :type objs: objs
+    :type objs: iterable
+    :param ordered: whether to yield in the order of `objs`
+    :type ordered: bool
+    :param key: if given, at most `key_concurrency` calls run at once for
+                objs with the same `key(obj)`, e.g. the same host
+    :type key: function | None
+    :param key_concurrency: maximum number of calls per key
+    :type key_concurrency: int
     :returns: iterator over (Future, typeof(obj))
     :rtype: iterator over (Future, typeof(obj))
 
     """
 
-    with concurrent.futures.ThreadPoolExecutor(STREAM_CONCURRENCY) as pool:
-        jobs = {pool.submit(fn, obj): obj for obj in objs}
-        for job in concurrent.futures.as_completed(jobs):
-            yield job, jobs[job]
+    if getattr(_stream_local, 'in_stream', False):
+        for obj in objs:
+            job = concurrent.futures.Future()
+            try:
+                job.set_result(fn(obj))
+            except Exception as e:
+                job.set_exception(e)
+            yield job, obj
+        return
+
+    executor = get_executor()
+    window = 2 * STREAM_CONCURRENCY
+    objs = iter(objs)
+    exhausted = False
+
+    # objs taken from `objs` but not submitted yet, per key
+    waiting = collections.OrderedDict()
+    num_waiting = 0
+    # submitted futures, and how many are running per key
+    running = {}
+    running_per_key = collections.Counter()
+    # completed (future, obj) pairs waiting for their turn, when `ordered`
+    completed = {}
+    index = 0
+    next_index = 0
+
+    try:
+        while True:
+            while not exhausted and \
+                    num_waiting + len(running) + len(completed) < window:
+                try:
+                    obj = next(objs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                obj_key = key(obj) if key is not None else None
+                waiting.setdefault(obj_key, collections.deque()).append(
+                    (index, obj))
+                num_waiting += 1
+                index += 1
+
+            for obj_key in list(waiting):
+                pending = waiting[obj_key]
+                while pending and (key is None or
+                                   running_per_key[obj_key] < key_concurrency):
+                    obj_index, obj = pending.popleft()
+                    num_waiting -= 1
+                    running_per_key[obj_key] += 1
+                    running[executor.submit(_stream_call, fn, obj)] = (
+                        obj_index, obj, obj_key)
+                if not pending:
+                    del waiting[obj_key]
+
+            if not running:
+                return
+
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for job in done:
+                obj_index, obj, obj_key = running.pop(job)
+                running_per_key[obj_key] -= 1
+                if ordered:
+                    completed[obj_index] = (job, obj)
+                else:
+                    yield job, obj
+
+            while next_index in completed:
+                yield completed.pop(next_index)
+                next_index += 1
+    finally:
+        for job in running:
+            job.cancel()
+
+
+def _stream_call(fn, obj):
+    """Calls `fn` on `obj` in a thread of the shared pool, marking the
+    thread as running a `stream` call meanwhile.
+
+    :param fn: function
+    :type fn: function
+    :param obj: argument of `fn`
+    :type obj: object
+    :returns: the result of `fn`
+    :rtype: object
+    """
+
+    _stream_local.in_stream = True
+    try:
+        return fn(obj)
+    finally:
+        _stream_local.in_stream = False
 
 
 def get_ssh_options(config_file, options):
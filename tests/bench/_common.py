@@ -0,0 +1,174 @@
+"""Helpers shared by the benchmark scripts in this directory.
+
+The scripts are not tests: run them directly, e.g.
+
+    python tests/bench/bench_master_endpoints.py
+
+with `dcos` (and `dcoscli`, for the CLI benchmarks) importable.  Run them
+again on a checkout from before a change to get its baseline.
+"""
+
+import contextlib
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import mock
+
+# The CLI benchmarks import dcoscli from the source tree
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+sys.path[:0] = [_ROOT, os.path.join(_ROOT, 'cli')]
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Server(object):
+    """A local HTTP server, run on a background thread, which answers each
+    request with `handle(method, path, query, body)`.  `handle` returns
+    the status and the response body, a JSON value or bytes.  The server
+    records the paths requested and counts the bytes it receives and
+    sends.
+
+    :param handle: request handler
+    :type handle: function
+    :param latency: seconds to wait before answering each request
+    :type latency: float
+    """
+
+    def __init__(self, handle, latency=0):
+        self.paths = []
+        self.received = 0
+        self.bytes = 0
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _answer(self):
+                path, _, query = self.path.partition('?')
+                request_body = self._read_body()
+                time.sleep(latency)
+
+                status, body = handle(self.command, path, query,
+                                      request_body)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode('utf-8')
+                server.paths.append(path)
+                server.received += len(request_body)
+                server.bytes += len(body)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_body(self):
+                if self.headers.get('Transfer-Encoding') != 'chunked':
+                    length = int(self.headers.get('Content-Length') or 0)
+                    return self.rfile.read(length)
+
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().split(b';')[0], 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return b''.join(chunks)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+
+            do_GET = do_POST = do_PUT = do_DELETE = _answer  # noqa: N815
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    @property
+    def requests(self):
+        """
+        :returns: the number of requests answered
+        :rtype: int
+        """
+
+        return len(self.paths)
+
+    @property
+    def url(self):
+        """
+        :returns: the base URL of the server, with a trailing slash
+        :rtype: str
+        """
+
+        return 'http://127.0.0.1:{}/'.format(self._server.server_address[1])
+
+    def reset(self):
+        """Forgets the requests answered so far."""
+
+        self.paths = []
+        self.received = 0
+        self.bytes = 0
+
+
+@contextlib.contextmanager
+def cluster_config(dcos_url, **values):
+    """Points the CLI at `dcos_url`, without reading any config file.
+
+    :param dcos_url: URL of the cluster
+    :type dcos_url: str
+    :param values: other `core` properties
+    :type values: dict
+    """
+
+    from dcos import config
+
+    core = dict(values, dcos_url=dcos_url)
+    toml_config = config.Toml({'core': core})
+    with mock.patch('dcos.config.get_config', return_value=toml_config):
+        yield
+
+
+class NullWriter(object):
+    """A stdout replacement which discards what is written to it."""
+
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+@contextlib.contextmanager
+def quiet():
+    """Discards what is printed to stdout."""
+
+    stdout = sys.stdout
+    sys.stdout = NullWriter()
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
+
+
+def timed(fn, *args, **kwargs):
+    """
+    :returns: the result of `fn`, and how many seconds it took
+    :rtype: (object, float)
+    """
+
+    start = time.time()
+    result = fn(*args, **kwargs)
+    return result, time.time() - start
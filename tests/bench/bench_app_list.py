@@ -0,0 +1,101 @@
+"""Times `dcos marathon app list` against a local fake Marathon with
+APPS apps (default 10000), 300 deployments and a 3000 app launch queue,
+which answers each request after LATENCY seconds (default 0.2).  Also
+times joining the queue and the deployments into the app table and
+rendering it, on data already fetched.
+"""
+
+import os
+
+from _common import cluster_config, quiet, Server, timed
+from dcoscli import tables
+from dcoscli.marathon import main as marathon_main
+
+from dcos import marathon, rpcclient
+
+APPS = int(os.environ.get('APPS', 10000))
+LATENCY = float(os.environ.get('LATENCY', 0.2))
+DEPLOYMENTS = 300
+QUEUED = 3000
+
+
+def _marathon_fixture():
+    """
+    :returns: the apps, deployments and launch queue of the fake Marathon
+    :rtype: (list, list, list)
+    """
+
+    deployed = APPS * 3 // 5
+    apps = [{
+        'id': '/group-{}/app-{}'.format(i % 100, i),
+        'cmd': 'sleep {}'.format(i),
+        'args': None,
+        'mem': 128.0,
+        'cpus': 0.1,
+        'instances': 3,
+        'tasksRunning': 3,
+        'tasksHealthy': 3,
+        'tasksStaged': 0,
+        'tasksUnhealthy': 0,
+        'healthChecks': [{'protocol': 'HTTP'}] if i % 2 else [],
+        'container': None,
+        'deployments': ([{'id': 'dep-{}'.format(i % DEPLOYMENTS)}]
+                        if i < deployed else []),
+        'labels': {'team': 'x'},
+        'env': {'A': 'b'},
+    } for i in range(APPS)]
+    deployments = [{
+        'id': 'dep-{}'.format(d),
+        'currentActions': [{'action': 'ScaleApplication',
+                            'app': apps[i]['id']}
+                           for i in range(d, deployed, DEPLOYMENTS)],
+        'affectedApps': [],
+        'steps': [],
+        'currentStep': 1,
+        'totalSteps': 1,
+        'version': 'v',
+    } for d in range(DEPLOYMENTS)]
+    queue = [{'app': {'id': apps[i * 3 % APPS]['id']},
+              'delay': {'overdue': i % 2 == 0},
+              'count': 1}
+             for i in range(QUEUED)]
+    return apps, deployments, queue
+
+
+def _render(client):
+    apps = client.get_apps()
+    deployments = client.get_deployments()
+    queued_apps = client.get_queued_apps()
+
+    def _join():
+        marathon_main._enhance_row_with_overdue_information(
+            apps, queued_apps)
+        return str(tables.app_table(apps, deployments))
+
+    return timed(_join)[1]
+
+
+def main():
+    apps, deployments, queue = _marathon_fixture()
+    responses = {
+        '/v2/apps': {'apps': apps},
+        '/v2/deployments': deployments,
+        '/v2/queue': {'queue': queue},
+    }
+    server = Server(
+        lambda method, path, query, body: (200, responses[path]),
+        latency=LATENCY)
+
+    client = marathon.Client(rpcclient.create_client(server.url, 60))
+    subcommand = marathon_main.MarathonSubcommand(None, lambda: client)
+    with cluster_config(server.url), quiet():
+        _, elapsed = timed(subcommand.list, False)
+        rendering = _render(client)
+
+    print('{} apps, {:.0f} ms latency: app list {:.2f}s, joins and '
+          'rendering {:.2f}s'.format(APPS, LATENCY * 1000, elapsed,
+                                     rendering))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Measures how fast `dcos task exec` writes a command's output: a fake
+agent, in a child process, streams a session of RecordIO DATA records,
+one HTTP chunk each as the agent sends them, and TaskIO writes them to
+stdout and stderr.  Every 50th record goes to stderr.
+
+RECORD sets the size of the output in each record (default 4096 bytes),
+MB the total output (default 64).  Also reports how many writes and
+flushes reached stdout and stderr.
+"""
+
+import base64
+import json
+import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import mock
+import requests
+from _common import timed
+
+from dcos import mesos
+
+RECORD = int(os.environ.get('RECORD', 4096))
+MB = int(os.environ.get('MB', 64))
+
+
+def _session():
+    """
+    :returns: the RecordIO encoded records, and the output they carry
+    :rtype: ([bytes], int)
+    """
+
+    records = []
+    total = 0
+    while total < MB * 1024 * 1024:
+        i = len(records)
+        stream = 'STDERR' if i % 50 == 49 else 'STDOUT'
+        data = bytes([97 + i % 26]) * (RECORD - 1) + b'\n'
+        message = json.dumps({
+            'type': 'DATA',
+            'data': {'type': stream,
+                     'data': base64.b64encode(data).decode('ascii')},
+        }).encode('utf-8')
+        records.append(str(len(message)).encode('ascii') + b'\n' + message)
+        total += len(data)
+    return records, total
+
+
+def _serve_session(records):
+    """Answers one request with `records`, from a child process so the
+    agent doesn't share the CLI's interpreter lock.
+
+    :returns: the URL of the agent API
+    :rtype: str
+    """
+
+    class _Agent(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):  # noqa: N802
+            self.rfile.read(int(self.headers['Content-Length']))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/recordio')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for record in records:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(record), record))
+            self.wfile.write(b'0\r\n\r\n')
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), _Agent)
+    if os.fork() == 0:
+        server.handle_request()
+        os._exit(0)
+    server.socket.close()
+    return 'http://127.0.0.1:{}/api/v1'.format(server.server_address[1])
+
+
+class _Sink(object):
+    """Stands in for stdout and stderr, counting what is written."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.writes = 0
+        self.flushes = 0
+        self.buffer = self
+
+    def write(self, data):
+        self.bytes += len(data)
+        self.writes += 1
+        return len(data)
+
+    def flush(self):
+        self.flushes += 1
+
+    def isatty(self):
+        return False
+
+    def fileno(self):
+        return 1
+
+
+def _post(url, data=None, **kwargs):
+    # dcos.http.post without the cluster's auth and TLS configuration
+    return requests.post(url, data=data, headers=kwargs.get('headers'),
+                         stream=True)
+
+
+def main():
+    records, total = _session()
+
+    with mock.patch('dcos.mesos.DCOSClient') as client, \
+            mock.patch('dcos.mesos.get_master'):
+        client.return_value._mesos_master_url = None
+        task_io = mesos.TaskIO('task', 'cat', [])
+    task_io.agent_url = _serve_session(records)
+    task_io.parent_id = {'value': 'parent'}
+
+    stdout, stderr = _Sink(), _Sink()
+    with mock.patch('dcos.http.post', _post), \
+            mock.patch('sys.stdout', stdout), \
+            mock.patch('sys.stderr', stderr):
+        _, elapsed = timed(task_io.run)
+    os.wait()
+
+    assert stdout.bytes + stderr.bytes == total
+    print('{} MB in {} B records: {:.2f}s, {:.1f} MB/s, {} writes, '
+          '{} flushes'.format(MB, RECORD, elapsed, total / elapsed / 1e6,
+                              stdout.writes + stderr.writes,
+                              stdout.flushes + stderr.flushes))
+
+
+if __name__ == '__main__':
+    main()
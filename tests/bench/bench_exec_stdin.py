@@ -0,0 +1,59 @@
+"""Measures how fast `dcos task exec -i` streams its stdin to the agent:
+MB megabytes (default 64) are piped into TaskIO's input thread, and the
+ATTACH_CONTAINER_INPUT stream is posted to a local server which reads
+the chunked body.  Also reports the bytes sent, including the RecordIO
+and JSON framing.
+"""
+
+import os
+import threading
+
+import mock
+import requests
+from _common import Server, timed
+
+from dcos import mesos
+
+MB = int(os.environ.get('MB', 64))
+
+
+def _post(url, data=None, **kwargs):
+    # dcos.http.post without the cluster's auth and TLS configuration
+    return requests.post(url, data=data, headers=kwargs.get('headers'))
+
+
+def _write_stdin(fd):
+    block = os.urandom(1024 * 1024)
+    for _ in range(MB):
+        os.write(fd, block)
+    os.close(fd)
+
+
+def main():
+    server = Server(lambda method, path, query, body: (200, b''))
+
+    with mock.patch('dcos.mesos.DCOSClient') as client, \
+            mock.patch('dcos.mesos.get_master'):
+        client.return_value._mesos_master_url = None
+        task_io = mesos.TaskIO('task', 'cat', [], interactive=True)
+    task_io.agent_url = server.url + 'api/v1'
+    task_io.parent_id = {'value': 'parent'}
+    task_io.attach_input_event.set()
+
+    read_fd, write_fd = os.pipe()
+    stdin = mock.Mock()
+    stdin.fileno.return_value = read_fd
+
+    with mock.patch('sys.stdin', stdin), \
+            mock.patch('dcos.http.post', _post):
+        threading.Thread(target=_write_stdin, args=(write_fd,),
+                         daemon=True).start()
+        threading.Thread(target=task_io._input_thread, daemon=True).start()
+        _, elapsed = timed(task_io._attach_container_input)
+
+    print('{} MB of stdin in {:.2f}s: {:.1f} MB/s, {} bytes sent'.format(
+        MB, elapsed, MB * 1024 * 1024 / elapsed / 1e6, server.received))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Times `dcos service` and `dcos task` against a local fake Mesos master
+serving a synthetic cluster state, and counts the requests and bytes each
+command fetches from the master.
+
+The master answers state.json as well as the narrower /slaves and
+/frameworks endpoints, the way Mesos does.  The size of the cluster is set
+with the AGENTS, RUNNING and COMPLETED environment variables (defaults:
+1000 agents, 40000 running and 100000 completed tasks, about 137 MB of
+state.json).
+"""
+
+import os
+
+from _common import cluster_config, quiet, Server, timed
+from dcoscli.service.main import _service
+from dcoscli.task.main import _task
+
+AGENTS = int(os.environ.get('AGENTS', 1000))
+RUNNING = int(os.environ.get('RUNNING', 40000))
+COMPLETED = int(os.environ.get('COMPLETED', 100000))
+
+
+def _task_fixture(i, state):
+    return {
+        'id': 'app{}.{:08d}'.format(i % 300, i),
+        'name': 'app{}'.format(i % 300),
+        'framework_id': 'marathon',
+        'executor_id': '',
+        'slave_id': 'agent{}'.format(i % AGENTS),
+        'state': state,
+        'resources': {'cpus': 0.1, 'mem': 32, 'disk': 0, 'gpus': 0},
+        'statuses': [{
+            'state': state,
+            'timestamp': 1.5e9,
+            'container_status': {'network_infos': [
+                {'ip_addresses': [{'ip_address': '10.0.0.1'}]}]},
+        }] * 3,
+        'labels': [{'key': 'k{}'.format(j), 'value': 'v' * 20}
+                   for j in range(5)],
+        'discovery': {'name': 'x', 'ports': {'ports': [
+            {'number': 31000, 'protocol': 'tcp'}]}},
+    }
+
+
+def _state_fixture():
+    """
+    :returns: the state.json of the synthetic cluster
+    :rtype: dict
+    """
+
+    framework = {
+        'id': 'marathon',
+        'name': 'marathon',
+        'user': 'root',
+        'hostname': 'master1',
+        'active': True,
+        'resources': {'cpus': 1, 'mem': 1, 'disk': 1},
+        'tasks': [_task_fixture(i, 'TASK_RUNNING')
+                  for i in range(RUNNING)],
+        'completed_tasks': [_task_fixture(i, 'TASK_FINISHED')
+                            for i in range(RUNNING, RUNNING + COMPLETED)],
+    }
+    return {
+        'hostname': 'master1',
+        'id': 'master1-id',
+        'pid': 'master@10.0.0.1:5050',
+        'version': '1.2.0',
+        'slaves': [{'id': 'agent{}'.format(i),
+                    'hostname': 'agent{}'.format(i),
+                    'pid': 'slave(1)@10.0.1.{}:5051'.format(i % 250),
+                    'resources': {'cpus': 4}}
+                   for i in range(AGENTS)],
+        'frameworks': [framework],
+        'completed_frameworks': [],
+    }
+
+
+def main():
+    state = _state_fixture()
+    responses = {
+        '/mesos/master/state.json': state,
+        '/mesos/master/slaves': {'slaves': state['slaves']},
+        '/mesos/master/frameworks': {
+            'frameworks': state['frameworks'],
+            'completed_frameworks': state['completed_frameworks']},
+    }
+
+    def _handle(method, path, query, body):
+        if path not in responses:
+            return 404, b''
+        return 200, responses[path]
+
+    server = Server(_handle)
+    commands = [
+        ('dcos service', lambda: _service(False, False, False)),
+        ('dcos service --json', lambda: _service(False, False, True)),
+        ('dcos task', lambda: _task(None, False, False, False)),
+        ('dcos task --json', lambda: _task(None, False, False, True)),
+    ]
+    with cluster_config(server.url, timeout=60):
+        for name, command in commands:
+            server.reset()
+            with quiet():
+                _, elapsed = timed(command)
+            print('{:<20} {:6.2f}s {:7.1f} MB {:4d} requests  {}'.format(
+                name, elapsed, server.bytes / 1e6, server.requests,
+                ' '.join(sorted(set(server.paths)))))
+
+
+if __name__ == '__main__':
+    main()
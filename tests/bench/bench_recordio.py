@@ -0,0 +1,40 @@
+"""Measures the throughput of the RecordIO decoder, fed 64 kB chunks as
+they arrive from the agent, for records of 1 kB, 64 kB and 1 MB.
+
+MB sets how much is decoded for each record size (default 64).  The byte
+by byte decoder this replaced needs a smaller MB to finish in a
+reasonable time.
+"""
+
+import os
+
+from _common import timed
+
+from dcos import recordio
+
+MB = int(os.environ.get('MB', 64))
+CHUNK_SIZE = 64 * 1024
+RECORD_SIZES = [1024, 64 * 1024, 1024 * 1024]
+
+
+def _decode(chunks):
+    decoder = recordio.Decoder(lambda s: s)
+    return sum(len(decoder.decode(chunk)) for chunk in chunks)
+
+
+def main():
+    encoder = recordio.Encoder(lambda s: s)
+    for size in RECORD_SIZES:
+        count = max(MB * 1024 * 1024 // size, 1)
+        data = b''.join(encoder.encode(b'x' * size) for _ in range(count))
+        chunks = [data[i:i + CHUNK_SIZE]
+                  for i in range(0, len(data), CHUNK_SIZE)]
+
+        records, elapsed = timed(_decode, chunks)
+        assert records == count
+        print('{:>8d} B records {:9.1f} MB/s'.format(
+            size, len(data) / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Times reading the last lines of a task's log, as `dcos task log` and
+`dcos service log` do, from a fake files API with a 20 ms round trip
+which answers at most 64 kB per read, like the Mesos agents.  Each case
+reads the last N of 3N lines of a given size.
+"""
+
+import threading
+import time
+
+from _common import timed
+from dcoscli import log
+
+from dcos import mesos
+
+ROUND_TRIP = 0.02
+MAX_READ = 64 * 1024
+
+CASES = [
+    ('10 x 80 B lines', 10, 80),
+    ('1000 x 2 kB lines', 1000, 2000),
+    ('100 x 20 kB lines', 100, 20000),
+    ('100000 x 120 B lines', 100000, 120),
+    ('20000 x 1 kB lines', 20000, 1000),
+]
+
+
+class _FilesClient(object):
+    """Serves `master_file_read` from `content`, counting the reads.
+
+    :param content: the file
+    :type content: str
+    """
+
+    def __init__(self, content):
+        self.content = content.encode('utf-8')
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def master_file_read(self, path, length, offset):
+        with self._lock:
+            self.reads += 1
+        time.sleep(ROUND_TRIP)
+
+        if offset == -1:
+            return {'offset': len(self.content), 'data': ''}
+        if length == -1 or length > MAX_READ:
+            length = MAX_READ
+        data = self.content[offset:offset + length]
+        return {'offset': offset, 'data': data.decode('utf-8')}
+
+
+def main():
+    for name, count, size in CASES:
+        content = ''.join('{:07d}'.format(i) + 'x' * (size - 8) + '\n'
+                          for i in range(count * 3))
+        client = _FilesClient(content)
+        mesos_file = mesos.MesosFile('/x', dcos_client=client)
+
+        lines, elapsed = timed(
+            log._read_last_lines, count, mesos_file)
+        assert len(lines) == count
+        assert lines[-1].startswith('{:07d}'.format(count * 3 - 1))
+        print('{:<22} {:6.2f}s {:5d} reads'.format(
+            name, elapsed, client.reads))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+import asyncio
+import socket
+import threading
+
+import mock
+
+import pytest
+
+from dcos import asynchttp, config
+from dcos.errors import (DCOSAuthenticationException, DCOSConnectionError,
+                         DCOSException, DCOSHTTPException)
+
+
+CHUNKED_BODY = (b'5\r\nhello\r\n'
+                b'7;ext=1\r\n, world\r\n'
+                b'0\r\nTrailer: 1\r\n\r\n')
+
+
+@pytest.mark.parametrize('size', [1, 3, 100])
+def test_chunked_parser(size):
+    parser = asynchttp._ChunkedParser()
+    body = b''.join(parser.feed(CHUNKED_BODY[i:i + size])
+                    for i in range(0, len(CHUNKED_BODY), size))
+
+    assert body == b'hello, world'
+    assert parser.done
+
+
+def test_chunked_parser_invalid_size():
+    with pytest.raises(DCOSException):
+        asynchttp._ChunkedParser().feed(b'xyz\r\n')
+
+
+def _serve(responses, requests, heads=None):
+    """Starts a server which answers each request with the next of
+    `responses` and records the requests' bodies, and their heads in
+    `heads`."""
+
+    async def _handle(reader, writer):
+        while responses:
+            head = await reader.readuntil(b'\r\n\r\n')
+            if heads is not None:
+                heads.append(head)
+            if b'Transfer-Encoding: chunked' in head:
+                body = b''
+                while True:
+                    size = int((await reader.readline()).strip(), 16)
+                    body += (await reader.readexactly(size + 2))[:-2]
+                    if not size:
+                        break
+            else:
+                length = int(head.split(b'Content-Length: ')[1]
+                             .split(b'\r\n')[0])
+                body = await reader.readexactly(length)
+            requests.append(body)
+            writer.write(responses.pop(0))
+        writer.close()
+
+    return asyncio.start_server(_handle, '127.0.0.1', 0)
+
+
+def _request(responses, *requests, url=None, heads=None):
+    bodies = []
+
+    async def _run():
+        server = await _serve(responses, bodies, heads)
+        port = server.sockets[0].getsockname()[1]
+        pool = asynchttp.ConnectionPool(config.Toml({}))
+        results = []
+        try:
+            for body in requests:
+                try:
+                    response = await pool.request(
+                        'POST', (url or 'http://127.0.0.1:{}/').format(port),
+                        body=body)
+                    results.append(await response.read())
+                except DCOSHTTPException as e:
+                    results.append(e)
+        finally:
+            pool.close()
+            server.close()
+        return results, pool
+
+    loop = asyncio.new_event_loop()
+    try:
+        results, pool = loop.run_until_complete(_run())
+    finally:
+        loop.close()
+    return results, bodies, pool
+
+
+def test_connection_reuse_and_streamed_body():
+    pieces = [b'a', b'', b'bc', None]
+
+    async def _body():
+        return pieces.pop(0)
+
+    results, bodies, pool = _request(
+        [b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok',
+         b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n' +
+         CHUNKED_BODY],
+        b'{}', _body)
+
+    assert results == [b'ok', b'hello, world']
+    assert bodies == [b'{}', b'abc']
+    assert (pool.requests, pool.opened) == (2, 1)
+
+
+def test_error_status():
+    results, _, _ = _request(
+        [b'HTTP/1.1 500 Internal Server Error\r\nContent-Length: 4\r\n\r\n'
+         b'oops'],
+        b'{}')
+
+    assert results[0].status() == 500
+    assert results[0].response.text == 'oops'
+    assert str(results[0]).endswith('HTTP 500: Internal Server Error')
+
+
+def test_invalid_status_line():
+    with pytest.raises(DCOSConnectionError):
+        _request([b'HTTP/1.1 abc\r\nContent-Length: 0\r\n\r\n'], b'{}')
+
+
+def test_http_proxy(monkeypatch):
+    heads = []
+
+    async def _run():
+        server = await _serve(
+            [b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok'], [], heads)
+        proxy = 'http://user:pw@127.0.0.1:{}'.format(
+            server.sockets[0].getsockname()[1])
+        monkeypatch.setattr(asynchttp, 'get_environ_proxies',
+                            lambda url: {'http': proxy})
+        pool = asynchttp.ConnectionPool(config.Toml({}))
+        try:
+            response = await pool.request(
+                'POST', 'http://agent.invalid:5051/api/v1?a=b', body=b'{}')
+            return await response.read()
+        finally:
+            pool.close()
+            server.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(_run()) == b'ok'
+    finally:
+        loop.close()
+
+    request_line, headers = heads[0].split(b'\r\n', 1)
+    assert request_line == \
+        b'POST http://agent.invalid:5051/api/v1?a=b HTTP/1.1'
+    assert b'Proxy-Authorization: Basic dXNlcjpwdw==\r\n' in headers
+
+
+def test_connect_timeout(monkeypatch):
+    async def _open_connection(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr('dcos.http.DEFAULT_TIMEOUT', 0.01)
+    monkeypatch.setattr(asyncio, 'open_connection', _open_connection)
+    pool = asynchttp.ConnectionPool(config.Toml({}))
+
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(DCOSConnectionError):
+            loop.run_until_complete(
+                pool.request('POST', 'http://agent:5051/', body=b'{}'))
+    finally:
+        loop.close()
+
+
+@pytest.mark.parametrize('streamed', [False, True])
+def test_unauthorized_logs_in_again(streamed):
+    unauthorized = b'HTTP/1.1 401 Unauthorized\r\nContent-Length: 0\r\n\r\n'
+    heads = []
+    pieces = [b'{}', None]
+
+    async def _body():
+        return pieces.pop(0)
+
+    async def _run():
+        responses = [unauthorized]
+        if not streamed:
+            responses.append(
+                b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok')
+        server = await _serve(responses, [], heads)
+        url = 'http://127.0.0.1:{}'.format(
+            server.sockets[0].getsockname()[1])
+        toml_config = config.Toml({'core': {'dcos_url': url,
+                                            'dcos_acs_token': 'old',
+                                            'prompt_login': True}})
+        logged_in = config.Toml({'core': {'dcos_url': url,
+                                          'dcos_acs_token': 'new'}})
+        pool = asynchttp.ConnectionPool(toml_config)
+        try:
+            with mock.patch('dcos.auth.header_challenge_auth') as login, \
+                    mock.patch('dcos.config.get_config',
+                               return_value=logged_in):
+                response = await pool.request(
+                    'POST', url + '/api/v1',
+                    body=_body if streamed else b'{}')
+                assert login.call_args == mock.call(url)
+                return await response.read()
+        finally:
+            pool.close()
+            server.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        if streamed:
+            # a streamed body can't be sent again
+            with pytest.raises(DCOSAuthenticationException):
+                loop.run_until_complete(_run())
+        else:
+            assert loop.run_until_complete(_run()) == b'ok'
+    finally:
+        loop.close()
+
+    assert b'Authorization: token=old\r\n' in heads[0]
+    if not streamed:
+        assert b'Authorization: token=new\r\n' in heads[1]
+
+
+@pytest.mark.parametrize('status', [b'200 Connection established',
+                                    b'407 Proxy Authentication Required'])
+def test_open_tunnel(status):
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    heads = []
+
+    def _proxy():
+        conn, _ = listener.accept()
+        head = b''
+        while b'\r\n\r\n' not in head:
+            head += conn.recv(1024)
+        heads.append(head)
+        conn.sendall(b'HTTP/1.1 ' + status + b'\r\n\r\n')
+        conn.close()
+
+    thread = threading.Thread(target=_proxy)
+    thread.start()
+    proxy = 'http://127.0.0.1:{}'.format(listener.getsockname()[1])
+    try:
+        if status.startswith(b'200'):
+            sock = asynchttp._open_tunnel(
+                proxy, 'agent', 443, 'https://agent/')
+            sock.close()
+        else:
+            with pytest.raises(DCOSConnectionError):
+                asynchttp._open_tunnel(proxy, 'agent', 443, 'https://agent/')
+    finally:
+        thread.join()
+        listener.close()
+
+    assert heads == [b'CONNECT agent:443 HTTP/1.1\r\nHost: agent:443\r\n\r\n']
@@ -194,3 +194,23 @@ def test_get_config(load_path_mock):
 def _create_clusters_dir(dcos_dir):
     clusters_dir = os.path.join(dcos_dir, constants.DCOS_CLUSTERS_SUBDIR)
     util.ensure_dir_exists(clusters_dir)
+
+
+def test_load_from_path_snapshot(tmpdir):
+    path = str(tmpdir.join('dcos.toml'))
+    util.ensure_file_exists(path)
+    with open(path, 'w') as f:
+        f.write('[core]\ntimeout = 5\n')
+
+    first = config.load_from_path(path)
+    with patch('toml.loads') as loads_mock:
+        assert config.load_from_path(path)['core.timeout'] == 5
+        assert not loads_mock.called
+    assert first['core.timeout'] == 5
+
+    mutable = config.load_from_path(path, True)
+    mutable['core.timeout'] = 10
+    config.save(mutable, path)
+
+    assert config.load_from_path(path)['core.timeout'] == 10
+    config.clear_config_snapshots()
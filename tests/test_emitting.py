@@ -0,0 +1,33 @@
+import mock
+import pytest
+
+from dcos import emitting
+
+
+@pytest.mark.parametrize('objs', [
+    [],
+    [1],
+    [{'a': [1, {'b': 'x\ny'}]}, {}, [], 'z'],
+    [{'id': i, 'ports': [i, {'name': None}]} for i in range(250)],
+])
+def test_json_chunks(objs):
+    with mock.patch('sys.stdout.isatty', return_value=False):
+        chunks = list(emitting.json_chunks(iter(objs)))
+
+    assert '\n'.join(chunks) == emitting._process_json(objs)
+    assert len(chunks) == len(objs) // emitting.JSON_CHUNK_SIZE + 1
+
+
+def test_json_chunks_are_lazy():
+    produced = []
+
+    def _objs():
+        for i in range(emitting.JSON_CHUNK_SIZE * 2):
+            produced.append(i)
+            yield i
+
+    with mock.patch('sys.stdout.isatty', return_value=False):
+        chunks = emitting.json_chunks(_objs())
+        next(chunks)
+
+    assert len(produced) == emitting.JSON_CHUNK_SIZE
@@ -0,0 +1,62 @@
+from dcos import config, http
+
+
+def _conf(core=None):
+    return config.Toml({'core': core or {}})
+
+
+def test_session_is_shared_per_host():
+    http.close_sessions()
+    toml_config = _conf()
+
+    first = http._get_session('http://dcos.example.com/mesos', toml_config)
+    second = http._get_session('http://dcos.example.com/marathon',
+                               toml_config)
+    other = http._get_session('https://dcos.example.com/', toml_config)
+
+    assert first is second
+    assert first is not other
+    http.close_sessions()
+
+
+def test_pool_settings_from_config():
+    toml_config = _conf({'http_pool_size': 4, 'http_keep_alive': False})
+    assert http._pool_settings(toml_config) == (4, False)
+
+    assert http._pool_settings(_conf()) == (http.DEFAULT_POOL_SIZE, True)
+
+
+def test_session_without_keep_alive():
+    http.close_sessions()
+    toml_config = _conf({'http_keep_alive': False})
+
+    session = http._get_session('http://dcos.example.com', toml_config)
+
+    assert session.headers['Connection'] == 'close'
+    http.close_sessions()
+
+
+def test_connection_stats_without_sessions():
+    http.close_sessions()
+    assert http.connection_stats() == {
+        'opened': 0, 'requests': 0, 'reused': 0}
+
+
+def test_auth_only_for_cluster_urls():
+    dcos_url = 'https://dcos.example.com'
+    cosmos_url = 'https://cosmos.example.com/package'
+
+    auth = http._auth_for('https://dcos.example.com/marathon/v2/apps',
+                          'token', dcos_url, cosmos_url)
+    assert isinstance(auth, http.DCOSAcsAuth)
+    assert auth.token == 'token'
+
+    assert http._auth_for('https://cosmos.example.com/package/list',
+                          'token', dcos_url, cosmos_url) is auth
+
+    assert http._auth_for('http://dcos.example.com/marathon',
+                          'token', dcos_url, cosmos_url) is None
+    assert http._auth_for('https://example.com/marathon',
+                          'token', dcos_url, None) is None
+    assert http._auth_for('https://dcos.example.com/marathon',
+                          None, dcos_url, cosmos_url) is None
@@ -0,0 +1,110 @@
+import json
+import os
+import time
+
+import mock
+
+from dcos import config, httpcache
+
+
+def _response(body=None, status_code=200, headers=None):
+    content = json.dumps(body).encode('utf-8')
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.url = 'http://dcos/mesos/master/state.json'
+    response.headers = headers or {}
+    response.iter_content.return_value = [content[:3], content[3:]]
+    return response
+
+
+def _cache(tmpdir, ttl=60, max_size=1024 * 1024):
+    return httpcache.ResponseCache(str(tmpdir.join('cache')), ttl, max_size)
+
+
+@mock.patch('dcos.http.get')
+def test_fresh_response_is_served_from_disk(http_get, tmpdir):
+    http_get.return_value = _response({'tasks': [1, 2]})
+    cache = _cache(tmpdir)
+
+    first = cache.get('http://dcos/mesos/master/state.json')
+    second = cache.get('http://dcos/mesos/master/state.json')
+
+    assert http_get.call_count == 1
+    assert first.json() == second.json() == {'tasks': [1, 2]}
+    assert b''.join(second.iter_content(4)) == b'{"tasks": [1, 2]}'
+
+
+@mock.patch('dcos.http.get')
+def test_stale_response_is_revalidated(http_get, tmpdir):
+    http_get.return_value = _response(
+        {'apps': []}, headers={'ETag': '"v1"',
+                               'Last-Modified': 'Mon, 01 May 2017'})
+    cache = _cache(tmpdir, ttl=1)
+    cache.get('http://dcos/marathon/v2/apps')
+
+    meta_path = [path for path in tmpdir.join('cache').listdir()
+                 if path.ext == '.json'][0]
+    meta = json.loads(meta_path.read())
+    meta['stored_at'] = time.time() - 2
+    meta_path.write(json.dumps(meta))
+
+    http_get.return_value = _response(status_code=304)
+    stats = httpcache.cache_stats()
+    response = cache.get('http://dcos/marathon/v2/apps')
+
+    headers = http_get.call_args[1]['headers']
+    assert headers['If-None-Match'] == '"v1"'
+    assert headers['If-Modified-Since'] == 'Mon, 01 May 2017'
+    assert response.json() == {'apps': []}
+    assert httpcache.cache_stats()['revalidated'] == stats['revalidated'] + 1
+
+
+@mock.patch('dcos.http.get')
+def test_least_recently_used_responses_are_evicted(http_get, tmpdir):
+    http_get.return_value = _response('x' * 100)
+    cache = _cache(tmpdir, max_size=250)
+
+    for path in ['a', 'b', 'c']:
+        cache.get('http://dcos/' + path)
+        time.sleep(0.01)
+
+    bodies = [path for path in tmpdir.join('cache').listdir()
+              if path.ext == '.body']
+    assert len(bodies) == 2
+    assert httpcache._cache_key('http://dcos/a', None) + '.body' not in \
+        [os.path.basename(str(path)) for path in bodies]
+
+
+@mock.patch('dcos.http.get')
+def test_invalidate_removes_responses_with_any_params(http_get, tmpdir):
+    def get(url, params=None, **kwargs):
+        response = _response({'url': url})
+        response.url = url + ('?embed=apps.tasks' if params else '')
+        return response
+
+    http_get.side_effect = get
+    cache = _cache(tmpdir)
+    cache.get('http://dcos/marathon/v2/apps')
+    cache.get('http://dcos/marathon/v2/apps', {'embed': 'apps.tasks'})
+    cache.get('http://dcos/marathon/v2/queue')
+
+    cache.invalidate(['http://dcos/marathon/v2/apps'])
+    cache.get('http://dcos/marathon/v2/apps', {'embed': 'apps.tasks'})
+    cache.get('http://dcos/marathon/v2/queue')
+
+    assert [call[0][0] for call in http_get.call_args_list] == [
+        'http://dcos/marathon/v2/apps',
+        'http://dcos/marathon/v2/apps',
+        'http://dcos/marathon/v2/queue',
+        'http://dcos/marathon/v2/apps',
+    ]
+
+
+@mock.patch('dcos.http.get')
+def test_disabled_cache_sends_request(http_get):
+    toml_config = config.Toml({'core': {'cache_ttl': 0}})
+    assert httpcache.get_cache(toml_config) is None
+
+    httpcache.get('http://dcos/marathon/v2/apps', toml_config=toml_config)
+    http_get.assert_called_once_with('http://dcos/marathon/v2/apps',
+                                     params=None, toml_config=toml_config)
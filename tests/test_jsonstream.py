@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from dcos import jsonstream
+from dcos.errors import DCOSException
+
+
+STATE = {
+    'hostname': 'master-1',
+    'version': '1.2.0',
+    'frameworks': [{
+        'id': 'marathon',
+        'active': True,
+        'resources': {'cpus': 1.5, 'mem': 128},
+        'tasks': [{'id': 'app.{}'.format(i),
+                   'state': 'TASK_RUNNING',
+                   'labels': [{'key': 'k\\"{}'.format(i), 'value': None}]}
+                  for i in range(20)],
+        'completed_tasks': [{'id': 'done.1', 'state': 'TASK_FINISHED'}],
+    }],
+    'slaves': [],
+    'flags': {'quiet': 'false'},
+}
+
+
+def _chunks(value, size):
+    data = json.dumps(value).encode('utf-8')
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+@pytest.mark.parametrize('size', [1, 7, 64, 100000])
+def test_load_projection(size):
+    projection = {
+        'hostname': True,
+        'frameworks': [{'id': True,
+                        'resources': True,
+                        'tasks': [{'id': True}]}],
+        'slaves': [{'id': True}],
+    }
+
+    assert jsonstream.load(_chunks(STATE, size), projection) == \
+        jsonstream.select(STATE, projection)
+
+
+@pytest.mark.parametrize('size', [1, 13, 100000])
+def test_load_whole_document(size):
+    assert jsonstream.load(_chunks(STATE, size)) == STATE
+
+
+def test_load_scalars_across_chunks():
+    chunks = [b'{"a": 12', b'345, "b": "\xc3', b'\xa9", "c": tr',
+              b'ue, "d": 0', b'.5, "e": 1', b'e3}']
+    assert jsonstream.load(chunks, {'a': True, 'b': True, 'c': True,
+                                    'e': True}) == \
+        {'a': 12345, 'b': u'\xe9', 'c': True, 'e': 1000.0}
+
+
+@pytest.mark.parametrize('size', [1, 5, 100000])
+def test_iter_items(size):
+    items = list(jsonstream.iter_items(_chunks(STATE['frameworks'][0]['tasks'],
+                                               size),
+                                       {'id': True}))
+    assert items == [{'id': 'app.{}'.format(i)} for i in range(20)]
+    assert list(jsonstream.iter_items([b' [ ] '])) == []
+
+
+@pytest.mark.parametrize('size', [1, 5, 100000])
+def test_iter_field_items(size):
+    framework = STATE['frameworks'][0]
+    items = jsonstream.iter_field_items(_chunks(framework, size), 'tasks')
+    assert list(items) == framework['tasks']
+
+    assert list(jsonstream.iter_field_items(
+        _chunks(framework, size), 'tasks', {'id': True})) == \
+        [{'id': 'app.{}'.format(i)} for i in range(20)]
+    assert list(jsonstream.iter_field_items(
+        _chunks(framework, size), 'missing')) == []
+    assert list(jsonstream.iter_field_items([b'{ }'], 'tasks')) == []
+
+
+def test_iter_field_items_stops_reading():
+    chunks = iter([b'{"versions": ["v1", ', b'"v2", ', b'"v3"]}'])
+    items = jsonstream.iter_field_items(chunks, 'versions')
+    assert next(items) == 'v1'
+    assert list(chunks) == [b'"v2", ', b'"v3"]}']
+
+
+def test_select_missing_keys():
+    assert jsonstream.select({'a': 1}, {'a': True, 'b': True}) == {'a': 1}
+
+
+def test_load_invalid_document():
+    with pytest.raises(DCOSException):
+        jsonstream.load([b'{"a": [1, 2'], {'a': True})
+
+    with pytest.raises(DCOSException):
+        jsonstream.load([b'{"a": 1} {}'], {'a': True})
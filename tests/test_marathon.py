@@ -1,4 +1,6 @@
 import re
+import threading
+import time
 
 import jsonschema
 import mock
@@ -7,7 +9,14 @@ import requests
 from requests.structures import CaseInsensitiveDict
 
 from dcos import http, marathon, rpcclient
-from dcos.errors import DCOSException, DCOSHTTPException
+from dcos.errors import (DCOSConnectionError, DCOSException,
+                         DCOSHTTPException)
+
+
+@pytest.fixture(autouse=True)
+def httpcache_invalidate():
+    with mock.patch('dcos.httpcache.invalidate') as invalidate:
+        yield invalidate
 
 
 def test_add_pod_puts_json_in_request_body():
@@ -21,6 +30,18 @@ def test_add_pod_returns_parsed_response_body():
     _assert_add_pod_returns_parsed_response_body(["another", "pod", "json"])
 
 
+def test_changes_invalidate_cached_listings(httpcache_invalidate):
+    marathon_client = marathon.Client(rpcclient.RpcClient('http://marathon'))
+
+    with mock.patch('dcos.http.post', side_effect=DCOSConnectionError('x')):
+        with pytest.raises(DCOSConnectionError):
+            marathon_client.restart_app('a')
+
+    httpcache_invalidate.assert_called_once_with(
+        ['http://marathon/v2/apps', 'http://marathon/v2/deployments',
+         'http://marathon/v2/groups'])
+
+
 def test_remove_pod_has_default_force_value():
     marathon_client, rpc_client = _create_fixtures()
     marathon_client.remove_pod('foo')
@@ -266,6 +287,373 @@ def test_pod_feature_supported_propagates_other_exceptions():
         exception=Exception("Uh oh"))
 
 
+def test_get_deployments_if_modified():
+    marathon_client, rpc_client = _create_fixtures()
+    response = _pod_response_fixture({'ETag': '"1"'})
+    response.status_code = 200
+    response.json.return_value = [{'id': 'd1'}]
+    rpc_client.http_req.return_value = response
+
+    deployments, validators = marathon_client.get_deployments_if_modified()
+    assert deployments == [{'id': 'd1'}]
+    assert validators == {'etag': '"1"', 'last_modified': None}
+
+    response.status_code = 304
+    assert marathon_client.get_deployments_if_modified(validators) == \
+        (None, validators)
+    _, kwargs = rpc_client.http_req.call_args
+    assert kwargs['headers'] == {'Accept': 'application/json',
+                                 'If-None-Match': '"1"'}
+    assert kwargs['is_success'](304)
+
+
+def test_get_deployment_events():
+    marathon_client, rpc_client = _create_fixtures()
+    response = mock.MagicMock()
+    chunks = [b'event: deployment_success\ndata: {"id": "d1"}\n\n', b'']
+    response.raw.read1.side_effect = lambda size: chunks.pop(0)
+    rpc_client.http_req.return_value = response
+
+    events = marathon_client.get_deployment_events()
+
+    rpc_client.http_req.assert_called_with(
+        http.get, 'v2/events',
+        params={'event_type': marathon.DEPLOYMENT_EVENT_TYPES},
+        headers={'Accept': 'text/event-stream'},
+        stream=True,
+        timeout=(http.DEFAULT_TIMEOUT, marathon.EVENT_READ_TIMEOUT))
+    assert [[(e.event, e.data) for e in batch] for batch in events] == \
+        [[('deployment_success', '{"id": "d1"}')]]
+    response.close.assert_called_with()
+
+
+def test_get_app_versions_stops_reading():
+    marathon_client, rpc_client = _create_fixtures()
+    response = _pod_response_fixture()
+    chunks = iter([b'{"versions": ["v5", "v4", ', b'"v3", "v2", ',
+                   b'"v1"]}'])
+    response.iter_content.return_value = chunks
+    rpc_client.http_req.return_value = response
+
+    assert marathon_client.get_app_versions('foo', max_count=2) == \
+        ['v5', 'v4']
+
+    rpc_client.http_req.assert_called_with(
+        http.get, 'v2/apps/foo/versions', stream=True)
+    response.close.assert_called_with()
+    assert list(chunks) == [b'"v3", "v2", ', b'"v1"]}']
+
+
+def test_iter_apps():
+    marathon_client, rpc_client = _create_fixtures()
+    response = _pod_response_fixture()
+    chunks = iter([b'{"apps": [{"id": "/a"}, ', b'{"id": "/b"}]}'])
+    response.iter_content.return_value = chunks
+    rpc_client.http_req.return_value = response
+
+    apps = marathon_client.iter_apps()
+    assert next(apps) == {'id': '/a'}
+    # the rest of the list is yet to be read
+    assert list(chunks) == [b'{"id": "/b"}]}']
+
+    rpc_client.http_req.assert_called_with(http.get, 'v2/apps', stream=True)
+
+
+def test_get_tasks_of_app():
+    marathon_client, rpc_client = _create_fixtures()
+    response = _pod_response_fixture()
+    response.iter_content.return_value = iter(
+        [b'{"tasks": [{"id": "t1", "appId": "/foo"}]}'])
+    rpc_client.http_req.return_value = response
+
+    assert marathon_client.get_tasks('foo') == [
+        {'id': 't1', 'appId': '/foo'}]
+    rpc_client.http_req.assert_called_with(
+        http.get, 'v2/apps/foo/tasks', stream=True)
+
+    rpc_client.http_req.side_effect = _rpc_error(404)
+    assert marathon_client.get_tasks('foo') == []
+
+    rpc_client.http_req.side_effect = _rpc_error(404)
+    with pytest.raises(DCOSException):
+        marathon_client.get_tasks(None)
+
+
+def test_get_apps_under():
+    marathon_client, rpc_client = _create_fixtures()
+    response = _pod_response_fixture()
+    response.json.return_value = {
+        'id': '/prod',
+        'apps': [{'id': '/prod/a'}],
+        'groups': [
+            {'id': '/prod/x', 'apps': [{'id': '/prod/x/b'}], 'groups': [
+                {'id': '/prod/x/y', 'apps': [{'id': '/prod/x/y/c'}]}]},
+            {'id': '/prod/z', 'apps': [{'id': '/prod/z/d'}], 'groups': []}]}
+    rpc_client.http_req.return_value = response
+
+    apps = marathon_client.get_apps_under('prod')
+
+    rpc_client.http_req.assert_called_with(http.get, 'v2/groups/prod')
+    assert [app['id'] for app in apps] == \
+        ['/prod/a', '/prod/x/b', '/prod/x/y/c', '/prod/z/d']
+
+
+@mock.patch('dcos.marathon.time.sleep')
+def test_restart_apps_retries_transient_errors(sleep):
+    outcomes = {
+        '/a': [_http_error(503), {'deploymentId': 'd-a'}],
+        '/b': [_http_error(409)],
+        '/c': [DCOSConnectionError('http://marathon/v2/apps/c/restart')] * 3,
+    }
+
+    def post(url, *args, **kwargs):
+        app_id = url[len('http://marathon/v2/apps'):-len('/restart')]
+        outcome = outcomes[app_id].pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = _pod_response_fixture()
+        response.json.return_value = outcome
+        return response
+
+    marathon_client = marathon.Client(
+        rpcclient.RpcClient('http://marathon/'))
+    with mock.patch('dcos.http.post', post):
+        results = sorted(marathon_client.restart_apps(['a', 'b', 'c']))
+
+    assert [(result.id, result.deployment_id) for result in results] == \
+        [('a', 'd-a'), ('b', None), ('c', None)]
+    assert results[0].error is None
+    assert 'deployment already in progress' in str(results[1].error)
+    assert isinstance(results[2].error, DCOSConnectionError)
+    assert outcomes == {'/a': [], '/b': [], '/c': []}
+    assert sorted(call[0][0] for call in sleep.call_args_list) == \
+        [1.0, 1.0, 2.0]
+
+
+def test_bulk_caps_concurrency():
+    marathon_client, _ = _create_fixtures()
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def fn(resource_id):
+        with lock:
+            running.append(resource_id)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(resource_id)
+        return 'd-' + resource_id
+
+    ids = [str(i) for i in range(20)]
+    results = list(marathon_client.bulk(fn, ids, concurrency=3))
+
+    assert sorted(result.deployment_id for result in results) == \
+        sorted('d-' + resource_id for resource_id in ids)
+    assert max(peak) <= 3
+
+
+def test_diff_definitions_app():
+    # as returned by GET /v2/apps/nginx
+    current = _nginx_app()
+    # the definition the app was created with
+    desired = {
+        'id': 'nginx',
+        'cpus': 0.1,
+        'mem': 64,
+        'instances': 2,
+        'container': {
+            'type': 'DOCKER',
+            'docker': {'image': 'nginx:1.13', 'network': 'BRIDGE',
+                       'portMappings': [{'containerPort': 80}]}},
+        'healthChecks': [{'path': '/', 'protocol': 'HTTP'}],
+    }
+
+    assert marathon.diff_definitions('apps', current, desired) == ([], None)
+    # e.g. the definition printed by `dcos marathon app show`
+    assert marathon.diff_definitions('apps', current, current) == ([], None)
+
+    desired['container']['docker']['image'] = 'nginx:1.14'
+    desired['env'] = {'A': '1'}
+    desired['upgradeStrategy'] = {'minimumHealthCapacity': 0.5}
+    changes, payload = marathon.diff_definitions('apps', current, desired)
+
+    assert changes == [
+        marathon.Change(('container', 'docker', 'image'),
+                        'nginx:1.13', 'nginx:1.14'),
+        marathon.Change(('env', 'A'), marathon.ABSENT, '1'),
+        marathon.Change(('upgradeStrategy', 'minimumHealthCapacity'),
+                        1, 0.5),
+    ]
+    assert payload == {'container': desired['container'],
+                       'env': desired['env'],
+                       'upgradeStrategy': desired['upgradeStrategy']}
+
+
+def test_diff_definitions_app_removed_env_var():
+    current = {'id': '/a', 'env': {'A': '1', 'B': '2'}, 'cpus': 1}
+    desired = {'id': '/a', 'env': {'A': '1'}}
+
+    changes, payload = marathon.diff_definitions('apps', current, desired)
+
+    assert changes == [marathon.Change(('env', 'B'), '2', marathon.ABSENT)]
+    assert payload == {'env': {'A': '1'}}
+
+
+def test_diff_definitions_app_removed_label():
+    current = {'id': '/a', 'labels': {'L': '1'}}
+    desired = {'id': '/a', 'labels': {}}
+
+    changes, payload = marathon.diff_definitions('apps', current, desired)
+
+    assert changes == [marathon.Change(('labels', 'L'), '1', marathon.ABSENT)]
+    assert payload == {'labels': {}}
+
+
+def test_diff_definitions_group():
+    # as returned by GET /v2/groups/g
+    current = {
+        'id': '/g',
+        'apps': [dict(_nginx_app(), id='/g/nginx')],
+        'groups': [],
+        'pods': [],
+        'dependencies': [],
+        'version': '2017-06-02T10:11:12.345Z',
+    }
+    # e.g. the definition printed by `dcos marathon group show`
+    desired = {'id': 'g', 'apps': [dict(_nginx_app(), id='g/nginx')]}
+
+    assert marathon.diff_definitions('groups', current, desired) == \
+        ([], None)
+
+    desired['apps'][0]['instances'] = 3
+    changes, payload = marathon.diff_definitions('groups', current, desired)
+    assert changes == [marathon.Change(('apps', 0, 'instances'), 2, 3)]
+    assert payload == {'apps': desired['apps']}
+
+    # the apps of the update replace the group's
+    del desired['apps'][0]['healthChecks']
+    changes, payload = marathon.diff_definitions('groups', current, desired)
+    assert [change.path for change in changes] == \
+        [('apps', 0, 'healthChecks'), ('apps', 0, 'instances')]
+
+
+def test_diff_definitions_pod():
+    # the spec returned by GET /v2/pods/good-pod::status
+    current = {
+        'id': '/good-pod',
+        'labels': {},
+        'version': '2017-06-02T10:11:12.345Z',
+        'environment': {},
+        'containers': [{
+            'name': 'good-container',
+            'exec': {'command': {'shell': 'sleep 1000'}},
+            'resources': {'cpus': 0.1, 'mem': 16, 'disk': 0, 'gpus': 0},
+            'endpoints': [],
+            'environment': {},
+            'labels': {'owner': 'ops'},
+            'volumeMounts': [],
+            'artifacts': [],
+        }],
+        'secrets': {},
+        'volumes': [],
+        'networks': [{'mode': 'host', 'labels': {}}],
+        'scaling': {'kind': 'fixed', 'instances': 1},
+        'scheduling': {
+            'backoff': {'backoff': 1, 'backoffFactor': 1.15,
+                        'maxLaunchDelay': 3600},
+            'upgrade': {'minimumHealthCapacity': 1,
+                        'maximumOverCapacity': 1},
+            'placement': {'constraints': [], 'acceptedResourceRoles': []},
+            'killSelection': 'YOUNGEST_FIRST',
+            'unreachableStrategy': {'inactiveAfterSeconds': 0,
+                                    'expungeAfterSeconds': 0},
+        },
+        'executorResources': {'cpus': 0.1, 'mem': 32, 'disk': 10},
+    }
+    desired = {
+        'id': '/good-pod',
+        'containers': [{
+            'name': 'good-container',
+            'exec': {'command': {'shell': 'sleep 1000'}},
+            'resources': {'cpus': 0.1, 'mem': 16.0},
+            'labels': {'owner': 'ops'},
+        }],
+        'scaling': {'kind': 'fixed', 'instances': 1},
+    }
+
+    assert marathon.diff_definitions('pods', current, desired) == ([], None)
+
+    # pods are replaced as a whole, so dropping a field changes the pod
+    del desired['containers'][0]['labels']
+    changes, payload = marathon.diff_definitions('pods', current, desired)
+    assert changes == [marathon.Change(
+        ('containers', 0, 'labels', 'owner'), 'ops', marathon.ABSENT)]
+    assert payload is desired
+
+
+def _nginx_app():
+    """
+    :returns: an app as returned by GET /v2/apps/nginx
+    :rtype: dict
+    """
+
+    return {
+        'id': '/nginx',
+        'backoffFactor': 1.15,
+        'backoffSeconds': 1,
+        'container': {
+            'type': 'DOCKER',
+            'docker': {
+                'forcePullImage': False,
+                'image': 'nginx:1.13',
+                'network': 'BRIDGE',
+                'parameters': [],
+                'portMappings': [{'containerPort': 80, 'hostPort': 0,
+                                  'labels': {}, 'protocol': 'tcp',
+                                  'servicePort': 10101}],
+                'privileged': False,
+            },
+            'volumes': [],
+        },
+        'cpus': 0.1,
+        'disk': 0,
+        'executor': '',
+        'instances': 2,
+        'labels': {},
+        'maxLaunchDelaySeconds': 3600,
+        'mem': 64,
+        'gpus': 0,
+        'networks': [{'mode': 'container/bridge'}],
+        'requirePorts': False,
+        'upgradeStrategy': {'maximumOverCapacity': 1,
+                            'minimumHealthCapacity': 1},
+        'version': '2017-06-02T10:11:12.345Z',
+        'versionInfo': {'lastScalingAt': '2017-06-02T10:11:12.345Z',
+                        'lastConfigChangeAt': '2017-06-02T10:11:12.345Z'},
+        'killSelection': 'YOUNGEST_FIRST',
+        'unreachableStrategy': {'inactiveAfterSeconds': 0,
+                                'expungeAfterSeconds': 0},
+        'healthChecks': [{'gracePeriodSeconds': 300, 'ignoreHttp1xx': False,
+                          'intervalSeconds': 60, 'maxConsecutiveFailures': 3,
+                          'path': '/', 'portIndex': 0, 'protocol': 'HTTP',
+                          'timeoutSeconds': 20, 'delaySeconds': 15}],
+        'fetch': [],
+        'constraints': [],
+        'env': {},
+        'dependencies': [],
+        'secrets': {},
+        'ports': [10101],
+        'portDefinitions': [{'port': 10101, 'protocol': 'tcp'}],
+        'tasksStaged': 0,
+        'tasksRunning': 2,
+        'tasksHealthy': 2,
+        'tasksUnhealthy': 0,
+        'deployments': [],
+        'tasks': [],
+    }
+
+
 def test_rpc_client_http_req_calls_method_fn():
     def test_case(base_url, path, full_url):
         method_fn = mock.Mock()
@@ -788,6 +1176,24 @@ def _assert_matches_with_groups(pattern, text, groups):
     assert match.groups() == groups
 
 
+def _http_error(status_code):
+    response = mock.create_autospec(requests.Response)
+    response.status_code = status_code
+    response.reason = 'Reason'
+    response.request = requests.Request(method='POST',
+                                        url='http://marathon/v2/apps')
+    response.json.side_effect = ValueError('not JSON')
+    return DCOSHTTPException(response)
+
+
+def _rpc_error(status_code):
+    try:
+        rpcclient.RpcClient('http://marathon/').http_req(
+            mock.Mock(side_effect=_http_error(status_code)), 'v2/path')
+    except DCOSException as e:
+        return e
+
+
 def _create_fixtures():
     rpc_client = mock.create_autospec(rpcclient.RpcClient)
     marathon_client = marathon.Client(rpc_client)
@@ -0,0 +1,587 @@
+import asyncio
+import base64
+import io
+import json
+import os
+import threading
+
+import mock
+import pytest
+import requests
+
+from dcos import asynchttp, config, mesos, recordio
+from dcos.errors import DCOSException, DCOSHTTPException
+
+
+def _task(task_id, state='TASK_RUNNING', slave_id='slave-1'):
+    return {
+        'id': task_id,
+        'name': task_id.split('.')[0],
+        'state': state,
+        'slave_id': slave_id,
+        'statuses': [{'container_status': {
+            'container_id': {'value': 'container-' + task_id}}}]
+    }
+
+
+@pytest.fixture
+def master():
+    return mesos.Master({
+        'slaves': [{'id': 'slave-1'}, {'id': 'slave-10'}],
+        'frameworks': [{
+            'id': 'marathon',
+            'active': True,
+            'tasks': [_task('app.1'), _task('app.10', slave_id='slave-10'),
+                      _task('other.1')],
+            'completed_tasks': [_task('app.2', 'TASK_FINISHED')]
+        }],
+        'completed_frameworks': [{
+            'id': 'old',
+            'active': False,
+            'tasks': [],
+            'completed_tasks': [_task('old.1', 'TASK_KILLED')]
+        }]
+    })
+
+
+def _ids(tasks):
+    return [task['id'] for task in tasks]
+
+
+def test_tasks_filters(master):
+    assert _ids(master.tasks()) == ['app.1', 'app.10', 'other.1']
+    assert _ids(master.tasks('app')) == ['app.1', 'app.10']
+    assert _ids(master.tasks('app.?')) == ['app.1']
+    assert _ids(master.tasks('*.1')) == ['app.1', 'other.1']
+    assert _ids(master.tasks(completed=True)) == ['old.1', 'app.2']
+    assert _ids(master.tasks('app', all_=True)) == [
+        'app.1', 'app.10', 'app.2']
+
+
+def test_tasks_returns_same_objects(master):
+    assert master.tasks('app.10')[0] is master.tasks('app')[1]
+
+
+def test_task_exact_id(master):
+    assert master.task('app.1')['id'] == 'app.1'
+    assert master.task('app.2', completed=True)['id'] == 'app.2'
+
+    with pytest.raises(DCOSException):
+        master.task('app')
+
+    with pytest.raises(DCOSException):
+        master.task('app.2')
+
+
+def test_framework_and_slave_lookup(master):
+    assert master.framework('old')['id'] == 'old'
+    assert master.framework('missing') is None
+    assert master.slave('slave-1')['id'] == 'slave-1'
+    assert master.tasks('app.10')[0].slave()['id'] == 'slave-10'
+
+
+def test_slave_tasks(master):
+    assert _ids(master.slave_tasks('slave-1')) == ['app.1', 'other.1']
+    assert _ids(master.slave_tasks('slave-1', completed=True)) == [
+        'old.1', 'app.1', 'other.1', 'app.2']
+    assert master.slave_tasks('missing') == []
+
+
+def test_get_container_id(master):
+    assert master.get_container_id('other') == {'value': 'container-other.1'}
+
+    with pytest.raises(DCOSException):
+        master.get_container_id('app')
+
+
+def test_get_container_id_exact_id(master):
+    assert master.get_container_id('app.1') == {'value': 'container-app.1'}
+
+
+def _response(body, status_code=200):
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.json.return_value = body
+    return response
+
+
+@mock.patch('dcos.config.get_config',
+            return_value={'core.dcos_url': 'http://dcos'})
+@mock.patch('dcos.http.get')
+def test_get_master_resources_frameworks(http_get, get_config):
+    body = json.dumps({
+        'frameworks': [{'id': 'marathon', 'name': 'marathon',
+                        'hostname': 'master', 'active': True,
+                        'resources': {'cpus': 1}, 'user': 'root',
+                        'tasks': [{'id': 'app.1', 'state': 'TASK_RUNNING'}],
+                        'completed_tasks': []}],
+        'completed_frameworks': [],
+        'unregistered_frameworks': [],
+    }).encode('utf-8')
+    response = _response(None)
+    response.iter_content.return_value = [body[:10], body[10:]]
+    http_get.return_value = response
+    client = mesos.DCOSClient()
+
+    state = client.get_master_resources(
+        ['frameworks'], mesos.SERVICE_STATE_PROJECTION)
+
+    assert http_get.call_args[0][0] == 'http://dcos/mesos/master/frameworks'
+    assert state == {
+        'frameworks': [{'id': 'marathon', 'name': 'marathon',
+                        'hostname': 'master', 'active': True,
+                        'resources': {'cpus': 1},
+                        'tasks': [{'id': 'app.1'}]}],
+        'completed_frameworks': [],
+    }
+
+
+@mock.patch('dcos.config.get_config',
+            return_value={'core.dcos_url': 'http://dcos'})
+@mock.patch('dcos.http.get')
+def test_get_master_resources_falls_back_to_state(http_get, get_config):
+    state = {'frameworks': [{'id': 'marathon', 'active': True}],
+             'completed_frameworks': []}
+
+    def _get(url, **kwargs):
+        if url.endswith('master/state.json'):
+            return _response(state)
+        raise DCOSHTTPException(_response({}, 404))
+
+    http_get.side_effect = _get
+    client = mesos.DCOSClient()
+
+    assert client.get_master_resources(['frameworks']) == state
+
+
+class _FakeFilesClient(object):
+    """Serves files/read.json for `content`, capping reads at `cap` bytes
+    like a Mesos agent."""
+
+    def __init__(self, content, cap):
+        self.content = content.encode('utf-8')
+        self.cap = cap
+        self.requests = 0
+
+    def master_file_read(self, path, length, offset):
+        self.requests += 1
+        if offset == -1:
+            return {'offset': len(self.content), 'data': ''}
+        if length == -1 or length > self.cap:
+            length = self.cap
+        data = self.content[offset:offset + length]
+        return {'offset': offset, 'data': data.decode('utf-8')}
+
+
+@pytest.mark.parametrize('cap', [7, 1000, 10 ** 6])
+def test_mesos_file_read(cap):
+    content = ''.join(str(i % 10) for i in range(5000))
+    with mock.patch('dcos.mesos.FILE_READ_CHUNK_SIZE', 64):
+        mesos_file = mesos.MesosFile('/log', dcos_client=_FakeFilesClient(
+            content, cap))
+        assert mesos_file.read() == content
+        assert mesos_file.tell() == len(content)
+
+        mesos_file.seek(10)
+        assert mesos_file.read(300) == content[10:310]
+        assert mesos_file.read(10 ** 6) == content[310:]
+        assert mesos_file.read() == ''
+
+
+def test_mesos_file_learns_read_cap():
+    content = 'x' * 10000
+    client = _FakeFilesClient(content, 100)
+    mesos_file = mesos.MesosFile('/log', dcos_client=client)
+
+    assert mesos_file.read() == content
+    assert mesos_file._chunk_size == 100
+
+    client.requests = 0
+    mesos_file.seek(0)
+    assert mesos_file.read() == content
+    assert client.requests == 1 + 100
+
+
+def test_mesos_file_reads_single_chunk_inline():
+    content = 'x' * 1000
+    mesos_file = mesos.MesosFile('/log', dcos_client=_FakeFilesClient(
+        content, 10 ** 6))
+
+    with mock.patch('dcos.mesos._get_file_read_executor') as executor:
+        mesos_file.seek(10)
+        assert mesos_file.read(100) == content[10:110]
+        assert mesos_file.read() == content[110:]
+
+    assert not executor.called
+
+
+def test_mesos_file_download():
+    # not valid UTF-8
+    content = os.urandom(200 * 1024)
+    response = mock.create_autospec(requests.Response)
+    response.iter_content.side_effect = lambda size: (
+        content[i:i + size] for i in range(0, len(content), size))
+    client = mock.create_autospec(mesos.DCOSClient)
+    client.master_file_download.return_value = response
+    mesos_file = mesos.MesosFile('/log', dcos_client=client)
+    out = io.BytesIO()
+
+    assert mesos_file.download(out) == len(content)
+    assert out.getvalue() == content
+    client.master_file_download.assert_called_with('/log')
+    assert response.close.called
+
+
+@pytest.fixture
+def task_io():
+    with mock.patch('dcos.mesos.DCOSClient') as client, \
+            mock.patch('dcos.mesos.get_master'):
+        client.return_value._mesos_master_url = None
+        return mesos.TaskIO('app.1', 'cat', [], interactive=True)
+
+
+def _stdin_data(records):
+    decoder = recordio.Decoder(lambda s: json.loads(s.decode('utf-8')))
+    messages = decoder.decode(b''.join(records))
+    return [base64.b64decode(message['attach_container_input'][
+        'process_io']['data']['data']) for message in messages]
+
+
+def test_task_io_input_thread_grows_reads(task_io):
+    content = os.urandom(300 * 1024)
+    read_fd, write_fd = os.pipe()
+
+    def _write():
+        with os.fdopen(write_fd, 'wb') as stdin:
+            stdin.write(content)
+
+    writer = threading.Thread(target=_write)
+    writer.start()
+    with os.fdopen(read_fd, 'rb') as stdin, \
+            mock.patch('sys.stdin', stdin):
+        task_io._input_thread()
+    writer.join()
+
+    records = []
+    while not task_io.input_queue.empty():
+        records.append(task_io.input_queue.get())
+
+    assert records.pop() is None
+    data = _stdin_data(records)
+    assert data[-1] == b''
+    assert b''.join(data) == content
+    assert len(data) < 300
+
+
+def test_task_io_input_batch(task_io):
+    encode = task_io._stdin_encoder()
+    records = [encode(b'x' * 100) for _ in range(5)]
+    for record in records[1:]:
+        task_io.input_queue.put(record)
+    task_io.input_queue.put(None)
+
+    with mock.patch.object(task_io, 'INPUT_BATCH_SIZE', 400):
+        batch, done = task_io._input_batch(records[0])
+        assert (batch, done) == (b''.join(records[:2]), False)
+
+        batch, done = task_io._input_batch(task_io.input_queue.get())
+        assert (batch, done) == (b''.join(records[2:4]), False)
+
+        batch, done = task_io._input_batch(task_io.input_queue.get())
+        assert (batch, done) == (records[4], True)
+        assert _stdin_data([batch]) == [b'x' * 100]
+
+
+class _Stream(object):
+    """Records the writes and flushes of sys.stdout or sys.stderr."""
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+        self.buffer = self
+
+    def write(self, data):
+        self.log.append((self.name, bytes(data)))
+
+    def flush(self):
+        self.log.append((self.name, 'flush'))
+
+
+def _output_records(*outputs):
+    encoder = recordio.Encoder(lambda s: json.dumps(s).encode('utf-8'))
+    return b''.join(encoder.encode({'type': 'DATA', 'data': {
+        'type': stream,
+        'data': base64.b64encode(data).decode('utf-8')}})
+        for stream, data in outputs)
+
+
+def _run_output_thread(task_io, chunks):
+    for chunk in chunks:
+        task_io.output_queue.put(chunk)
+    task_io.output_queue.put(None)
+
+    log = []
+    with mock.patch('sys.stdout', _Stream('stdout', log)), \
+            mock.patch('sys.stderr', _Stream('stderr', log)):
+        task_io._output_thread()
+    assert task_io.exit_event.is_set()
+    return log
+
+
+def test_task_io_output_thread_batches_writes(task_io):
+    stream = _output_records(('STDOUT', b'a'), ('STDOUT', b'b'),
+                             ('STDERR', b'c'), ('STDOUT', b'd'))
+    chunks = [stream[i:i + 7] for i in range(0, len(stream), 7)]
+
+    assert _run_output_thread(task_io, chunks) == [
+        ('stdout', b'ab'), ('stdout', 'flush'),
+        ('stderr', b'c'), ('stderr', 'flush'),
+        ('stdout', b'd'), ('stdout', 'flush')]
+
+
+def test_task_io_output_thread_flush_size(task_io):
+    chunks = [_output_records(('STDOUT', b'x' * 60)) for _ in range(4)]
+
+    with mock.patch.object(task_io, 'OUTPUT_FLUSH_SIZE', 100):
+        log = _run_output_thread(task_io, chunks)
+
+    assert log == [('stdout', b'x' * 120), ('stdout', 'flush')] * 2
+
+
+def test_task_io_output_thread_errors(task_io):
+    with pytest.raises(DCOSException) as e:
+        _run_output_thread(task_io, [_output_records(('LOG', b'a'))])
+    assert str(e.value) == 'Unsupported data type in output stream'
+
+    with pytest.raises(DCOSException) as e:
+        _run_output_thread(task_io, [b'abc\n'])
+    assert str(e.value).startswith('Error parsing output stream')
+
+
+class _FakeAgent(object):
+    """Serves the nested container session calls of a Mesos agent on a
+    local port. The command echoes its STDIN to STDOUT, or prints
+    `output` if it is not interactive."""
+
+    def __init__(self, output=(), exit_status=0):
+        self.output = output
+        self.exit_status = exit_status
+        self.calls = []
+        self.connections = []
+        self.stdin = asyncio.Queue()
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            lambda reader, writer: self.connections.append(
+                asyncio.ensure_future(self._serve(reader, writer))),
+            '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return 'http://127.0.0.1:{}/api/v1'.format(port)
+
+    async def stop(self):
+        """Waits for the clients to close their connections."""
+
+        self.server.close()
+        if self.connections:
+            await asyncio.wait(self.connections)
+
+    async def _serve(self, reader, writer):
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                name, _, value = line.decode().partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            if headers.get('transfer-encoding') == 'chunked':
+                await self._attach_input(reader, writer)
+                continue
+
+            body = await reader.readexactly(int(headers['content-length']))
+            call = json.loads(body.decode()) if \
+                headers['content-type'] == 'application/json' else \
+                _decode_records(body)[0]
+            self.calls.append(call['type'])
+            if call['type'] == 'LAUNCH_NESTED_CONTAINER_SESSION':
+                await self._launch(call, writer)
+            elif call['type'] == 'WAIT_NESTED_CONTAINER':
+                body = json.dumps({
+                    'type': 'WAIT_NESTED_CONTAINER',
+                    'wait_nested_container': {
+                        'exit_status': self.exit_status}}).encode()
+                writer.write('HTTP/1.1 200 OK\r\nContent-Length: {}\r\n\r\n'
+                             .format(len(body)).encode() + body)
+            else:
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n')
+
+    async def _launch(self, call, writer):
+        writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n')
+        if self.output:
+            outputs = self.output
+        else:
+            outputs = []
+            while True:
+                data = await self.stdin.get()
+                if not data:
+                    break
+                outputs.append(('STDOUT', data))
+
+        for output in outputs:
+            record = _output_records(output)
+            writer.write('{:x}\r\n'.format(len(record)).encode() + record +
+                         b'\r\n')
+        writer.write(b'0\r\n\r\n')
+
+    async def _attach_input(self, reader, writer):
+        self.calls.append('ATTACH_CONTAINER_INPUT')
+        decoder = recordio.Decoder(lambda s: json.loads(s.decode('utf-8')))
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            data = await reader.readexactly(size + 2)
+            if not size:
+                break
+            for message in decoder.decode(data[:-2]):
+                process_io = message['attach_container_input'].get(
+                    'process_io', {})
+                if process_io.get('type') == 'DATA':
+                    await self.stdin.put(base64.b64decode(
+                        process_io['data']['data']))
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n')
+
+
+def _decode_records(data):
+    decoder = recordio.Decoder(lambda s: json.loads(s.decode('utf-8')))
+    return decoder.decode(data)
+
+
+def _async_task_io(agent_url, interactive, stdout, stderr, pool):
+    with mock.patch('dcos.mesos.DCOSClient') as client, \
+            mock.patch('dcos.mesos.get_master'):
+        client.return_value._mesos_master_url = None
+        client.return_value.slave_url.return_value = agent_url
+        task_io = mesos.AsyncTaskIO('app.1', 'cat', [],
+                                    interactive=interactive,
+                                    stdout=stdout, stderr=stderr, pool=pool)
+    task_io.parent_id = {'value': 'parent'}
+    return task_io
+
+
+def test_async_task_io_session():
+    log = []
+    agent = _FakeAgent([('STDOUT', b'a'), ('STDERR', b'b')])
+
+    async def _run():
+        pool = asynchttp.ConnectionPool(
+            config.Toml({'core': {'dcos_url': 'http://dcos'}}))
+        task_io = _async_task_io(await agent.start(), False,
+                                 _Stream('stdout', log),
+                                 _Stream('stderr', log), pool)
+        await task_io.session()
+        await task_io.session()
+        pool.close()
+        await agent.stop()
+        return pool
+
+    loop = asyncio.new_event_loop()
+    pool = loop.run_until_complete(_run())
+    loop.close()
+
+    assert log == [('stdout', b'a'), ('stdout', 'flush'),
+                   ('stderr', b'b'), ('stderr', 'flush')] * 2
+    assert agent.calls == ['LAUNCH_NESTED_CONTAINER_SESSION'] * 2
+    assert (pool.requests, pool.opened, len(agent.connections)) == (2, 1, 1)
+
+
+def test_async_task_io_interactive_session():
+    content = os.urandom(300 * 1024)
+    read_fd, write_fd = os.pipe()
+    log = []
+    agent = _FakeAgent()
+
+    def _write():
+        with os.fdopen(write_fd, 'wb') as stdin:
+            stdin.write(content)
+
+    async def _run():
+        pool = asynchttp.ConnectionPool(
+            config.Toml({'core': {'dcos_url': 'http://dcos'}}))
+        task_io = _async_task_io(await agent.start(), True,
+                                 _Stream('stdout', log),
+                                 _Stream('stderr', log), pool)
+        await task_io.session()
+        pool.close()
+        await agent.stop()
+        return pool
+
+    writer = threading.Thread(target=_write)
+    writer.start()
+    loop = asyncio.new_event_loop()
+    with os.fdopen(read_fd, 'rb') as stdin, mock.patch('sys.stdin', stdin):
+        pool = loop.run_until_complete(_run())
+    loop.close()
+    writer.join()
+
+    assert b''.join(data for _, data in log if data != 'flush') == content
+    assert agent.calls == ['LAUNCH_NESTED_CONTAINER_SESSION',
+                           'ATTACH_CONTAINER_INPUT', 'ATTACH_CONTAINER_INPUT']
+    # The input check's connection is reused by the input stream
+    assert (pool.requests, pool.opened) == (3, 2)
+
+
+@pytest.mark.parametrize('status, exit_code', [
+    (None, None), (0, 0), (3 << 8, 3), (9, 137)])
+def test_exit_code(status, exit_code):
+    assert mesos._exit_code(status) == exit_code
+
+
+def test_line_prefixer():
+    stream = io.BytesIO()
+    prefixer = mesos._LinePrefixer(b'app.1 | ', stream)
+    prefixer.write(b'a\nb')
+    prefixer.write(bytearray(b'c\n\nd'))
+    assert stream.getvalue() == b'app.1 | a\napp.1 | bc\napp.1 | \n'
+
+    prefixer.close()
+    assert stream.getvalue().endswith(b'app.1 | d\n')
+
+
+def test_exec_tasks():
+    agent = _FakeAgent([('STDOUT', b'out\n'), ('STDERR', b'err')],
+                       exit_status=1 << 8)
+    agent_loop = asyncio.new_event_loop()
+    agent_url = agent_loop.run_until_complete(agent.start())
+    agent_thread = threading.Thread(target=agent_loop.run_forever)
+    agent_thread.start()
+
+    client = mock.MagicMock()
+    client._mesos_master_url = None
+    client.slave_url.return_value = agent_url
+    master = mock.MagicMock()
+    master.get_container_id.return_value = {'value': 'parent'}
+    stdout, stderr = io.BytesIO(), io.BytesIO()
+
+    try:
+        with mock.patch('dcos.config.get_config',
+                        return_value=config.Toml({})):
+            results = mesos.exec_tasks(
+                ['app.1', 'app.10'], 'cat', parallel=1, client=client,
+                master=master, stdout=stdout, stderr=stderr)
+    finally:
+        asyncio.run_coroutine_threadsafe(agent.stop(), agent_loop).result()
+        agent_loop.call_soon_threadsafe(agent_loop.stop)
+        agent_thread.join()
+        agent_loop.close()
+
+    assert [(r.task_id, r.exit_code, r.error) for r in results] == [
+        ('app.1', 1, None), ('app.10', 1, None)]
+    assert stdout.getvalue() == b'app.1  | out\napp.10 | out\n'
+    assert stderr.getvalue() == b'app.1  | err\napp.10 | err\n'
+    assert agent.calls == ['LAUNCH_NESTED_CONTAINER_SESSION',
+                           'WAIT_NESTED_CONTAINER'] * 2
+    # All the calls share one connection
+    assert len(agent.connections) == 1
@@ -1,5 +1,7 @@
 import json
 
+import pytest
+
 from dcos import recordio
 from dcos.errors import DCOSException
 
@@ -72,3 +74,29 @@ def test_encode_decode():
     except Exception as exception:
         raise DCOSException("Error decoding 'RecordIO' messages: {error}"
                             .format(error=exception))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 100, 100000])
+def test_decode_records_across_chunks(chunk_size):
+    records = [b'', b'a', b'x' * 1000, b'\n\n', b'', b'y' * 70000]
+    encoder = recordio.Encoder(lambda s: s)
+    encoded = b''.join(encoder.encode(record) for record in records)
+
+    decoder = recordio.Decoder(lambda s: s)
+    decoded = []
+    for offset in range(0, len(encoded), chunk_size):
+        decoded += decoder.decode(encoded[offset:offset + chunk_size])
+
+    assert decoded == records
+    assert all(type(record) is bytes for record in decoded)
+    assert not decoder.buffer
+
+
+def test_decode_invalid_length():
+    decoder = recordio.Decoder(lambda s: s)
+
+    with pytest.raises(DCOSException):
+        decoder.decode(b'2\nab1x\nc')
+
+    with pytest.raises(DCOSException):
+        decoder.decode(b'1\na')
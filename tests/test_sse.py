@@ -0,0 +1,70 @@
+import mock
+import pytest
+
+from dcos import sse
+from dcos.errors import DCOSConnectionError
+from dcos.sse import Event
+
+
+STREAM = (b': keep-alive\n\n'
+          b'id: 1\r\n'
+          b'data: {"a": 1}\r\n'
+          b'\r\n'
+          b'event: update\n'
+          b'data:first\n'
+          b'data: second\n'
+          b'retry: 3000\n'
+          b'\n'
+          b'id\n'
+          b'data\n'
+          b'\n'
+          b'data: incomplete\n')
+
+
+@pytest.mark.parametrize('size', [1, 7, len(STREAM)])
+def test_event_parser(size):
+    parser = sse.EventParser()
+    events = []
+    for i in range(0, len(STREAM), size):
+        events += parser.feed(STREAM[i:i + size])
+
+    assert events == [Event('1', None, '{"a": 1}'),
+                      Event('1', 'update', 'first\nsecond'),
+                      Event('', None, '')]
+    assert parser.retry == 3000
+
+
+def test_stream():
+    response = mock.MagicMock()
+    chunks = [b'data: a\n\ndata: b\n', b'\ndata: c', b'\n\n', b'']
+    response.raw.read1.side_effect = lambda size: chunks.pop(0)
+
+    with mock.patch('dcos.http.get', return_value=response) as get:
+        batches = list(sse.stream('http://dcos/logs'))
+
+    assert batches == [[Event('', None, 'a')],
+                       [Event('', None, 'b')],
+                       [Event('', None, 'c')]]
+    get.assert_called_with('http://dcos/logs', stream=True,
+                           headers={'Accept': 'text/event-stream'})
+    response.close.assert_called_with()
+
+
+def test_stream_dropped():
+    response = mock.MagicMock()
+    chunks = [b'data: a\n\n', ConnectionResetError()]
+
+    def _read1(size):
+        chunk = chunks.pop(0)
+        if isinstance(chunk, Exception):
+            raise chunk
+        return chunk
+    response.raw.read1.side_effect = _read1
+
+    with mock.patch('dcos.http.get', return_value=response):
+        stream = sse.stream('http://dcos/logs')
+        assert next(stream) == [Event('', None, 'a')]
+        with pytest.raises(DCOSConnectionError):
+            next(stream)
+
+    response.close.assert_called_with()
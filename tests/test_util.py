@@ -1,5 +1,8 @@
+import collections
 import contextlib
 import os
+import threading
+import time
 
 import pytest
 
@@ -43,3 +46,64 @@ def create_global_config(dcos_dir):
     global_toml = os.path.join(dcos_dir, "dcos.toml")
     util.ensure_file_exists(global_toml)
     return global_toml
+
+
+def test_stream_ordered():
+    def _slow_first(n):
+        time.sleep(0.05 if n == 0 else 0)
+        return n * 2
+
+    results = [(job.result(), n)
+               for job, n in util.stream(_slow_first, range(5), ordered=True)]
+    assert results == [(0, 0), (2, 1), (4, 2), (6, 3), (8, 4)]
+
+
+def test_stream_limits_concurrency_per_key():
+    lock = threading.Lock()
+    running = collections.Counter()
+    most = collections.Counter()
+
+    def _fn(obj):
+        with lock:
+            running[obj[0]] += 1
+            most[obj[0]] = max(most[obj[0]], running[obj[0]])
+        time.sleep(0.01)
+        with lock:
+            running[obj[0]] -= 1
+
+    objs = [(host, i) for i in range(6) for host in 'ab']
+    assert len(list(util.stream(_fn, objs, key=lambda obj: obj[0],
+                                key_concurrency=2))) == 12
+    assert most == {'a': 2, 'b': 2}
+
+
+def test_stream_nested():
+    def _inner(n):
+        time.sleep(0.01)
+        return n + 1
+
+    def _outer(n):
+        return [job.result() for job, _ in
+                util.stream(_inner, range(n, n + 3), ordered=True)]
+
+    # more outer calls than threads, which would all wait for the pool
+    # if the inner calls were queued on it
+    n = 2 * util.STREAM_CONCURRENCY
+    results = [job.result()
+               for job, _ in util.stream(_outer, range(n), ordered=True)]
+    assert results == [[i + 1, i + 2, i + 3] for i in range(n)]
+
+
+def test_stream_takes_objs_lazily():
+    taken = []
+
+    def _objs():
+        for i in range(10000):
+            taken.append(i)
+            yield i
+
+    jobs = util.stream(lambda n: n, _objs())
+    next(jobs)
+    jobs.close()
+
+    assert len(taken) <= 2 * util.STREAM_CONCURRENCY